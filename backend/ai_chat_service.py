@@ -3,183 +3,46 @@
 AI聊天服务 - 数据分析助手
 """
 
-import openai
 import json
-import sqlite3
 from datetime import datetime, timedelta
 from config import config
+from llm_gateway import llm_gateway
+from llm_resilience import classify_error
+from prompt_context import PromptContextBuilder, estimate_tokens
+from stats_snapshot import StatsSnapshot
 
 class AIChatService:
     def __init__(self):
-        # 从配置文件加载API配置
-        self.client = openai.OpenAI(
-            api_key=config.get('llm.api_key'),
-            base_url=config.get('llm.base_url')
-        )
+        # 从配置文件加载模型参数，请求统一经过异步的 llm_gateway
         self.model = config.get('llm.model', 'ernie-4.5-turbo-32k')
         self.temperature = config.get('llm.temperature', 0.7)
         self.max_tokens = config.get('llm.max_tokens', 2000)
         
-        # 缓存数据
-        self.cached_data = None
-        self.cache_timestamp = None
-
-    def get_recruitment_data(self):
-        """获取招聘数据用于AI分析 - 直接从Excel和真实数据"""
-        import pandas as pd
-        from pathlib import Path
-        import json
-        from datetime import datetime, timedelta
-        
-        # 检查缓存
-        now = datetime.now()
-        if (self.cached_data and self.cache_timestamp and 
-            (now - self.cache_timestamp).seconds < 300):  # 5分钟缓存
-            return self.cached_data
+        # 统计快照：数据源未变化时直接返回已汇总的数据和摘要
+        self.snapshot = StatsSnapshot(build=self._build_snapshot)
         
+        # 对话的数据上下文：按问题挑选最相关的汇总表和候选人，控制在token预算内
+        self.context_builder = PromptContextBuilder()
+
+    def get_recruitment_context(self):
+        """获取招聘数据和数据摘要 (数据, 摘要)，来自按数据源增量刷新的统计快照"""
         try:
-            data = {}
-            
-            # 1. 读取真实候选人JSON数据
-            real_data_path = Path("../frontend/data/real_data.json")
-            if real_data_path.exists():
-                with open(real_data_path, 'r', encoding='utf-8') as f:
-                    real_data = json.load(f)
-                    data['jobs'] = real_data.get('jobs', [])
-                    data['candidates'] = real_data.get('candidates', [])
-                    print(f"从JSON加载: {len(data['jobs'])}个职位, {len(data['candidates'])}个候选人")
-            else:
-                data['jobs'] = []
-                data['candidates'] = []
-            
-            # 2. 直接读取Excel文件
-            try:
-                # 尝试多个可能的路径
-                possible_paths = [
-                    "../resouse/job.xlsx",
-                    "./resouse/job.xlsx", 
-                    "resouse/job.xlsx",
-                    "/Users/mac/Documents/GitHub/test2_1025/resouse/job.xlsx"
-                ]
-                
-                job_df = None
-                for path in possible_paths:
-                    job_excel_path = Path(path)
-                    print(f"尝试路径: {job_excel_path.absolute()}")
-                    if job_excel_path.exists():
-                        print(f"找到职位文件: {path}")
-                        job_df = pd.read_excel(job_excel_path)
-                        break
-                
-                if job_df is not None:
-                    data['job_excel'] = job_df.to_dict('records')
-                    print(f"从Excel加载职位数据: {len(data['job_excel'])}条")
-                else:
-                    data['job_excel'] = []
-                    print("未找到职位Excel文件")
-                
-                # 读取候选人Excel
-                candidate_df = None
-                candidate_paths = [
-                    "../resouse/candidate.xlsx",
-                    "./resouse/candidate.xlsx",
-                    "resouse/candidate.xlsx", 
-                    "/Users/mac/Documents/GitHub/test2_1025/resouse/candidate.xlsx"
-                ]
-                
-                for path in candidate_paths:
-                    candidate_excel_path = Path(path)
-                    print(f"尝试路径: {candidate_excel_path.absolute()}")
-                    if candidate_excel_path.exists():
-                        print(f"找到候选人文件: {path}")
-                        candidate_df = pd.read_excel(candidate_excel_path)
-                        break
-                
-                if candidate_df is not None:
-                    data['candidate_excel'] = candidate_df.to_dict('records')
-                    print(f"从Excel加载候选人数据: {len(data['candidate_excel'])}条")
-                else:
-                    data['candidate_excel'] = []
-                    print("未找到候选人Excel文件")
-                    
-            except Exception as e:
-                print(f"读取Excel文件失败: {e}")
-                import traceback
-                traceback.print_exc()
-                data['job_excel'] = []
-                data['candidate_excel'] = []
-            
-            # 3. 读取CSV评分数据（如果存在）
-            csv_path = Path("../frontend/data/candidate_evaluations.csv")
-            if csv_path.exists():
-                try:
-                    df = pd.read_csv(csv_path, encoding='utf-8')
-                    data['csv_evaluations'] = df.to_dict('records')
-                    print(f"从CSV加载评分数据: {len(data['csv_evaluations'])}条")
-                except Exception as e:
-                    print(f"读取CSV失败: {e}")
-                    data['csv_evaluations'] = []
-            else:
-                data['csv_evaluations'] = []
-            
-            # 4. 尝试从数据库获取补充数据（如果表存在）
-            data['db_evaluations'] = []
-            data['interview_sessions'] = []
-            
-            try:
-                conn = sqlite3.connect('recruitment.db')
-                cursor = conn.cursor()
-                
-                # 检查表是否存在
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = [row[0] for row in cursor.fetchall()]
-                print(f"数据库中的表: {tables}")
-                
-                if 'candidate_evaluations' in tables:
-                    cursor.execute('''
-                        SELECT candidate_id, knowledge, skill, ability, personality, 
-                               motivation, value, total_score, updated_at
-                        FROM candidate_evaluations
-                        ORDER BY updated_at DESC
-                    ''')
-                    
-                    evaluations = []
-                    for row in cursor.fetchall():
-                        evaluations.append({
-                            'candidate_id': row[0],
-                            'knowledge': row[1],
-                            'skill': row[2],
-                            'ability': row[3],
-                            'personality': row[4],
-                            'motivation': row[5],
-                            'value': row[6],
-                            'total_score': row[7],
-                            'updated_at': row[8]
-                        })
-                    
-                    data['db_evaluations'] = evaluations
-                    print(f"从数据库加载评分: {len(evaluations)}条")
-                
-                conn.close()
-                
-            except Exception as e:
-                print(f"数据库查询失败: {e}")
-            
-            # 5. 计算统计数据
-            stats = self.calculate_statistics(data)
-            data['statistics'] = stats
-            
-            # 更新缓存
-            self.cached_data = data
-            self.cache_timestamp = now
-            
-            return data
-            
+            return self.snapshot.get()
         except Exception as e:
             print(f"获取招聘数据失败: {e}")
             import traceback
             traceback.print_exc()
-            return self.get_fallback_data()
+            data = self.get_fallback_data()
+            return data, self.format_data_for_ai(data)
+
+    def get_recruitment_data(self):
+        """获取招聘数据用于AI分析 - 直接从Excel和真实数据"""
+        return self.get_recruitment_context()[0]
+
+    def _build_snapshot(self, data):
+        """汇总各数据源：计算统计数据并生成AI使用的数据摘要"""
+        data['statistics'] = self.calculate_statistics(data)
+        return data, self.format_data_for_ai(data)
 
     def calculate_statistics(self, data):
         """计算统计数据 - 基于真实Excel数据"""
@@ -306,15 +169,11 @@ class AIChatService:
             }
         }
 
-    def chat_with_ai(self, user_message, context=None):
-        """与AI进行对话 - 基于真实数据"""
-        
-        # 获取最新的招聘数据
-        recruitment_data = self.get_recruitment_data()
-        stats = recruitment_data.get('statistics', {})
-        
-        # 构建详细的数据上下文
-        data_summary = self.format_data_for_ai(recruitment_data)
+    def _build_chat_messages(self, user_message):
+        """构建基于真实数据的对话消息，返回 (消息列表, 招聘数据, 数据上下文, token用量)"""
+        # 获取最新的招聘数据，按问题在token预算内挑选数据上下文
+        recruitment_data, _ = self.get_recruitment_context()
+        data_summary, context_usage = self.context_builder.build(recruitment_data, user_message)
         
         # 构建系统提示
         system_prompt = f"""
@@ -357,34 +216,74 @@ class AIChatService:
 4. 提供具体的数字和百分比
 """
 
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        context_usage["prompt_tokens"] = sum(estimate_tokens(m["content"]) for m in messages)
+        print(f"AI对话上下文: {context_usage['context_tokens']}/{context_usage['budget_tokens']} tokens, "
+              f"候选人 {context_usage['candidates_included']}/{context_usage['candidates_total']}")
+        return messages, recruitment_data, data_summary, context_usage
+
+    def _chat_fallback(self, stats):
+        """AI服务不可用时基于统计数据的简要回答"""
+        return f"抱歉，AI服务暂时不可用。基于当前数据：总候选人{stats.get('total_candidates', 0)}人，已完成面试{stats.get('completed_interviews', 0)}人，平均分{stats.get('average_score', 0):.1f}分。请稍后再试完整的AI分析。"
+
+    async def chat_with_ai(self, user_message, context=None):
+        """与AI进行对话 - 基于真实数据"""
+        messages, recruitment_data, data_summary, context_usage = self._build_chat_messages(user_message)
+        stats = recruitment_data.get('statistics', {})
+
         try:
-            response = self.client.chat.completions.create(
-                model="ernie-4.5-turbo-32k",  # 使用文心大模型
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+            ai_response = await llm_gateway.chat_completion(
+                messages=messages,
                 temperature=0.3,  # 降低温度以提高准确性
-                max_tokens=800
+                max_tokens=800,
+                operation="ai_chat"
             )
             
-            ai_response = response.choices[0].message.content
-            
             return {
                 "response": ai_response,
                 "data_context": recruitment_data,
                 "data_summary": data_summary,
+                "context_usage": context_usage,
                 "timestamp": datetime.now().isoformat()
             }
             
         except Exception as e:
             print(f"AI对话失败: {e}")
             return {
-                "response": f"抱歉，AI服务暂时不可用。基于当前数据：总候选人{stats.get('total_candidates', 0)}人，已完成面试{stats.get('completed_interviews', 0)}人，平均分{stats.get('average_score', 0):.1f}分。请稍后再试完整的AI分析。",
+                "response": self._chat_fallback(stats),
                 "error": str(e),
+                "fallback_reason": classify_error(e),
+                "context_usage": context_usage,
                 "timestamp": datetime.now().isoformat()
             }
 
+    async def stream_chat(self, user_message, context=None, usage=None):
+        """
+        流式对话：逐段返回AI回复；尚未输出内容时AI服务出错则返回基于数据的简要回答
+        传入 usage 字典时写入本次请求的 context_usage
+        """
+        messages, recruitment_data, _, context_usage = self._build_chat_messages(user_message)
+        if usage is not None:
+            usage["context_usage"] = context_usage
+        emitted = False
+        try:
+            async for delta in llm_gateway.stream_chat_completion(
+                messages=messages,
+                temperature=0.3,
+                max_tokens=800,
+                operation="ai_chat"
+            ):
+                emitted = True
+                yield delta
+        except Exception as e:
+            print(f"AI对话失败: {e}")
+            if emitted:
+                raise
+            yield self._chat_fallback(recruitment_data.get('statistics', {}))
+
     def format_data_for_ai(self, data):
         """格式化数据供AI使用 - 基于真实Excel数据"""
         stats = data.get('statistics', {})
@@ -453,11 +352,9 @@ class AIChatService:
         
         return summary.strip()
 
-    def generate_analytics_report(self, report_type="comprehensive"):
-        """生成基于真实数据的分析报告"""
-        
-        recruitment_data = self.get_recruitment_data()
-        data_summary = self.format_data_for_ai(recruitment_data)
+    def _build_report_messages(self, report_type):
+        """构建分析报告的消息，返回 (消息列表, 招聘数据, 数据摘要)"""
+        recruitment_data, data_summary = self.get_recruitment_context()
         
         report_prompt = f"""
 基于以下真实招聘数据，生成一份专业的{report_type}分析报告：
@@ -483,19 +380,41 @@ class AIChatService:
 请确保所有结论都有数据支撑，不要推测或编造信息。
 """
 
+        messages = [
+            {"role": "system", "content": "你是一个专业的HR数据分析师，专门基于真实数据生成准确的招聘分析报告。"},
+            {"role": "user", "content": report_prompt}
+        ]
+        return messages, recruitment_data, data_summary
+
+    def _report_fallback(self, stats):
+        """AI服务不可用时基于基础数据的简化报告"""
+        return f"""
+招聘数据分析报告
+
+数据概览：
+- 总候选人：{stats.get('total_candidates', 0)}人
+- 已完成面试：{stats.get('completed_interviews', 0)}人
+- 面试完成率：{stats.get('completion_rate', 0):.1f}%
+- 平均得分：{stats.get('average_score', 0):.1f}分
+
+注意：由于AI服务暂时不可用，这是基于基础数据的简化报告。
+建议稍后重新生成完整的AI分析报告。
+"""
+
+    async def generate_analytics_report(self, report_type="comprehensive"):
+        """生成基于真实数据的分析报告"""
+        messages, recruitment_data, data_summary = self._build_report_messages(report_type)
+
         try:
-            response = self.client.chat.completions.create(
-                model="ernie-4.5-turbo-32k",
-                messages=[
-                    {"role": "system", "content": "你是一个专业的HR数据分析师，专门基于真实数据生成准确的招聘分析报告。"},
-                    {"role": "user", "content": report_prompt}
-                ],
+            report = await llm_gateway.chat_completion(
+                messages=messages,
                 temperature=0.2,
-                max_tokens=1500
+                max_tokens=1500,
+                operation="analytics_report"
             )
             
             return {
-                "report": response.choices[0].message.content,
+                "report": report,
                 "report_type": report_type,
                 "generated_at": datetime.now().isoformat(),
                 "data_source": recruitment_data,
@@ -504,26 +423,32 @@ class AIChatService:
             
         except Exception as e:
             print(f"生成报告失败: {e}")
-            stats = recruitment_data.get('statistics', {})
-            fallback_report = f"""
-招聘数据分析报告
-
-数据概览：
-- 总候选人：{stats.get('total_candidates', 0)}人
-- 已完成面试：{stats.get('completed_interviews', 0)}人
-- 面试完成率：{stats.get('completion_rate', 0):.1f}%
-- 平均得分：{stats.get('average_score', 0):.1f}分
-
-注意：由于AI服务暂时不可用，这是基于基础数据的简化报告。
-建议稍后重新生成完整的AI分析报告。
-"""
-            
             return {
-                "report": fallback_report,
+                "report": self._report_fallback(recruitment_data.get('statistics', {})),
                 "report_type": report_type,
                 "error": str(e),
+                "fallback_reason": classify_error(e),
                 "generated_at": datetime.now().isoformat()
             }
 
+    async def stream_analytics_report(self, report_type="comprehensive"):
+        """流式生成分析报告，逐段返回报告文本"""
+        messages, recruitment_data, _ = self._build_report_messages(report_type)
+        emitted = False
+        try:
+            async for delta in llm_gateway.stream_chat_completion(
+                messages=messages,
+                temperature=0.2,
+                max_tokens=1500,
+                operation="analytics_report"
+            ):
+                emitted = True
+                yield delta
+        except Exception as e:
+            print(f"生成报告失败: {e}")
+            if emitted:
+                raise
+            yield self._report_fallback(recruitment_data.get('statistics', {}))
+
 # 创建全局AI聊天服务实例
 ai_chat_service = AIChatService()
\ No newline at end of file
@@ -1,14 +1,16 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from db_pool import db_pool
 from .models import Base
 
-# 数据库配置
-DATABASE_URL = "sqlite:///./recruitment.db"
-
 # 创建数据库引擎
+# 连接由共享连接池（db_pool）提供，与各接口使用相同的数据库文件和PRAGMA设置；
+# SQLAlchemy 自身不再缓存连接，关闭时连接直接归还 db_pool
 engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}  # SQLite特定配置
+    "sqlite://",
+    creator=db_pool.get_connection,
+    poolclass=NullPool
 )
 
 # 创建会话工厂
@@ -24,4 +26,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
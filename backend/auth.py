@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+用户认证 - 密码哈希和JWT令牌
+PBKDF2 计算在线程池中执行（hashlib 计算期间释放GIL，多核可以并行），不阻塞事件循环；
+线程数有上限，登录高峰时多出的请求排队等待而不是占满CPU。哈希带算法和迭代次数，
+调整迭代次数后旧哈希仍可验证，并在下次登录时按新参数重新计算。
+已验证的令牌缓存到过期为止，重复验证同一令牌不再解码和验签
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import jwt
+
+from config import config
+
+ALGORITHM = "pbkdf2_sha256"
+# 旧格式（32位十六进制salt + 哈希，无分隔符）固定使用的迭代次数
+LEGACY_ITERATIONS = 100000
+
+
+class PasswordHasher:
+    """在有界线程池中计算和验证 PBKDF2 密码哈希"""
+
+    def __init__(self, iterations=None, workers=None):
+        self.iterations = iterations or config.get('password.pbkdf2_iterations', 100000)
+        # 0 表示使用CPU核数
+        self.workers = workers or config.get('password.hash_workers', 0) or os.cpu_count() or 1
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self._hashed = 0
+        self._verified = 0
+        self._rejected = 0
+        self._rehashed = 0
+        self._seconds = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    def _derive(self, password, salt, iterations):
+        start = time.perf_counter()
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations)
+        with self._lock:
+            self._seconds += time.perf_counter() - start
+        return digest.hex()
+
+    def hash_sync(self, password):
+        """计算哈希：pbkdf2_sha256$迭代次数$salt$哈希"""
+        salt = secrets.token_hex(16)
+        with self._lock:
+            self._hashed += 1
+        return f"{ALGORITHM}${self.iterations}${salt}${self._derive(password, salt, self.iterations)}"
+
+    def verify_sync(self, password, stored_hash):
+        """验证密码，返回 (是否匹配, 是否需要按当前参数重新计算哈希)"""
+        legacy = not stored_hash.startswith(f"{ALGORITHM}$")
+        if not legacy:
+            try:
+                _, iterations, salt, expected = stored_hash.split("$")
+                iterations = int(iterations)
+            except ValueError:
+                with self._lock:
+                    self._verified += 1
+                    self._rejected += 1
+                return False, False
+        else:
+            iterations, salt, expected = LEGACY_ITERATIONS, stored_hash[:32], stored_hash[32:]
+
+        matched = hmac.compare_digest(self._derive(password, salt, iterations), expected)
+        with self._lock:
+            self._verified += 1
+            if not matched:
+                self._rejected += 1
+        return matched, matched and (legacy or iterations != self.iterations)
+
+    async def hash(self, password):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.hash_sync, password)
+
+    async def verify(self, password, stored_hash):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.verify_sync, password, stored_hash)
+
+    def record_rehash(self):
+        with self._lock:
+            self._rehashed += 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            computed = self._hashed + self._verified
+            return {
+                "iterations": self.iterations,
+                "workers": self.workers,
+                "hashed": self._hashed,
+                "verified": self._verified,
+                "rejected": self._rejected,
+                "rehashed": self._rehashed,
+                "avg_ms": round(self._seconds / computed * 1000, 2) if computed else 0.0
+            }
+
+
+class TokenService:
+    """签发和验证JWT；验证结果按令牌缓存到过期时间，超出容量时淘汰最久未用的"""
+
+    def __init__(self, secret_key=None, expire_days=None, cache_size=None):
+        self.secret_key = secret_key or config.get('jwt.secret_key', 'your-secret-key-here')
+        self.expire_days = expire_days or config.get('jwt.expire_days', 7)
+        self.cache_size = cache_size or config.get('jwt.verify_cache_size', 1024)
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalid = 0
+
+    def issue(self, user_id, email, user_type):
+        payload = {
+            "user_id": user_id,
+            "email": email,
+            "user_type": user_type,
+            "exp": datetime.utcnow() + timedelta(days=self.expire_days)
+        }
+        return jwt.encode(payload, self.secret_key, algorithm="HS256")
+
+    def verify(self, token):
+        """返回令牌中的用户信息；无效或过期时抛出 jwt.InvalidTokenError"""
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is not None:
+                if entry.get("exp", 0) > now:
+                    self._cache.move_to_end(token)
+                    self._hits += 1
+                    return dict(entry)
+                del self._cache[token]
+            self._misses += 1
+
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=["HS256"])
+        except jwt.InvalidTokenError:
+            with self._lock:
+                self._invalid += 1
+            raise
+
+        with self._lock:
+            self._cache[token] = payload
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(payload)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "cached_tokens": len(self._cache),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalid": self._invalid,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# 创建全局实例
+password_hasher = PasswordHasher()
+token_service = TokenService()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+POST /api/auth/login 吞吐量基准
+在临时数据库中注册一个用户，并发发出登录请求，对比密码哈希在事件循环中计算（旧实现）
+与在不同线程数的线程池中计算时的每秒登录数，以及登录期间事件循环的最长卡顿
+
+用法: python benchmark_auth.py [并发登录数] [线程数 ...]
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main
+from auth import PasswordHasher
+from db_pool import SQLitePool
+from migrations import run_migrations
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class InlineHasher(PasswordHasher):
+    """旧实现：直接在事件循环中计算哈希"""
+
+    async def hash(self, password):
+        return self.hash_sync(password)
+
+    async def verify(self, password, stored_hash):
+        return self.verify_sync(password, stored_hash)
+
+
+async def _max_loop_lag(stop):
+    """每 5ms 唤醒一次，记录实际唤醒的最大延迟"""
+    lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lag = max(lag, time.perf_counter() - start - 0.005)
+    return lag
+
+
+async def _login_burst(logins):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/auth/register", json={
+            "name": "压测用户", "email": "bench@example.com", "password": "secret-password", "user_type": "admin"
+        })
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(_max_loop_lag(stop))
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/api/auth/login", json={
+                "email": "bench@example.com", "password": "secret-password", "user_type": "admin"
+            })
+            for _ in range(logins)
+        ])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        lag = await lag_task
+    assert all(r.status_code == 200 for r in responses), responses[0].text
+    return logins / elapsed, lag
+
+
+def run_benchmark(logins, worker_counts):
+    """运行基准测试并打印结果表"""
+    print(f"CPU核数: {os.cpu_count()}，并发登录: {logins}")
+    print(f"{'哈希方式':>12} {'登录/秒':>10} {'事件循环最长卡顿(ms)':>22}")
+    print("-" * 50)
+    original_pool, original_hasher = main.db_pool, main.password_hasher
+    try:
+        for label, hasher in [("事件循环内", InlineHasher(workers=1))] + [
+            (f"{workers} 线程", PasswordHasher(workers=workers)) for workers in worker_counts
+        ]:
+            with tempfile.TemporaryDirectory() as tmp:
+                pool = SQLitePool(db_path=os.path.join(tmp, "bench.db"), pool_size=8)
+                with pool.connection() as conn, contextlib.redirect_stdout(io.StringIO()):
+                    run_migrations(conn)
+                main.db_pool, main.password_hasher = pool, hasher
+                rate, lag = asyncio.run(_login_burst(logins))
+                hasher.shutdown()
+                pool.close_all()
+            print(f"{label:>12} {rate:>10.1f} {lag * 1000:>22.1f}")
+    finally:
+        main.db_pool, main.password_hasher = original_pool, original_hasher
+
+
+if __name__ == "__main__":
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    cores = os.cpu_count() or 1
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or sorted({1, 2, 4, cores})
+    run_benchmark(logins, worker_counts)
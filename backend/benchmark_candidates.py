@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+GET /api/candidates 面试数据补充性能基准
+对比逐候选人查询（旧实现）与批量聚合查询在 10 ~ 10000 个候选人下的耗时
+
+用法: python benchmark_candidates.py [候选人数量 ...]
+旧实现的耗时随候选人数量平方增长，超过 LEGACY_MAX_SIZE 时只运行批量聚合
+"""
+
+import copy
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from candidate_aggregates import enrich_candidates_with_interviews, is_newer_session
+from migrations import run_migrations
+
+LEGACY_MAX_SIZE = 2000
+
+DIMENSIONS = ['Knowledge', 'Skill', 'Ability', 'Personality', 'Motivation', 'Value']
+
+def legacy_enrich_candidates(cursor, candidates):
+    """旧实现：每个候选人执行4次查询（保留用于对比和一致性校验）"""
+    for candidate in candidates:
+        candidate_name = candidate.get('name')
+        candidate_email = candidate.get('email')
+
+        cursor.execute('''
+            SELECT
+                isq.session_id,
+                COUNT(ia.id) as answer_count,
+                AVG(ia.score) as avg_score,
+                MAX(ia.created_at) as last_answer_time
+            FROM interview_session_questions isq
+            LEFT JOIN interview_answers ia ON isq.session_id = ia.session_id
+            WHERE isq.candidate_name = ?
+            GROUP BY isq.session_id
+            ORDER BY last_answer_time DESC, isq.session_id
+            LIMIT 1
+        ''', (candidate_name,))
+        db_interview_1 = cursor.fetchone()
+
+        cursor.execute('''
+            SELECT
+                isess.session_id,
+                COUNT(ia.id) as answer_count,
+                AVG(ia.score) as avg_score,
+                MAX(ia.created_at) as last_answer_time
+            FROM interview_sessions isess
+            JOIN candidates c ON isess.candidate_id = c.id
+            LEFT JOIN interview_answers ia ON isess.session_id = ia.session_id
+            WHERE c.name = ?
+            GROUP BY isess.session_id
+            ORDER BY last_answer_time DESC, isess.session_id
+            LIMIT 1
+        ''', (candidate_name,))
+        db_interview_2 = cursor.fetchone()
+
+        db_interview = None
+        if db_interview_1 and db_interview_1[1] > 0:
+            if db_interview_2 and db_interview_2[1] > 0:
+                db_interview = db_interview_1 if is_newer_session(db_interview_1, db_interview_2) else db_interview_2
+            else:
+                db_interview = db_interview_1
+        elif db_interview_2 and db_interview_2[1] > 0:
+            db_interview = db_interview_2
+
+        if db_interview and db_interview[0]:
+            session_id, answer_count, avg_score, last_answer_time = db_interview
+            if answer_count > 0:
+                candidate['status'] = '已完成'
+                candidate['score'] = int(avg_score) if avg_score else None
+                candidate['interview_date'] = last_answer_time.split()[0] if last_answer_time else candidate.get('interview_date')
+                candidate['db_interview'] = True
+                candidate['answer_count'] = answer_count
+
+                cursor.execute('''
+                    SELECT ia.dimension, AVG(ia.score) as avg_score
+                    FROM interview_answers ia
+                    WHERE ia.session_id IN (
+                        SELECT session_id FROM interview_session_questions WHERE candidate_name = ?
+                        UNION
+                        SELECT isess.session_id FROM interview_sessions isess
+                        JOIN candidates c ON isess.candidate_id = c.id
+                        WHERE c.name = ?
+                    ) AND ia.score IS NOT NULL
+                    GROUP BY ia.dimension
+                ''', (candidate_name, candidate_name))
+                dimension_map = {
+                    'Knowledge': 'knowledge_score',
+                    'Skill': 'skill_score',
+                    'Ability': 'ability_score',
+                    'Personality': 'personality_score',
+                    'Motivation': 'motivation_score',
+                    'Value': 'value_score'
+                }
+                for dimension, avg_score in cursor.fetchall():
+                    score_key = dimension_map.get(dimension)
+                    if score_key:
+                        candidate[score_key] = round(avg_score, 1) if avg_score else None
+            else:
+                candidate['db_interview'] = False
+                candidate['answer_count'] = 0
+        else:
+            candidate['db_interview'] = False
+            candidate['answer_count'] = 0
+
+        cursor.execute('''
+            SELECT questions_json, strategy, created_at, updated_at
+            FROM interview_questions
+            WHERE candidate_name = ? OR candidate_email = ?
+            ORDER BY updated_at DESC
+            LIMIT 1
+        ''', (candidate_name, candidate_email))
+        result = cursor.fetchone()
+
+        if result:
+            questions_json, strategy, created_at, updated_at = result
+            candidate['interview_questions'] = json.loads(questions_json) if questions_json else []
+            candidate['interview_strategy'] = strategy
+            candidate['questions_generated_at'] = updated_at or created_at
+            candidate['has_questions'] = True
+        else:
+            candidate['interview_questions'] = []
+            candidate['interview_strategy'] = ''
+            candidate['questions_generated_at'] = None
+            candidate['has_questions'] = False
+
+    return candidates
+
+
+def build_dataset(db_path, count, seed=42):
+    """生成包含 count 个候选人的测试数据库，返回Excel风格的候选人列表"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    run_migrations(conn)
+
+    questions = [
+        {"id": i, "dimension": DIMENSIONS[i % 6], "question": f"问题{i}", "follow_up": f"追问{i}"}
+        for i in range(1, 11)
+    ]
+    questions_json = json.dumps(questions, ensure_ascii=False)
+
+    candidates = []
+    for i in range(count):
+        name = f"候选人{i}"
+        email = f"candidate{i}@example.com"
+        candidates.append({
+            "id": i + 1,
+            "name": name,
+            "email": email,
+            "status": "待面试",
+            "score": None,
+            "interview_date": "2025-01-01",
+            "knowledge_score": None,
+            "skill_score": None,
+            "ability_score": None,
+            "personality_score": None,
+            "motivation_score": None,
+            "value_score": None,
+        })
+
+        cursor.execute("INSERT INTO candidates (name, email) VALUES (?, ?)", (name, email))
+        candidate_id = cursor.lastrowid
+
+        # 约一半候选人有预生成问题
+        if rng.random() < 0.5:
+            day = rng.randint(1, 28)
+            cursor.execute('''
+                INSERT INTO interview_questions
+                (candidate_name, candidate_email, position_code, questions_json, strategy, created_at, updated_at)
+                VALUES (?, ?, '1001', ?, '策略', ?, ?)
+            ''', (name, email, questions_json, f"2025-01-{day:02d} 08:00:00", f"2025-01-{day:02d} 09:00:00"))
+
+        # 会话：预生成问题会话或普通会话，部分有回答
+        for s in range(rng.randint(0, 2)):
+            session_id = f"s-{i}-{s}"
+            if rng.random() < 0.6:
+                cursor.execute('''
+                    INSERT INTO interview_session_questions
+                    (session_id, candidate_name, candidate_email, questions_json, strategy)
+                    VALUES (?, ?, ?, ?, '策略')
+                ''', (session_id, name, email, questions_json))
+            else:
+                cursor.execute(
+                    "INSERT INTO interview_sessions (candidate_id, session_id) VALUES (?, ?)",
+                    (candidate_id, session_id)
+                )
+            for q in questions[:rng.randint(0, 10)]:
+                cursor.execute('''
+                    INSERT INTO interview_answers
+                    (session_id, question_id, question_text, answer_text, dimension, score, feedback, created_at)
+                    VALUES (?, ?, ?, '回答', ?, ?, '评价', ?)
+                ''', (session_id, q["id"], q["question"], q["dimension"], rng.randint(40, 100),
+                      f"2025-02-{rng.randint(1, 28):02d} 10:{rng.randint(0, 59):02d}:00"))
+
+    conn.commit()
+    conn.close()
+    return candidates
+
+
+def run_benchmark(sizes):
+    """运行基准测试并打印结果表"""
+    print(f"{'候选人数':>8} {'逐行查询(ms)':>14} {'批量聚合(ms)':>14} {'加速比':>8}")
+    print("-" * 50)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            candidates = build_dataset(db_path, size)
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+
+            batch_input = copy.deepcopy(candidates)
+            start = time.perf_counter()
+            batch_result = enrich_candidates_with_interviews(cursor, batch_input)
+            batch_ms = (time.perf_counter() - start) * 1000
+
+            if size > LEGACY_MAX_SIZE:
+                conn.close()
+                print(f"{size:>8} {'跳过':>12} {batch_ms:>14.1f} {'-':>8}")
+                continue
+
+            legacy_input = copy.deepcopy(candidates)
+            start = time.perf_counter()
+            legacy_result = legacy_enrich_candidates(cursor, legacy_input)
+            legacy_ms = (time.perf_counter() - start) * 1000
+
+            conn.close()
+
+            assert json.dumps(legacy_result, ensure_ascii=False) == json.dumps(batch_result, ensure_ascii=False), \
+                f"{size} 个候选人时两种实现结果不一致"
+
+            print(f"{size:>8} {legacy_ms:>14.1f} {batch_ms:>14.1f} {legacy_ms / batch_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000]
+    run_benchmark(sizes)
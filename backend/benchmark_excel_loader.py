@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+候选人Excel规范化性能基准
+在合成的候选人工作簿上对比逐行 iterrows（旧实现）与按列向量化规范化的耗时
+
+用法: python benchmark_excel_loader.py [行数 ...]
+默认生成 100000 行的工作簿；读取Excel的耗时单独列出，两种实现使用同一个DataFrame
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from excel_data_loader import ExcelDataLoader
+
+POSITIONS = [
+    ("Python工程师服务器端开发-AIGC领域", 1001),
+    ("C端产品经理-AIGC领域", 1002),
+    ("金融海外投资新媒体内容文案编辑运营", 1003),
+    ("数据分析师", None),
+]
+
+DIMENSIONS = ["Knowledge", "Skill", "Ability", "Personality", "Motivation", "Value"]
+
+DATE_FIELDS = ("interview_date", "created_at")
+
+
+def _safe_str(value, default="未提供"):
+    """安全转换为字符串"""
+    return str(value).strip() if pd.notna(value) else default
+
+
+def _safe_float(value):
+    """安全转换为浮点数"""
+    if pd.notna(value) and not np.isinf(value):
+        return float(value)
+    return None
+
+
+def _get_resume_info(loader, candidate_name, position):
+    """根据候选人姓名和职位获取简历文件夹和文件名"""
+    resume_folder, resume_file, found = loader._locate_resume(
+        candidate_name, position, loader._resume_folder(position)
+    )
+    if not found:
+        print(f"警告: 简历文件不存在: {loader.base_path / resume_folder / resume_file}")
+
+    return resume_folder, resume_file
+
+
+def _generate_realistic_salary(name, position, job_id):
+    """基于真实数据生成合理的薪资期望"""
+    # 根据姓名生成一致的随机数（这样每次运行结果一致）
+    hash_val = int(hashlib.md5(name.encode()).hexdigest()[:8], 16)
+
+    # 获取职位的薪资范围
+    min_salary, max_salary = ExcelDataLoader.JOB_SALARY_RANGES.get(job_id, (12000, 25000))
+
+    # 生成薪资期望（在范围内随机，但偏向中低端）
+    range_size = max_salary - min_salary
+    # 70%的候选人期望薪资在前60%范围内
+    if hash_val % 10 < 7:
+        salary = min_salary + (hash_val % int(range_size * 0.6))
+    else:
+        salary = min_salary + int(range_size * 0.6) + (hash_val % int(range_size * 0.4))
+
+    # 格式化为K显示
+    if salary >= 1000:
+        return f"{salary // 1000}K"
+    return f"{salary}"
+
+
+def legacy_normalize_candidates(loader, df):
+    """旧实现：iterrows 逐行规范化（保留用于对比和一致性校验）"""
+    candidates = []
+    for index, row in df.iterrows():
+        # 从Excel读取真实数据，处理NaN值
+        name = _safe_str(row.get("姓名"), f"候选人{index+1}")
+        email = _safe_str(row.get("邮箱"), f"candidate{index+1}@example.com")
+        position = _safe_str(row.get("岗位名称"), "未指定职位")
+        interview_score = row.get("面试总评分", None) if pd.notna(row.get("面试总评分")) else None
+        is_interviewed = _safe_str(row.get("是否已面试（AI）"), "否")
+        interview_time = row.get("面试时间（AI问答完成时间）", None) if pd.notna(row.get("面试时间（AI问答完成时间）")) else None
+        candidate_id = row.get("id", index + 1) if pd.notna(row.get("id")) else index + 1
+        job_id = row.get("岗位编号", None) if pd.notna(row.get("岗位编号")) else None
+
+        # 获取各维度评分
+        knowledge = _safe_float(row.get("Knowledge"))
+        skill = _safe_float(row.get("Skill"))
+        ability = _safe_float(row.get("Ability"))
+        personality = _safe_float(row.get("Personality"))
+        motivation = _safe_float(row.get("Motivation"))
+        value = _safe_float(row.get("Value"))
+
+        # 收集所有有效的维度评分
+        dimension_scores = [s for s in [knowledge, skill, ability, personality, motivation, value] if s is not None]
+
+        # 确定面试状态和评分
+        if interview_score and pd.notna(interview_score):
+            status = "已完成"
+            score = int(float(interview_score))
+        elif dimension_scores:
+            status = "已完成"
+            score = int(sum(dimension_scores) / len(dimension_scores))
+        elif is_interviewed == "是":
+            status = "面试中"
+            score = None
+        else:
+            status = "待面试"
+            score = None
+
+        # 处理面试时间
+        if interview_time and pd.notna(interview_time):
+            try:
+                if isinstance(interview_time, str):
+                    interview_date = datetime.strptime(interview_time, "%Y-%m-%d")
+                else:
+                    interview_date = interview_time
+            except:
+                interview_date = datetime.now() - timedelta(days=random.randint(0, 7))
+        else:
+            interview_date = datetime.now() - timedelta(days=random.randint(0, 7))
+
+        # 根据职位确定简历文件夹
+        resume_folder, resume_file = _get_resume_info(loader, name, position)
+
+        candidate = {
+            "id": candidate_id,
+            "name": name,
+            "email": email,
+            "position": position,
+            "job_id": job_id,
+            "phone": _safe_str(row.get("电话"), "未提供"),
+            "experience": _safe_str(row.get("工作经验"), "未提供"),
+            "education": _safe_str(row.get("学历"), "未提供"),
+            "skills": _safe_str(row.get("技能"), "未提供"),
+            "expected_salary": _generate_realistic_salary(name, position, job_id),
+            "status": status,
+            "score": score,
+            "interview_date": interview_date.strftime("%Y-%m-%d"),
+            "created_at": interview_date.strftime("%Y-%m-%d %H:%M:%S"),
+            "knowledge_score": knowledge,
+            "skill_score": skill,
+            "ability_score": ability,
+            "personality_score": personality,
+            "motivation_score": motivation,
+            "value_score": value,
+            "resume_folder": resume_folder,
+            "resume_file": resume_file
+        }
+        candidates.append(candidate)
+
+    return candidates
+
+
+def legacy_normalize_jobs(loader, df):
+    """旧实现：iterrows 逐行匹配列名别名（保留用于一致性校验）"""
+    jobs = []
+    for index, row in df.iterrows():
+        
+        # 尝试多种可能的列名
+        title_candidates = ["职位全称", "职位名称", "岗位名称", "职位", "岗位", "title", "job_title"]
+        title = f"职位{index+1}"
+        for col in title_candidates:
+            if col in df.columns and pd.notna(row.get(col)):
+                title = _safe_str(row.get(col))
+                break
+        
+        dept_candidates = ["部门", "department", "dept"]
+        department = "技术部"
+        for col in dept_candidates:
+            if col in df.columns and pd.notna(row.get(col)):
+                department = _safe_str(row.get(col))
+                break
+        
+        salary_candidates = ["薪资", "薪资范围", "工资", "salary", "salary_range"]
+        salary = "面议"
+        for col in salary_candidates:
+            if col in df.columns and pd.notna(row.get(col)):
+                salary = _safe_str(row.get(col))
+                break
+        
+        req_candidates = ["职位要求", "岗位要求", "个人能力要求", "要求", "requirements", "job_requirements"]
+        requirements = "未提供"
+        for col in req_candidates:
+            if col in df.columns and pd.notna(row.get(col)):
+                requirements = _safe_str(row.get(col))
+                break
+        
+        desc_candidates = ["职位描述", "岗位描述", "其它补充说明", "描述", "description", "job_description"]
+        description = "未提供"
+        for col in desc_candidates:
+            if col in df.columns and pd.notna(row.get(col)):
+                description = _safe_str(row.get(col))
+                break
+        
+        # 获取招聘数量
+        count_candidates = ["招聘数量", "招聘人数", "人数", "count"]
+        recruit_count = 1
+        for col in count_candidates:
+            if col in df.columns and pd.notna(row.get(col)):
+                try:
+                    recruit_count = int(row.get(col))
+                except:
+                    recruit_count = 1
+                break
+        
+        # 获取发布时间
+        publish_candidates = ["职位发布时间", "发布时间", "创建时间", "publish_date"]
+        publish_date = datetime.now().strftime("%Y-%m-%d")
+        for col in publish_candidates:
+            if col in df.columns and pd.notna(row.get(col)):
+                try:
+                    if isinstance(row.get(col), str):
+                        publish_date = datetime.strptime(row.get(col), "%Y-%m-%d").strftime("%Y-%m-%d")
+                    else:
+                        publish_date = row.get(col).strftime("%Y-%m-%d")
+                except:
+                    publish_date = datetime.now().strftime("%Y-%m-%d")
+                break
+        
+        # 获取招聘状态
+        status_candidates = ["该招聘状态-开启/关闭", "招聘状态", "状态", "status"]
+        status = "招聘中"
+        for col in status_candidates:
+            if col in df.columns and pd.notna(row.get(col)):
+                status_val = _safe_str(row.get(col))
+                if "开启" in status_val or "招聘中" in status_val:
+                    status = "招聘中"
+                elif "关闭" in status_val or "暂停" in status_val:
+                    status = "已暂停"
+                break
+        
+        job = {
+            "id": _safe_str(row.get("职位id"), index + 1),
+            "title": title,
+            "department": department,
+            "location": _safe_str(row.get("工作地点"), "北京"),
+            "salary_range": salary,
+            "requirements": requirements,
+            "description": description,
+            "status": status,
+            "created_at": publish_date,
+            "publish_date": publish_date,
+            "candidate_count": 0,
+            "recruit_count": recruit_count,
+            "recruiter": _safe_str(row.get("招聘负责人"), "HR"),
+            "recruiter_email": _safe_str(row.get("负责人邮箱"), "hr@company.com")
+        }
+        jobs.append(job)
+    
+    return jobs
+
+
+def build_dataframe(rows, seed=42):
+    """生成合成的候选人数据：包含缺失值、无效日期、只有部分维度评分等情况"""
+    rng = np.random.default_rng(seed)
+    position_index = rng.integers(0, len(POSITIONS), rows)
+
+    data = {
+        "id": np.arange(2001, 2001 + rows),
+        "姓名": [f"候选人{i:06d}" for i in range(rows)],
+        "邮箱": [f"user{i}@example.com" if i % 17 else None for i in range(rows)],
+        "岗位名称": [POSITIONS[i][0] for i in position_index],
+        "岗位编号": [POSITIONS[i][1] for i in position_index],
+        "是否已面试（AI）": rng.choice(["是", "否", None], rows),
+        "面试总评分": np.where(rng.random(rows) < 0.2, rng.integers(50, 100, rows), np.nan),
+        "面试时间（AI问答完成时间）": [
+            f"2025-01-{i % 28 + 1:02d}" if i % 5 else (None if i % 2 else "无效日期")
+            for i in range(rows)
+        ],
+        "电话": [f"138{i:08d}" if i % 3 else None for i in range(rows)],
+    }
+    for dimension in DIMENSIONS:
+        data[dimension] = np.where(rng.random(rows) < 0.5, rng.integers(30, 100, rows), np.nan)
+    return pd.DataFrame(data)
+
+
+def comparable(candidates, df):
+    """去掉随机生成的面试日期（原始数据缺失或无效的行）后用于比较"""
+    column = "面试时间（AI问答完成时间）"
+    valid_dates = pd.to_datetime(df[column], format="%Y-%m-%d", errors="coerce").notna().tolist()
+    result = []
+    for candidate, has_date in zip(candidates, valid_dates):
+        candidate = dict(candidate)
+        if not has_date:
+            for field in DATE_FIELDS:
+                candidate.pop(field)
+        result.append(candidate)
+    return json.dumps(result, ensure_ascii=False, default=str)
+
+
+def run_benchmark(sizes):
+    """运行基准测试并打印结果表"""
+    loader = ExcelDataLoader()
+    print(f"{'行数':>8} {'读取Excel(ms)':>14} {'逐行规范化(ms)':>16} {'向量化(ms)':>12} {'加速比':>8}")
+    print("-" * 66)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            workbook = Path(tmp) / "candidate.xlsx"
+            build_dataframe(size).to_excel(workbook, index=False)
+
+            start = time.perf_counter()
+            df = pd.read_excel(workbook)
+            read_ms = (time.perf_counter() - start) * 1000
+
+        # 旧实现每行打印一次简历缺失警告，输出重定向后计时
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            legacy_result = legacy_normalize_candidates(loader, df)
+            legacy_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            vectorized_result = loader._normalize_candidates(df)
+            vectorized_ms = (time.perf_counter() - start) * 1000
+
+        assert comparable(legacy_result, df) == comparable(vectorized_result, df), \
+            f"{size} 行时两种实现结果不一致"
+
+        print(f"{size:>8} {read_ms:>14.1f} {legacy_ms:>16.1f} {vectorized_ms:>12.1f} {legacy_ms / vectorized_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000]
+    run_benchmark(sizes)
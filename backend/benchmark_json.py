@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+候选人列表JSON序列化性能基准
+对比旧实现（递归 clean_for_json 后由标准库 json 序列化）与 FastJSONResponse（orjson，以及未安装 orjson 时的标准库回退）
+在 N 个候选人（含面试问题）响应上的耗时
+
+用法: python benchmark_json.py [候选人数量 ...]
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from starlette.responses import JSONResponse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import fast_json
+from fast_json import FastJSONResponse
+
+REPEAT = 5
+
+
+def clean_for_json(obj):
+    """旧实现：逐个值检查 NumPy 类型，无法识别的对象转为字符串"""
+    if isinstance(obj, dict):
+        return {k: clean_for_json(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [clean_for_json(item) for item in obj]
+    elif isinstance(obj, (np.integer, np.floating)):
+        return obj.item()
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    else:
+        return str(obj)
+
+
+def build_payload(count):
+    """与 GET /api/candidates 响应结构相同的候选人列表，同一职位的候选人共享面试问题"""
+    questions = {
+        position: [
+            {"id": i, "dimension": "Skill", "question": f"{position}面试问题{i}：请描述一个你主导的项目",
+             "follow_up": f"追问{i}：遇到的最大困难是什么？", "evaluation_criteria": "逻辑清晰、细节充分"}
+            for i in range(1, 11)
+        ]
+        for position in ("Python工程师", "产品经理", "新媒体运营")
+    }
+    candidates = []
+    for i in range(count):
+        position = ("Python工程师", "产品经理", "新媒体运营")[i % 3]
+        candidates.append({
+            "id": 2000 + i, "name": f"候选人{i}", "email": f"candidate{i}@example.com", "position": position,
+            "job_id": 1001 + i % 3, "phone": "13800138000", "experience": "3年", "education": "本科",
+            "skills": "Python, Django, MySQL", "expected_salary": "15000", "status": "已完成",
+            "score": 60 + i % 40, "interview_date": "2025-03-01", "created_at": "2025-03-01 10:00:00",
+            "knowledge_score": 80.5, "skill_score": 75.0, "ability_score": None, "personality_score": 66.7,
+            "motivation_score": None, "value_score": None, "resume_folder": "python工程师",
+            "resume_file": f"候选人{i}.pdf", "db_interview": True, "answer_count": 10,
+            "interview_questions": questions[position], "interview_strategy": "综合考察",
+            "questions_generated_at": "2025-02-28 09:00:00", "has_questions": True
+        })
+    return candidates
+
+
+def _best_ms(func):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        body = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(body)
+
+
+def run_benchmark(sizes):
+    """运行基准测试并打印结果表"""
+    print(f"FastJSONResponse 当前使用: {fast_json.backend()}，每项取 {REPEAT} 次中的最短耗时")
+    print(f"{'候选人数':>8} {'旧实现(ms)':>12} {'标准库回退(ms)':>16} {'orjson(ms)':>12} {'响应大小(KB)':>14} {'加速比':>8}")
+    print("-" * 80)
+    for size in sizes:
+        payload = build_payload(size)
+
+        legacy_ms, legacy_size = _best_ms(lambda: JSONResponse(clean_for_json(payload)).body)
+        fallback_ms, _ = _best_ms(lambda: json.dumps(
+            payload, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=fast_json._default
+        ).encode("utf-8"))
+        fast_ms, fast_size = _best_ms(lambda: FastJSONResponse(payload).body)
+
+        assert json.loads(FastJSONResponse(payload).body) == json.loads(JSONResponse(clean_for_json(payload)).body)
+        print(f"{size:>8} {legacy_ms:>12.1f} {fallback_ms:>16.1f} {fast_ms:>12.1f} "
+              f"{fast_size / 1024:>14.0f} {legacy_ms / fast_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    run_benchmark(sizes)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+候选人面试数据聚合
+以固定次数的集合查询为整页候选人计算面试会话、维度均分和面试问题，避免逐行查询
+"""
+
+import json
+
+# 维度到候选人字段的映射
+DIMENSION_SCORE_KEYS = {
+    'Knowledge': 'knowledge_score',
+    'Skill': 'skill_score',
+    'Ability': 'ability_score',
+    'Personality': 'personality_score',
+    'Motivation': 'motivation_score',
+    'Value': 'value_score'
+}
+
+# 预生成问题会话（interview_session_questions）中有回答的会话统计
+SESSION_QUESTION_STATS_SQL = '''
+    SELECT
+        isq.candidate_name,
+        isq.session_id,
+        COUNT(ia.id) as answer_count,
+        AVG(ia.score) as avg_score,
+        MAX(ia.created_at) as last_answer_time
+    FROM interview_session_questions isq
+    JOIN interview_answers ia ON isq.session_id = ia.session_id
+    WHERE isq.candidate_name IN (SELECT value FROM json_each(?))
+    GROUP BY isq.candidate_name, isq.session_id
+'''
+
+# 普通会话（interview_sessions）中有回答的会话统计
+SESSION_STATS_SQL = '''
+    SELECT
+        c.name,
+        isess.session_id,
+        COUNT(ia.id) as answer_count,
+        AVG(ia.score) as avg_score,
+        MAX(ia.created_at) as last_answer_time
+    FROM interview_sessions isess
+    JOIN candidates c ON isess.candidate_id = c.id
+    JOIN interview_answers ia ON isess.session_id = ia.session_id
+    WHERE c.name IN (SELECT value FROM json_each(?))
+    GROUP BY c.name, isess.session_id
+'''
+
+# 候选人所有会话的各维度平均分
+DIMENSION_AVERAGES_SQL = '''
+    SELECT s.candidate_name, ia.dimension, AVG(ia.score) as avg_score
+    FROM (
+        SELECT candidate_name, session_id FROM interview_session_questions
+        WHERE candidate_name IN (SELECT value FROM json_each(?))
+        UNION
+        SELECT c.name, isess.session_id FROM interview_sessions isess
+        JOIN candidates c ON isess.candidate_id = c.id
+        WHERE c.name IN (SELECT value FROM json_each(?))
+    ) s
+    JOIN interview_answers ia ON ia.session_id = s.session_id
+    WHERE ia.score IS NOT NULL
+    GROUP BY s.candidate_name, ia.dimension
+'''
+
+# 按姓名或邮箱匹配的面试问题，最新的排在前面
+# 姓名/邮箱条件拆成 UNION 子查询，两边都能走索引，避免 OR 导致全表扫描
+INTERVIEW_QUESTIONS_SQL = '''
+    SELECT candidate_name, candidate_email, questions_json, strategy, created_at, updated_at
+    FROM interview_questions
+    WHERE id IN (
+        SELECT id FROM interview_questions
+        WHERE candidate_name IN (SELECT value FROM json_each(?))
+        UNION
+        SELECT id FROM interview_questions
+        WHERE candidate_email IN (SELECT value FROM json_each(?))
+    )
+    ORDER BY updated_at DESC
+'''
+
+# 单个候选人按姓名或邮箱匹配的面试问题id
+INTERVIEW_QUESTION_IDS_SQL = '''
+    SELECT id FROM interview_questions WHERE candidate_name = ?
+    UNION
+    SELECT id FROM interview_questions WHERE candidate_email = ?
+'''
+
+# 单个候选人最新的预生成面试问题
+LATEST_INTERVIEW_QUESTIONS_SQL = f'''
+    SELECT questions_json, strategy, created_at, updated_at, position_code
+    FROM interview_questions
+    WHERE id IN ({INTERVIEW_QUESTION_IDS_SQL})
+    ORDER BY updated_at DESC
+    LIMIT 1
+'''
+
+# 单个候选人最新的面试会话问题
+LATEST_SESSION_QUESTIONS_SQL = '''
+    SELECT session_id, questions_json, strategy, created_at
+    FROM interview_session_questions
+    WHERE id IN (
+        SELECT id FROM interview_session_questions WHERE candidate_name = ?
+        UNION
+        SELECT id FROM interview_session_questions WHERE candidate_email = ?
+    )
+    ORDER BY created_at DESC
+    LIMIT 1
+'''
+
+
+# 候选人的面试会话（含预生成问题的会话和仅有会话记录的会话，按会话ID去重），按时间倒序分页，附带会话总数
+CANDIDATE_SESSIONS_PAGE_SQL = '''
+    SELECT session_id, questions_json, strategy, created_at, COUNT(*) OVER () AS total
+    FROM (
+        SELECT session_id, questions_json, strategy, created_at
+        FROM interview_session_questions
+        WHERE candidate_name = ?
+        UNION ALL
+        SELECT isess.session_id, NULL, NULL, isess.created_at
+        FROM interview_sessions isess
+        JOIN candidates c ON isess.candidate_id = c.id
+        WHERE c.name = ?
+          AND isess.session_id NOT IN (
+              SELECT session_id FROM interview_session_questions WHERE candidate_name = ?
+          )
+    )
+    ORDER BY created_at DESC, session_id
+    LIMIT ? OFFSET ?
+'''
+
+# 一组会话的全部回答
+SESSION_ANSWERS_SQL = '''
+    SELECT session_id, question_id, question_text, answer_text, dimension, score, feedback, created_at
+    FROM interview_answers
+    WHERE session_id IN (SELECT value FROM json_each(?))
+    ORDER BY session_id, question_id
+'''
+
+
+def _json_list(values):
+    """把一组值编码为 json_each 可展开的参数"""
+    return json.dumps(sorted({v for v in values if v is not None}), ensure_ascii=False)
+
+
+def is_newer_session(session, current):
+    """
+    session 是否比 current 更新：最后回答时间晚的优先，时间相同时取 session_id 较小的
+    与 ORDER BY last_answer_time DESC, session_id 的第一行一致，结果不依赖查询计划返回的行顺序
+    """
+    time1, time2 = session[3] or '', current[3] or ''
+    if time1 != time2:
+        return time1 > time2
+    return (session[0] or '') < (current[0] or '')
+
+
+def _latest_answered_sessions(cursor, sql, names_param):
+    """每个候选人取最后回答时间最新的会话"""
+    latest = {}
+    cursor.execute(sql, (names_param,))
+    for name, session_id, answer_count, avg_score, last_answer_time in cursor.fetchall():
+        session = (session_id, answer_count, avg_score, last_answer_time)
+        current = latest.get(name)
+        if current is None or is_newer_session(session, current):
+            latest[name] = session
+    return latest
+
+
+def load_interview_summaries(cursor, candidates):
+    """
+    批量查询候选人的最新面试会话和各维度平均分
+    返回 {姓名: (会话统计, {维度: 平均分})}，只包含有回答记录的候选人
+    """
+    names_param = _json_list(c.get('name') for c in candidates)
+
+    latest_1 = _latest_answered_sessions(cursor, SESSION_QUESTION_STATS_SQL, names_param)
+    latest_2 = _latest_answered_sessions(cursor, SESSION_STATS_SQL, names_param)
+
+    cursor.execute(DIMENSION_AVERAGES_SQL, (names_param, names_param))
+    dimension_scores = {}
+    for name, dimension, avg_score in cursor.fetchall():
+        dimension_scores.setdefault(name, []).append((dimension, avg_score))
+
+    summaries = {}
+    for name in set(latest_1) | set(latest_2):
+        db_interview_1 = latest_1.get(name)
+        db_interview_2 = latest_2.get(name)
+
+        # 选择最新的面试记录（两个表都有回答时按最后回答时间比较，时间相同时取 session_id 较小的）
+        if db_interview_1 and db_interview_2:
+            db_interview = db_interview_1 if is_newer_session(db_interview_1, db_interview_2) else db_interview_2
+        else:
+            db_interview = db_interview_1 or db_interview_2
+
+        summaries[name] = (db_interview, dimension_scores.get(name, []))
+
+    return summaries
+
+
+def load_latest_questions(cursor, candidates):
+    """
+    批量查询候选人最新的面试问题
+    返回 {(姓名, 邮箱): (questions_json, strategy, created_at, updated_at)}
+    """
+    names = [c.get('name') for c in candidates]
+    emails = [c.get('email') for c in candidates]
+
+    cursor.execute(INTERVIEW_QUESTIONS_SQL, (_json_list(names), _json_list(emails)))
+
+    # 结果已按 updated_at 降序排列，记录每个姓名/邮箱第一次出现的位置
+    by_name = {}
+    by_email = {}
+    rows = cursor.fetchall()
+    for rank, (name, email, questions_json, strategy, created_at, updated_at) in enumerate(rows):
+        if name is not None and name not in by_name:
+            by_name[name] = rank
+        if email is not None and email not in by_email:
+            by_email[email] = rank
+
+    latest = {}
+    for name, email in zip(names, emails):
+        ranks = [r for r in (by_name.get(name) if name is not None else None,
+                             by_email.get(email) if email is not None else None)
+                 if r is not None]
+        if ranks:
+            latest[(name, email)] = rows[min(ranks)][2:]
+    return latest
+
+
+def apply_interview_summaries(cursor, candidates):
+    """
+    用数据库中的面试会话更新候选人的状态、总分、面试日期和各维度分数（原地修改）
+    查询次数与候选人数量无关：会话统计2次、维度均分1次
+    """
+    summaries = load_interview_summaries(cursor, candidates)
+
+    for candidate in candidates:
+        db_interview, dimension_scores = summaries.get(candidate.get('name'), (None, []))
+
+        # 如果数据库中有面试会话记录，说明候选人已经面试
+        if db_interview and db_interview[0]:
+            session_id, answer_count, avg_score, last_answer_time = db_interview
+
+            candidate['status'] = '已完成'
+            candidate['score'] = int(avg_score) if avg_score else None
+            candidate['interview_date'] = last_answer_time.split()[0] if last_answer_time else candidate.get('interview_date')
+            candidate['db_interview'] = True
+            candidate['answer_count'] = answer_count
+
+            # 更新各维度分数
+            for dimension, dimension_avg in dimension_scores:
+                score_key = DIMENSION_SCORE_KEYS.get(dimension)
+                if score_key:
+                    candidate[score_key] = round(dimension_avg, 1) if dimension_avg else None
+        else:
+            candidate['db_interview'] = False
+            candidate['answer_count'] = 0
+
+    return candidates
+
+
+def attach_latest_questions(cursor, candidates):
+    """为候选人附加最新的面试问题（原地修改），查询1次"""
+    latest_questions = load_latest_questions(cursor, candidates)
+
+    for candidate in candidates:
+        result = latest_questions.get((candidate.get('name'), candidate.get('email')))
+
+        if result:
+            questions_json, strategy, created_at, updated_at = result
+            # 每个候选人单独解析，同名同邮箱的候选人不共享同一个列表
+            candidate['interview_questions'] = json.loads(questions_json) if questions_json else []
+            candidate['interview_strategy'] = strategy
+            candidate['questions_generated_at'] = updated_at or created_at
+            candidate['has_questions'] = True
+        else:
+            candidate['interview_questions'] = []
+            candidate['interview_strategy'] = ''
+            candidate['questions_generated_at'] = None
+            candidate['has_questions'] = False
+
+    return candidates
+
+
+def enrich_candidates_with_interviews(cursor, candidates):
+    """
+    用数据库中的面试数据补充候选人信息（原地修改）
+    查询次数与候选人数量无关：会话统计2次、维度均分1次、面试问题1次
+    """
+    apply_interview_summaries(cursor, candidates)
+    attach_latest_questions(cursor, candidates)
+    return candidates
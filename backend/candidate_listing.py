@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+候选人列表查询 - GET /api/candidates 的筛选、排序、分页和字段投影
+先按职位筛选，再补充面试数据，最后分页：只有筛选或排序用到状态、分数、面试日期时才为全部候选人
+计算面试统计（固定次数的聚合查询），面试问题只为当前页且请求了相关字段时查询
+"""
+
+from candidate_aggregates import apply_interview_summaries, attach_latest_questions
+
+# 可排序的字段，排序参数前加 - 表示降序
+SORT_KEYS = {"id", "name", "position", "score", "status", "interview_date"}
+# 依赖数据库面试统计的字段
+SUMMARY_KEYS = {"score", "status", "interview_date"}
+# 来自面试问题查询的字段
+QUESTION_FIELDS = {"interview_questions", "interview_strategy", "questions_generated_at", "has_questions"}
+
+
+def parse_sort(sort):
+    """'-score' → ('score', True)；不支持的字段抛出 ValueError"""
+    if not sort:
+        return None, False
+    descending = sort.startswith("-")
+    key = sort.lstrip("-+")
+    if key not in SORT_KEYS:
+        raise ValueError(f"不支持的排序字段: {key}，可选: {', '.join(sorted(SORT_KEYS))}")
+    return key, descending
+
+
+def parse_fields(fields):
+    """'id,name,score' → {'id', 'name', 'score'}；未指定时返回 None 表示全部字段"""
+    if not fields:
+        return None
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    return selected | {"id"} if selected else None
+
+
+def _sort_candidates(candidates, key, descending):
+    """按字段排序，空值始终排在最后"""
+    present = [c for c in candidates if c.get(key) is not None]
+    missing = [c for c in candidates if c.get(key) is None]
+    present.sort(key=lambda c: (c[key], c.get("id") or 0), reverse=descending)
+    return present + missing
+
+
+def list_candidates(cursor, candidates, position=None, status=None, min_score=None, max_score=None,
+                    sort=None, limit=None, offset=0, fields=None):
+    """
+    返回 (当前页候选人, 筛选后的总数)
+    candidates 为 Excel 中的候选人（会被原地修改）；limit 为 None 时返回全部
+    """
+    sort_key, descending = parse_sort(sort)
+    selected_fields = parse_fields(fields)
+
+    if position:
+        candidates = [c for c in candidates if position in (c.get("position") or "")]
+
+    # 状态和分数以数据库面试记录为准，需要先计算面试统计才能筛选和排序
+    needs_summaries = status is not None or min_score is not None or max_score is not None or sort_key in SUMMARY_KEYS
+    if needs_summaries:
+        apply_interview_summaries(cursor, candidates)
+
+    if status is not None:
+        candidates = [c for c in candidates if c.get("status") == status]
+    if min_score is not None:
+        candidates = [c for c in candidates if c.get("score") is not None and c["score"] >= min_score]
+    if max_score is not None:
+        candidates = [c for c in candidates if c.get("score") is not None and c["score"] <= max_score]
+    if sort_key:
+        candidates = _sort_candidates(candidates, sort_key, descending)
+
+    total = len(candidates)
+    offset = max(0, offset)
+    page = candidates[offset:offset + limit] if limit is not None else candidates[offset:]
+
+    if page and not needs_summaries:
+        apply_interview_summaries(cursor, page)
+    if page and (selected_fields is None or selected_fields & QUESTION_FIELDS):
+        attach_latest_questions(cursor, page)
+
+    if selected_fields is not None:
+        page = [{k: v for k, v in c.items() if k in selected_fields} for c in page]
+    return page, total
@@ -42,6 +42,7 @@ def main():
         ("pdfplumber", "pdfplumber"),
         ("python-docx", "docx"),
         ("numpy", "numpy"),
+        ("orjson", "orjson"),
     ]
     
     # 检查标准库
@@ -22,10 +22,67 @@ class Config:
                 "base_url": "https://qianfan.baidubce.com/v2",
                 "model": "ernie-4.5-turbo-32k",
                 "temperature": 0.7,
-                "max_tokens": 2000
+                "max_tokens": 2000,
+                "max_concurrency": 8,
+                "timeout_seconds": 60,
+                "max_connections": 20
             },
             "database": {
-                "path": "recruitment.db"
+                "path": "recruitment.db",
+                "pool_size": 8,
+                "busy_timeout_ms": 5000,
+                "cached_statements": 256
+            },
+            "llm_resilience": {
+                "max_attempts": 3,
+                "retry_base_delay": 0.5,
+                "retry_max_delay": 8.0,
+                "breaker_failure_threshold": 5,
+                "breaker_reset_seconds": 30,
+                "hedge_after_seconds": 0,
+                "deadlines": {
+                    "default": 90,
+                    "evaluate_answer": 30,
+                    "evaluate_answers_batch": 60,
+                    "ai_chat": 45,
+                    "ai_feedback": 45
+                }
+            },
+            "llm_cache": {
+                "enabled": True,
+                "ttl_seconds": 604800,
+                "max_entries": 5000,
+                "max_bytes": 52428800
+            },
+            "text_cache": {
+                "backend": "sqlite",
+                "directory": "cache/resume_text"
+            },
+            "score_buffer": {
+                "flush_interval_seconds": 10
+            },
+            "job_queue": {
+                "workers": 2,
+                "poll_interval_seconds": 1.0,
+                "stale_after_seconds": 900
+            },
+            "pre_generate": {
+                "workers": 4,
+                "rate_limit_per_minute": 60,
+                "pdf_processes": 2
+            },
+            "ai_chat": {
+                "context_token_budget": 6000
+            },
+            "resume_catalog": {
+                "poll_interval_seconds": 5
+            },
+            "batch_evaluation": {
+                "token_budget": 3000,
+                "max_questions": 10
+            },
+            "dashboard_stats": {
+                "reconcile_interval_seconds": 300
             },
             "email": {
                 "smtp_server": "smtp.example.com",
@@ -33,9 +90,14 @@ class Config:
                 "sender_email": "",
                 "sender_password": ""
             },
+            "password": {
+                "pbkdf2_iterations": 100000,
+                "hash_workers": 0
+            },
             "jwt": {
                 "secret_key": "your-secret-key-here",
-                "expire_days": 7
+                "expire_days": 7,
+                "verify_cache_size": 1024
             }
         }
         
@@ -1,17 +1,18 @@
 #!/usr/bin/env python3
 """
 CSV文件处理模块
-用于读取和更新候选人评分数据
+用于读取和更新候选人评分数据；评分更新先进入写缓冲，由 score_buffer 批量写回工作簿
 """
 
 import pandas as pd
-import os
 from pathlib import Path
+from score_buffer import score_buffer
 
 class CandidateCSVHandler:
     def __init__(self):
         # CSV文件路径
-        self.csv_path = Path("../resouse/candidate.xlsx")
+        self.csv_path = Path(__file__).parent.parent / "resouse" / "candidate.xlsx"
+        self.buffer = score_buffer
         
     def load_candidates(self):
         """加载候选人数据"""
@@ -27,24 +28,10 @@ class CandidateCSVHandler:
             return None
     
     def update_candidate_score(self, candidate_name, dimension, score):
-        """更新候选人某个维度的评分"""
+        """更新候选人某个维度的评分（写入缓冲，稍后批量写回工作簿）"""
         try:
-            df = self.load_candidates()
-            if df is None:
-                return False
-            
-            # 查找候选人
-            candidate_row = df[df['姓名'] == candidate_name]
-            if candidate_row.empty:
-                print(f"未找到候选人: {candidate_name}")
-                return False
-            
-            # 更新评分
-            df.loc[df['姓名'] == candidate_name, dimension] = score
-            
-            # 保存文件
-            df.to_excel(self.csv_path, index=False)
-            print(f"成功更新候选人 {candidate_name} 的 {dimension} 评分: {score}")
+            self.buffer.record(candidate_name, dimension, score)
+            print(f"已记录候选人 {candidate_name} 的 {dimension} 评分: {score}")
             return True
             
         except Exception as e:
@@ -70,6 +57,12 @@ class CandidateCSVHandler:
                 if col in df.columns:
                     scores[col] = candidate_row[col].iloc[0]
             
+            # 尚未写回工作簿的评分优先
+            pending = self.buffer.pending_scores(candidate_name).get(candidate_name, {})
+            for col, score in pending.items():
+                if col in score_columns:
+                    scores[col] = score
+            
             return scores
             
         except Exception as e:
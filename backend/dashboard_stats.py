@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+仪表板统计 - /api/dashboard/stats 读取数据库中维护好的计数，不再每次请求遍历全部候选人
+每个候选人在 dashboard_candidates 中有一行（Excel中的候选人数据，以及按面试记录、评分和状态变更得出的状态和分数），
+行的增删改由触发器同步到单行计数表和职位表；状态变更、提交回答和保存评分时，在接口自己的事务中只刷新相关候选人。
+后台线程定期按 Excel 和数据库重新计算全部候选人，修正计数漂移；候选人工作簿变化时读取先返回上次的统计并唤醒后台线程重建
+"""
+
+import json
+import threading
+import time
+
+from candidate_aggregates import _json_list, apply_interview_summaries
+from config import config
+from db_pool import db_pool
+from excel_data_loader import excel_loader
+from migrations import run_migrations
+
+# 每个候选人最后一次人工评分
+EVALUATION_SCORES_SQL = '''
+    SELECT candidate_id, total_score
+    FROM candidate_evaluations
+    WHERE candidate_id IN (SELECT value FROM json_each(?)) AND total_score IS NOT NULL
+    ORDER BY id
+'''
+
+# 每个候选人最后一次状态变更
+LATEST_STATUS_SQL = '''
+    SELECT candidate_id, new_status
+    FROM candidate_status_log
+    WHERE id IN (
+        SELECT MAX(id) FROM candidate_status_log
+        WHERE candidate_id IN (SELECT value FROM json_each(?))
+        GROUP BY candidate_id
+    )
+'''
+
+# 职位内评分最高的候选人（相同评分取工作簿中靠前的）
+BEST_SCORED_SQL = '''
+    SELECT data_json, status, score FROM dashboard_candidates
+    WHERE position = ? AND score IS NOT NULL
+    ORDER BY score DESC, row_order
+    LIMIT 1
+'''
+
+# 职位内没有评分时取最新申请的候选人
+LATEST_APPLIED_SQL = '''
+    SELECT data_json, status, score FROM dashboard_candidates
+    WHERE position = ?
+    ORDER BY created_at DESC, row_order
+    LIMIT 1
+'''
+
+# 职位内期望薪资最低的候选人
+LOWEST_SALARY_SQL = '''
+    SELECT data_json, status, score, salary FROM dashboard_candidates
+    WHERE position = ? AND salary IS NOT NULL
+    ORDER BY salary, row_order
+    LIMIT 1
+'''
+
+# 仪表板读取：单行计数和各职位的最佳、最低薪资候选人，一条语句
+SNAPSHOT_SQL = '''
+    SELECT total_candidates, completed_interviews, in_progress_interviews, score_sum, score_count,
+           active_positions, source_key,
+           (SELECT json_group_array(json_array(json(best_json), json(lowest_salary_json)))
+            FROM (SELECT best_json, lowest_salary_json FROM dashboard_positions ORDER BY first_row, position))
+    FROM dashboard_counters
+    WHERE id = 1
+'''
+
+ROW_COLUMNS = ("name", "position", "status", "score", "salary", "created_at", "row_order", "data_json")
+
+UPSERT_ROW_SQL = f'''
+    INSERT INTO dashboard_candidates (candidate_id, {", ".join(ROW_COLUMNS)})
+    VALUES (?, {", ".join("?" for _ in ROW_COLUMNS)})
+    ON CONFLICT (candidate_id) DO UPDATE SET
+        {", ".join(f"{column} = excluded.{column}" for column in ROW_COLUMNS)}
+'''
+
+
+def derive_states(cursor, candidates):
+    """
+    计算候选人在仪表板中的状态和分数（原地修改）
+    面试记录覆盖 Excel 中的状态和分数（与候选人列表一致），人工评分覆盖面试均分，最后一次状态变更覆盖状态
+    """
+    apply_interview_summaries(cursor, candidates)
+
+    ids_param = _json_list(c.get('id') for c in candidates)
+    cursor.execute(EVALUATION_SCORES_SQL, (ids_param,))
+    evaluation_scores = dict(cursor.fetchall())
+    cursor.execute(LATEST_STATUS_SQL, (ids_param,))
+    latest_status = dict(cursor.fetchall())
+
+    for candidate in candidates:
+        candidate_id = candidate.get('id')
+        if candidate_id in evaluation_scores:
+            candidate['score'] = evaluation_scores[candidate_id]
+            candidate['status'] = '已完成'
+        if candidate_id in latest_status:
+            candidate['status'] = latest_status[candidate_id]
+    return candidates
+
+
+class DashboardStats:
+    """增量维护的仪表板统计"""
+
+    def __init__(self, pool=None, loader=None, reconcile_interval=None):
+        self.pool = pool or db_pool
+        self.loader = loader or excel_loader
+        self.reconcile_interval = reconcile_interval or config.get('dashboard_stats.reconcile_interval_seconds', 300)
+
+        self._reconcile_lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread = None
+        self._schema_ready = False
+
+        self._reads = 0
+        self._stale_reads = 0
+        self._refreshes = 0
+        self._reconciles = 0
+        self._rows_inserted = 0
+        self._rows_corrected = 0
+        self._rows_deleted = 0
+        self._counters_corrected = 0
+        self._last_reconcile_ms = None
+        self._last_reconcile_at = None
+        self._last_error = None
+
+    def _ensure_schema(self):
+        if not self._schema_ready:
+            with self.pool.connection() as conn:
+                run_migrations(conn)
+            self._schema_ready = True
+
+    def _row(self, base, derived, row_order):
+        """候选人在 dashboard_candidates 中的列值（不含 candidate_id）；data_json 保存 Excel 中的原始数据"""
+        return (
+            base.get('name'),
+            base.get('position') or '',
+            derived.get('status'),
+            derived.get('score'),
+            self.loader.parse_salary(base.get('expected_salary')),
+            base.get('created_at'),
+            row_order,
+            json.dumps(base, ensure_ascii=False, default=str),
+        )
+
+    # 增量更新
+
+    def refresh(self, cursor, candidate_id=None, candidate_name=None):
+        """
+        重新计算指定候选人（按ID或姓名）的状态和分数，计数由触发器同步更新
+        使用调用方的游标，在调用方的事务中执行，由调用方提交；统计尚未建立时不做任何事
+        """
+        if candidate_id is not None:
+            cursor.execute(
+                "SELECT candidate_id, data_json FROM dashboard_candidates WHERE candidate_id = ?", (candidate_id,)
+            )
+        else:
+            cursor.execute(
+                "SELECT candidate_id, data_json FROM dashboard_candidates WHERE name = ?", (candidate_name,)
+            )
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+
+        candidates = derive_states(cursor, [json.loads(data_json) for _, data_json in rows])
+        positions = set()
+        for (row_id, _), candidate in zip(rows, candidates):
+            cursor.execute('''
+                UPDATE dashboard_candidates SET status = ?, score = ?
+                WHERE candidate_id = ? AND (status IS NOT ? OR score IS NOT ?)
+            ''', (candidate.get('status'), candidate.get('score'), row_id,
+                  candidate.get('status'), candidate.get('score')))
+            if cursor.rowcount:
+                positions.add(candidate.get('position') or '')
+        self._refresh_positions(cursor, positions)
+        self._refreshes += 1
+        return len(positions)
+
+    @staticmethod
+    def _candidate(row):
+        data_json, status, score = row[:3]
+        candidate = json.loads(data_json)
+        candidate['status'] = status
+        candidate['score'] = score
+        return candidate
+
+    def _refresh_positions(self, cursor, positions):
+        """重新选出职位的最佳候选人和期望薪资最低的候选人，每个职位3次索引查询"""
+        for position in positions:
+            best = cursor.execute(BEST_SCORED_SQL, (position,)).fetchone()
+            reason = "最高评分"
+            if best is None:
+                best = cursor.execute(LATEST_APPLIED_SQL, (position,)).fetchone()
+                reason = "最新申请"
+            if best is None:
+                continue
+            best_json = json.dumps(
+                {"position": position, "candidate": self._candidate(best), "reason": reason}, ensure_ascii=False
+            )
+
+            lowest = cursor.execute(LOWEST_SALARY_SQL, (position,)).fetchone()
+            lowest_json = json.dumps({
+                "position": position,
+                "candidate": self._candidate(lowest),
+                "salary_num": lowest[3],
+                "reason": "薪资要求最低"
+            }, ensure_ascii=False) if lowest else None
+
+            cursor.execute(
+                "UPDATE dashboard_positions SET best_json = ?, lowest_salary_json = ? WHERE position = ?",
+                (best_json, lowest_json, position)
+            )
+
+    # 读取
+
+    def read(self):
+        """
+        仪表板统计（同步查询数据库，接口中应放到线程池执行）
+        候选人工作簿与上次重建时不同：后台线程运行时返回上次的统计并唤醒线程重建；
+        统计尚未建立或没有后台线程时在当前线程重建
+        """
+        self._ensure_schema()
+        source_key = self.loader.candidate_source_key()
+        snapshot = self._read_snapshot()
+        if snapshot[6] != source_key:
+            if snapshot[6] is not None and self._thread and self._thread.is_alive():
+                self._wake_event.set()
+                self._stale_reads += 1
+            else:
+                with self._reconcile_lock:
+                    # 等锁期间其他线程可能已经重建
+                    snapshot = self._read_snapshot()
+                    if snapshot[6] != source_key:
+                        self.reconcile()
+                        snapshot = self._read_snapshot()
+
+        total, completed, in_progress, score_sum, score_count, active_positions, _, positions_json = snapshot
+        positions = json.loads(positions_json) if positions_json else []
+        self._reads += 1
+        return {
+            "active_positions": active_positions,
+            "total_candidates": total,
+            "completed_interviews": completed,
+            "in_progress_interviews": in_progress,
+            "average_score": round(score_sum / score_count, 1) if score_count else 0.0,
+            "best_candidates": [best for best, _ in positions if best],
+            "lowest_salary_candidates": [lowest for _, lowest in positions if lowest]
+        }
+
+    def _read_snapshot(self):
+        with self.pool.connection() as conn:
+            return conn.execute(SNAPSHOT_SQL).fetchone()
+
+    # 全量校正
+
+    def reconcile(self):
+        """
+        按 Excel 和数据库重新计算全部候选人，只改写有差异的行，再核对计数表和职位表
+        返回本次修正的数量 {inserted, corrected, deleted, counters}
+        """
+        self._ensure_schema()
+        with self._reconcile_lock:
+            start = time.perf_counter()
+            try:
+                source_key = self.loader.candidate_source_key()
+                candidates = self.loader.load_candidates()
+                with self.pool.connection() as conn:
+                    conn.execute('BEGIN IMMEDIATE')
+                    result = self._reconcile(conn, candidates)
+                    conn.execute(
+                        "UPDATE dashboard_counters SET source_key = ?, reconciled_at = ? WHERE id = 1",
+                        (source_key, time.time())
+                    )
+                    conn.commit()
+            except Exception as e:
+                self._last_error = str(e)
+                raise
+
+            self._reconciles += 1
+            self._rows_inserted += result["inserted"]
+            self._rows_corrected += result["corrected"]
+            self._rows_deleted += result["deleted"]
+            self._counters_corrected += result["counters"]
+            self._last_reconcile_ms = round((time.perf_counter() - start) * 1000, 1)
+            self._last_reconcile_at = time.time()
+            self._last_error = None
+            return result
+
+    def _reconcile(self, conn, candidates):
+        cursor = conn.cursor()
+        derived = derive_states(cursor, [dict(candidate) for candidate in candidates])
+
+        desired = {}
+        for row_order, (base, candidate) in enumerate(zip(candidates, derived)):
+            desired[base.get('id')] = self._row(base, candidate, row_order)
+
+        cursor.execute(f"SELECT candidate_id, {', '.join(ROW_COLUMNS)} FROM dashboard_candidates")
+        existing = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+
+        result = {"inserted": 0, "corrected": 0, "deleted": 0, "counters": 0}
+        changed = [(candidate_id, *row) for candidate_id, row in desired.items() if existing.get(candidate_id) != row]
+        for candidate_id, *_ in changed:
+            result["corrected" if candidate_id in existing else "inserted"] += 1
+        cursor.executemany(UPSERT_ROW_SQL, changed)
+
+        removed = [(candidate_id,) for candidate_id in existing if candidate_id not in desired]
+        cursor.executemany("DELETE FROM dashboard_candidates WHERE candidate_id = ?", removed)
+        result["deleted"] = len(removed)
+
+        result["counters"] = self._reconcile_counters(cursor)
+        # 全部职位重新选出最佳和最低薪资候选人（工作簿变化可能改变任意候选人的数据）
+        cursor.execute("SELECT position FROM dashboard_positions")
+        self._refresh_positions(cursor, [row[0] for row in cursor.fetchall()])
+        return result
+
+    @staticmethod
+    def _reconcile_counters(cursor):
+        """按 dashboard_candidates 重新汇总，与计数表、职位表不一致时改写，返回修正的表数"""
+        corrected = 0
+
+        cursor.execute('''
+            SELECT position, COUNT(*), MIN(row_order) FROM dashboard_candidates GROUP BY position
+        ''')
+        actual_positions = {position: (count, first_row) for position, count, first_row in cursor.fetchall()}
+        cursor.execute("SELECT position, candidates, first_row FROM dashboard_positions")
+        stored_positions = {position: (count, first_row) for position, count, first_row in cursor.fetchall()}
+        if actual_positions != stored_positions:
+            corrected += 1
+            cursor.executemany(
+                "DELETE FROM dashboard_positions WHERE position = ?",
+                [(position,) for position in stored_positions if position not in actual_positions]
+            )
+            cursor.executemany('''
+                INSERT INTO dashboard_positions (position, candidates, first_row) VALUES (?, ?, ?)
+                ON CONFLICT (position) DO UPDATE SET candidates = excluded.candidates, first_row = excluded.first_row
+            ''', [(position, count, first_row) for position, (count, first_row) in actual_positions.items()])
+
+        actual = cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(status = '已完成'), 0), COALESCE(SUM(status = '面试中'), 0),
+                   TOTAL(score), COUNT(score)
+            FROM dashboard_candidates
+        ''').fetchone() + (len(actual_positions),)
+        stored = cursor.execute('''
+            SELECT total_candidates, completed_interviews, in_progress_interviews, score_sum, score_count,
+                   active_positions
+            FROM dashboard_counters WHERE id = 1
+        ''').fetchone()
+        # 分数合计按增量累加，允许浮点误差
+        if (actual[:3] + actual[4:]) != (stored[:3] + stored[4:]) or abs(actual[3] - stored[3]) > 1e-6:
+            corrected += 1
+            cursor.execute('''
+                UPDATE dashboard_counters SET
+                    total_candidates = ?, completed_interviews = ?, in_progress_interviews = ?,
+                    score_sum = ?, score_count = ?, active_positions = ?
+                WHERE id = 1
+            ''', actual)
+        return corrected
+
+    # 后台校正线程
+
+    def start(self):
+        """启动后台校正线程：启动时先重建一次，之后按间隔（或工作簿变化后被读取唤醒时）校正"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self._thread = threading.Thread(target=self._run, name="dashboard-stats-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台校正线程"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake_event.clear()
+            try:
+                result = self.reconcile()
+                if result["corrected"] or result["deleted"] or result["counters"]:
+                    print(f"仪表板统计已校正: {result}")
+            except Exception as e:
+                print(f"仪表板统计校正失败: {e}")
+            self._wake_event.wait(self.reconcile_interval)
+
+    def stats(self):
+        """读取、增量刷新和校正情况"""
+        return {
+            "reads": self._reads,
+            "stale_reads": self._stale_reads,
+            "refreshes": self._refreshes,
+            "reconciles": self._reconciles,
+            "rows_inserted": self._rows_inserted,
+            "rows_corrected": self._rows_corrected,
+            "rows_deleted": self._rows_deleted,
+            "counters_corrected": self._counters_corrected,
+            "last_reconcile_ms": self._last_reconcile_ms,
+            "last_reconcile_at": self._last_reconcile_at,
+            "reconcile_interval_seconds": self.reconcile_interval,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "last_error": self._last_error
+        }
+
+
+# 全局实例
+dashboard_stats = DashboardStats()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+数据库连接池 - 所有接口和批处理脚本共享的SQLite数据访问层
+连接开启WAL日志、busy_timeout和synchronous=NORMAL，并在复用期间保留预编译语句缓存；
+每条语句的执行耗时按取连接的调用位置（模块.函数）记入 metrics
+"""
+
+import contextlib
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from config import config
+from metrics import db_query_seconds
+
+# 确定调用位置时跳过的文件
+_INTERNAL_FILES = {__file__, contextlib.__file__}
+
+
+def _call_site():
+    """取连接的调用位置，如 main.get_candidates"""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename in _INTERNAL_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return f"{module}.{frame.f_code.co_name}"
+
+
+class TimedCursor(sqlite3.Cursor):
+    """记录语句执行耗时的游标"""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            db_query_seconds.observe(time.perf_counter() - start, self.connection._site)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            db_query_seconds.observe(time.perf_counter() - start, self.connection._site)
+
+
+class PooledConnection(sqlite3.Connection):
+    """连接池中的连接：close() 时归还连接池而不是真正关闭"""
+
+    _pool = None
+    _released = False
+    _site = "unknown"
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        if self._pool is None:
+            super().close()
+        elif not self._released:
+            self._pool.release(self)
+
+    def close_physical(self):
+        """真正关闭底层连接"""
+        super().close()
+
+
+class SQLitePool:
+    """
+    SQLite连接池
+    空闲连接最多保留 pool_size 个；池空时直接新建连接而不是阻塞等待，
+    因为异步接口在事件循环线程里取连接，阻塞会导致归还连接的请求也无法执行
+    """
+
+    def __init__(self, db_path=None, pool_size=None, busy_timeout_ms=None, cached_statements=None):
+        self.db_path = db_path or config.get('database.path', 'recruitment.db')
+        self.pool_size = pool_size or config.get('database.pool_size', 8)
+        self.busy_timeout_ms = busy_timeout_ms or config.get('database.busy_timeout_ms', 5000)
+        self.cached_statements = cached_statements or config.get('database.cached_statements', 256)
+
+        self._idle = queue.LifoQueue(maxsize=self.pool_size)
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def _connect(self):
+        """创建新连接并设置PRAGMA"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=PooledConnection
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn._pool = self
+
+        with self._lock:
+            self._created += 1
+        return conn
+
+    def get_connection(self):
+        """从连接池获取连接，用完后调用 conn.close() 归还"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        conn._released = False
+        conn._site = _call_site()
+        return conn
+
+    def release(self, conn):
+        """归还连接：回滚未提交的事务后放回空闲队列，队列已满则关闭"""
+        conn._released = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close_physical()
+
+    @contextmanager
+    def connection(self):
+        """以上下文管理器方式使用连接"""
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """关闭所有空闲连接（应用关闭时调用）"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close_physical()
+
+    def stats(self):
+        """连接池状态"""
+        return {
+            "db_path": self.db_path,
+            "pool_size": self.pool_size,
+            "idle_connections": self._idle.qsize(),
+            "created_connections": self._created
+        }
+
+
+# 创建全局连接池实例
+db_pool = SQLitePool()
@@ -1,226 +1,226 @@
 import pandas as pd
 import json
+import math
 import numpy as np
 import hashlib
+import os
+import re
 from pathlib import Path
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
+import threading
+
+from metrics import excel_load_seconds
+from resume_catalog import resume_catalog
 
 class ExcelDataLoader:
+    # Excel维度列到候选人字段的映射
+    DIMENSION_COLUMNS = [
+        ("Knowledge", "knowledge_score"),
+        ("Skill", "skill_score"),
+        ("Ability", "ability_score"),
+        ("Personality", "personality_score"),
+        ("Motivation", "motivation_score"),
+        ("Value", "value_score")
+    ]
+    
+    # 职位Excel中各字段可能使用的列名，按优先级排列
+    JOB_COLUMN_ALIASES = {
+        "title": ["职位全称", "职位名称", "岗位名称", "职位", "岗位", "title", "job_title"],
+        "department": ["部门", "department", "dept"],
+        "salary": ["薪资", "薪资范围", "工资", "salary", "salary_range"],
+        "requirements": ["职位要求", "岗位要求", "个人能力要求", "要求", "requirements", "job_requirements"],
+        "description": ["职位描述", "岗位描述", "其它补充说明", "描述", "description", "job_description"],
+        "recruit_count": ["招聘数量", "招聘人数", "人数", "count"],
+        "publish_date": ["职位发布时间", "发布时间", "创建时间", "publish_date"],
+        "status": ["该招聘状态-开启/关闭", "招聘状态", "状态", "status"]
+    }
+    
+    # 根据职位ID设置基础薪资范围（参考job.xlsx中的薪资）
+    JOB_SALARY_RANGES = {
+        1001: (15000, 35000),  # Python工程师 15K~35K
+        1002: (12000, 18000),  # 产品经理 12K~18K
+        1003: (9000, 15000)    # 新媒体运营 9-15K
+    }
+    
     def __init__(self):
         self.base_path = Path(__file__).parent.parent / "resouse"
         self.candidate_file = self.base_path / "candidate.xlsx"
         self.job_file = self.base_path / "job.xlsx"
         
-
+        # 解析结果缓存：{类型: ((路径, mtime_ns, 文件大小), 解析结果)}
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_invalidations = 0
+        # 候选人ID索引：(建立索引时的解析结果, {id: 候选人})，解析结果变化后重建
+        self._id_index = None
+    
+    def _file_key(self, path):
+        """文件缓存键：路径、修改时间和大小，任一变化都会重新解析"""
+        stat = path.stat()
+        return (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    
+    def _load_cached(self, kind, path, parser):
+        """返回缓存的解析结果，工作簿变化后自动重新解析"""
+        key = self._file_key(path)
+        with self._cache_lock:
+            cached = self._cache.get(kind)
+            if cached and cached[0] == key:
+                self._cache_hits += 1
+                return cached[1]
+            
+            self._cache_misses += 1
+            if cached:
+                self._cache_invalidations += 1
+            # 缓存中保存不可变的元组，调用方拿到的是逐条复制的字典
+            with excel_load_seconds.time(kind):
+                records = tuple(parser())
+            self._cache[kind] = (key, records)
+            return records
+    
+    def cache_stats(self):
+        """Excel解析缓存命中情况"""
+        with self._cache_lock:
+            total = self._cache_hits + self._cache_misses
+            return {
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "invalidations": self._cache_invalidations,
+                "hit_rate": round(self._cache_hits / total, 4) if total else 0.0,
+                "entries": {kind: len(records) for kind, (_, records) in self._cache.items()}
+            }
+    
+    def clear_cache(self):
+        """清空解析缓存"""
+        with self._cache_lock:
+            self._cache.clear()
         
     def load_candidates(self):
-        """加载候选人数据"""
+        """加载候选人数据（按文件修改时间缓存，返回可安全修改的副本）"""
         try:
-            print(f"尝试读取候选人文件: {self.candidate_file}")
-            print(f"文件存在: {self.candidate_file.exists()}")
-            
             if not self.candidate_file.exists():
-                print("候选人Excel文件不存在，使用备用数据")
+                print(f"候选人Excel文件不存在: {self.candidate_file}，使用备用数据")
                 return self._get_fallback_candidates()
             
-            # 读取候选人Excel文件
-            df = pd.read_excel(self.candidate_file)
-            print(f"成功读取候选人数据，共 {len(df)} 条记录")
-            print(f"列名: {list(df.columns)}")
-            
-            candidates = []
-            for index, row in df.iterrows():
-                # 从Excel读取真实数据，处理NaN值
-                name = self._safe_str(row.get("姓名"), f"候选人{index+1}")
-                email = self._safe_str(row.get("邮箱"), f"candidate{index+1}@example.com")
-                position = self._safe_str(row.get("岗位名称"), "未指定职位")
-                interview_score = row.get("面试总评分", None) if pd.notna(row.get("面试总评分")) else None
-                is_interviewed = self._safe_str(row.get("是否已面试（AI）"), "否")
-                interview_time = row.get("面试时间（AI问答完成时间）", None) if pd.notna(row.get("面试时间（AI问答完成时间）")) else None
-                candidate_id = row.get("id", index + 1) if pd.notna(row.get("id")) else index + 1
-                job_id = row.get("岗位编号", None) if pd.notna(row.get("岗位编号")) else None
-                
-                # 获取各维度评分
-                knowledge = self._safe_float(row.get("Knowledge"))
-                skill = self._safe_float(row.get("Skill"))
-                ability = self._safe_float(row.get("Ability"))
-                personality = self._safe_float(row.get("Personality"))
-                motivation = self._safe_float(row.get("Motivation"))
-                value = self._safe_float(row.get("Value"))
-                
-                # 收集所有有效的维度评分
-                dimension_scores = [s for s in [knowledge, skill, ability, personality, motivation, value] if s is not None]
-                
-                # 确定面试状态和评分
-                # 优先级1: 如果有面试总评分，使用总评分
-                if interview_score and pd.notna(interview_score):
-                    status = "已完成"
-                    score = int(float(interview_score))
-                # 优先级2: 如果有维度评分，计算平均分作为总分
-                elif dimension_scores:
-                    status = "已完成"
-                    score = int(sum(dimension_scores) / len(dimension_scores))
-                # 优先级3: 如果标记为已面试但没有评分
-                elif is_interviewed == "是":
-                    status = "面试中"
-                    score = None
-                # 优先级4: 默认为待面试
-                else:
-                    status = "待面试"
-                    score = None
-                
-                # 处理面试时间
-                if interview_time and pd.notna(interview_time):
-                    try:
-                        if isinstance(interview_time, str):
-                            interview_date = datetime.strptime(interview_time, "%Y-%m-%d")
-                        else:
-                            interview_date = interview_time
-                    except:
-                        interview_date = datetime.now() - timedelta(days=random.randint(0, 7))
-                else:
-                    interview_date = datetime.now() - timedelta(days=random.randint(0, 7))
-                
-                # 根据职位确定简历文件夹
-                resume_folder, resume_file = self._get_resume_info(name, position)
-                
-                candidate = {
-                    "id": candidate_id,
-                    "name": name,
-                    "email": email,
-                    "position": position,
-                    "job_id": job_id,
-                    "phone": self._safe_str(row.get("电话"), "未提供"),
-                    "experience": self._safe_str(row.get("工作经验"), "未提供"),
-                    "education": self._safe_str(row.get("学历"), "未提供"),
-                    "skills": self._safe_str(row.get("技能"), "未提供"),
-                    "expected_salary": self._generate_realistic_salary(name, position, job_id),
-                    "status": status,
-                    "score": score,
-                    "interview_date": interview_date.strftime("%Y-%m-%d"),
-                    "created_at": interview_date.strftime("%Y-%m-%d %H:%M:%S"),
-                    "knowledge_score": knowledge,
-                    "skill_score": skill,
-                    "ability_score": ability,
-                    "personality_score": personality,
-                    "motivation_score": motivation,
-                    "value_score": value,
-                    "resume_folder": resume_folder,
-                    "resume_file": resume_file
-                }
-                candidates.append(candidate)
-            
-            return candidates
+            candidates = self._load_cached("candidates", self.candidate_file, self._parse_candidates)
+            return [dict(candidate) for candidate in candidates]
             
         except Exception as e:
             print(f"读取候选人数据失败: {e}")
             return self._get_fallback_candidates()
     
+    def candidate_source_key(self):
+        """候选人数据源的版本标识（工作簿修改时间和大小），工作簿不存在时为 fallback"""
+        if not self.candidate_file.exists():
+            return "fallback"
+        _, mtime_ns, size = self._file_key(self.candidate_file)
+        return f"{mtime_ns}:{size}"
+    
+    def get_candidate(self, candidate_id):
+        """按ID查找候选人（索引随解析缓存更新），返回可安全修改的副本，不存在时返回 None"""
+        try:
+            if not self.candidate_file.exists():
+                records = tuple(self._get_fallback_candidates())
+            else:
+                records = self._load_cached("candidates", self.candidate_file, self._parse_candidates)
+        except Exception as e:
+            print(f"读取候选人数据失败: {e}")
+            records = tuple(self._get_fallback_candidates())
+
+        with self._cache_lock:
+            if self._id_index is None or self._id_index[0] is not records:
+                self._id_index = (records, {candidate.get('id'): candidate for candidate in records})
+            candidate = self._id_index[1].get(candidate_id)
+        return dict(candidate) if candidate else None
+    
+    def _parse_candidates(self):
+        """解析候选人Excel文件"""
+        print(f"读取候选人文件: {self.candidate_file}")
+        df = pd.read_excel(self.candidate_file)
+        print(f"成功读取候选人数据，共 {len(df)} 条记录")
+        print(f"列名: {list(df.columns)}")
+        return self._normalize_candidates(df)
+    
+    def _normalize_candidates(self, df):
+        """按列批量规范化候选人数据，最后一次性生成字典"""
+        df = df.reset_index(drop=True)
+        row_numbers = np.arange(1, len(df) + 1)
+        
+        # 从Excel读取真实数据，处理NaN值
+        names = self._str_column(df, "姓名", [f"候选人{i}" for i in row_numbers])
+        emails = self._str_column(df, "邮箱", [f"candidate{i}@example.com" for i in row_numbers])
+        positions = self._str_column(df, "岗位名称", "未指定职位")
+        candidate_ids = self._raw_column(df, "id", row_numbers)
+        job_ids = self._raw_column(df, "岗位编号", None)
+        
+        # 各维度评分及平均分
+        dimensions = pd.DataFrame({
+            key: self._float_column(df, column) for column, key in self.DIMENSION_COLUMNS
+        })
+        dimension_count = dimensions.notna().sum(axis=1)
+        dimension_average = dimensions.sum(axis=1) / dimension_count.replace(0, np.nan)
+        
+        # 确定面试状态和评分
+        # 优先级1: 面试总评分；优先级2: 维度平均分；优先级3: 标记为已面试；优先级4: 待面试
+        total_score = self._float_column(df, "面试总评分")
+        has_total = total_score.notna() & (total_score != 0)
+        has_dimensions = dimension_count > 0
+        interviewed = self._str_column(df, "是否已面试（AI）", "否") == "是"
+        
+        scores = np.trunc(np.where(has_total, total_score, dimension_average))
+        statuses = np.select(
+            [has_total | has_dimensions, interviewed],
+            ["已完成", "面试中"],
+            default="待面试"
+        )
+        
+        # 处理面试时间，缺失或格式错误时取最近一周内的随机日期
+        interview_dates = self._date_column(df, "面试时间（AI问答完成时间）")
+        random_dates = pd.Series(
+            pd.Timestamp(datetime.now()) - pd.to_timedelta(np.random.randint(0, 8, len(df)), unit="D"),
+            index=df.index
+        )
+        interview_dates = interview_dates.fillna(random_dates)
+        created_at = interview_dates.dt.strftime("%Y-%m-%d %H:%M:%S")
+        
+        # 简历在简历目录中按姓名和职位查找，目录中没有的按职位推断文件夹
+        resume_catalog.register_emails(dict(zip(emails.tolist(), names.tolist())))
+        position_folders = {position: self._resume_folder(position) for position in positions.unique()}
+        located = [
+            self._locate_resume(name, position, position_folders[position])
+            for name, position in zip(names.tolist(), positions.tolist())
+        ]
+        self._warn_missing_resumes(located)
+        
+        columns = {
+            "id": candidate_ids.tolist(),
+            "name": names.tolist(),
+            "email": emails.tolist(),
+            "position": positions.tolist(),
+            "job_id": job_ids.tolist(),
+            "phone": self._str_column(df, "电话", "未提供").tolist(),
+            "experience": self._str_column(df, "工作经验", "未提供").tolist(),
+            "education": self._str_column(df, "学历", "未提供").tolist(),
+            "skills": self._str_column(df, "技能", "未提供").tolist(),
+            "expected_salary": self._salary_column(names, job_ids).tolist(),
+            "status": statuses.tolist(),
+            "score": [None if np.isnan(score) else int(score) for score in scores.tolist()],
+            "interview_date": created_at.str[:10].tolist(),
+            "created_at": created_at.tolist(),
+        }
+        for _, key in self.DIMENSION_COLUMNS:
+            columns[key] = self._nullable(dimensions[key]).tolist()
+        columns["resume_folder"] = [folder for folder, _, _ in located]
+        columns["resume_file"] = [resume_file for _, resume_file, _ in located]
+        
+        return self._records(columns)
+    
     def load_jobs(self):
-        """加载职位数据"""
+        """加载职位数据（按文件修改时间缓存，返回可安全修改的副本）"""
         try:
-            df = pd.read_excel(self.job_file)
-            print(f"成功读取职位数据，共 {len(df)} 条记录")
-            print(f"职位Excel列名: {list(df.columns)}")
-            
-            jobs = []
-            for index, row in df.iterrows():
-                
-                # 尝试多种可能的列名
-                title_candidates = ["职位全称", "职位名称", "岗位名称", "职位", "岗位", "title", "job_title"]
-                title = f"职位{index+1}"
-                for col in title_candidates:
-                    if col in df.columns and pd.notna(row.get(col)):
-                        title = self._safe_str(row.get(col))
-                        break
-                
-                dept_candidates = ["部门", "department", "dept"]
-                department = "技术部"
-                for col in dept_candidates:
-                    if col in df.columns and pd.notna(row.get(col)):
-                        department = self._safe_str(row.get(col))
-                        break
-                
-                salary_candidates = ["薪资", "薪资范围", "工资", "salary", "salary_range"]
-                salary = "面议"
-                for col in salary_candidates:
-                    if col in df.columns and pd.notna(row.get(col)):
-                        salary = self._safe_str(row.get(col))
-                        break
-                
-                req_candidates = ["职位要求", "岗位要求", "个人能力要求", "要求", "requirements", "job_requirements"]
-                requirements = "未提供"
-                for col in req_candidates:
-                    if col in df.columns and pd.notna(row.get(col)):
-                        requirements = self._safe_str(row.get(col))
-                        break
-                
-                desc_candidates = ["职位描述", "岗位描述", "其它补充说明", "描述", "description", "job_description"]
-                description = "未提供"
-                for col in desc_candidates:
-                    if col in df.columns and pd.notna(row.get(col)):
-                        description = self._safe_str(row.get(col))
-                        break
-                
-                # 获取招聘数量
-                count_candidates = ["招聘数量", "招聘人数", "人数", "count"]
-                recruit_count = 1
-                for col in count_candidates:
-                    if col in df.columns and pd.notna(row.get(col)):
-                        try:
-                            recruit_count = int(row.get(col))
-                        except:
-                            recruit_count = 1
-                        break
-                
-                # 获取发布时间
-                publish_candidates = ["职位发布时间", "发布时间", "创建时间", "publish_date"]
-                publish_date = datetime.now().strftime("%Y-%m-%d")
-                for col in publish_candidates:
-                    if col in df.columns and pd.notna(row.get(col)):
-                        try:
-                            if isinstance(row.get(col), str):
-                                publish_date = datetime.strptime(row.get(col), "%Y-%m-%d").strftime("%Y-%m-%d")
-                            else:
-                                publish_date = row.get(col).strftime("%Y-%m-%d")
-                        except:
-                            publish_date = datetime.now().strftime("%Y-%m-%d")
-                        break
-                
-                # 获取招聘状态
-                status_candidates = ["该招聘状态-开启/关闭", "招聘状态", "状态", "status"]
-                status = "招聘中"
-                for col in status_candidates:
-                    if col in df.columns and pd.notna(row.get(col)):
-                        status_val = self._safe_str(row.get(col))
-                        if "开启" in status_val or "招聘中" in status_val:
-                            status = "招聘中"
-                        elif "关闭" in status_val or "暂停" in status_val:
-                            status = "已暂停"
-                        break
-                
-                job = {
-                    "id": self._safe_str(row.get("职位id"), index + 1),
-                    "title": title,
-                    "department": department,
-                    "location": self._safe_str(row.get("工作地点"), "北京"),
-                    "salary_range": salary,
-                    "requirements": requirements,
-                    "description": description,
-                    "status": status,
-                    "created_at": publish_date,
-                    "publish_date": publish_date,
-                    "candidate_count": 0,
-                    "recruit_count": recruit_count,
-                    "recruiter": self._safe_str(row.get("招聘负责人"), "HR"),
-                    "recruiter_email": self._safe_str(row.get("负责人邮箱"), "hr@company.com")
-                }
-                
-                print(f"职位 {index+1}: {title}")
-                jobs.append(job)
-            
-            return jobs
+            jobs = self._load_cached("jobs", self.job_file, self._parse_jobs)
+            return [dict(job) for job in jobs]
             
         except Exception as e:
             print(f"读取职位数据失败: {e}")
@@ -228,6 +228,190 @@ class ExcelDataLoader:
             traceback.print_exc()
             return self._get_fallback_jobs()
     
+    def _parse_jobs(self):
+        """解析职位Excel文件"""
+        df = pd.read_excel(self.job_file)
+        print(f"成功读取职位数据，共 {len(df)} 条记录")
+        print(f"职位Excel列名: {list(df.columns)}")
+        return self._normalize_jobs(df)
+    
+    def _normalize_jobs(self, df):
+        """按列批量规范化职位数据，列名别名在每个文件上只匹配一次"""
+        df = df.reset_index(drop=True)
+        row_numbers = np.arange(1, len(df) + 1)
+        aliases = self.JOB_COLUMN_ALIASES
+        today = datetime.now().strftime("%Y-%m-%d")
+        
+        titles = self._str_column(self._first_available(df, aliases["title"]), None, [f"职位{i}" for i in row_numbers])
+        departments = self._str_column(self._first_available(df, aliases["department"]), None, "技术部")
+        salaries = self._str_column(self._first_available(df, aliases["salary"]), None, "面议")
+        requirements = self._str_column(self._first_available(df, aliases["requirements"]), None, "未提供")
+        descriptions = self._str_column(self._first_available(df, aliases["description"]), None, "未提供")
+        
+        # 招聘数量
+        recruit_counts = pd.to_numeric(self._first_available(df, aliases["recruit_count"]), errors="coerce")
+        recruit_counts = np.trunc(recruit_counts.fillna(1)).astype(int)
+        
+        # 发布时间
+        publish_dates = self._date_column(self._first_available(df, aliases["publish_date"]), None)
+        publish_dates = publish_dates.dt.strftime("%Y-%m-%d").fillna(today)
+        
+        # 招聘状态
+        status_values = self._str_column(self._first_available(df, aliases["status"]), None, "")
+        paused = (
+            ~status_values.str.contains("开启|招聘中")
+            & status_values.str.contains("关闭|暂停")
+        )
+        statuses = np.where(paused, "已暂停", "招聘中")
+        
+        columns = {
+            "id": self._str_column(df, "职位id", row_numbers).tolist(),
+            "title": titles.tolist(),
+            "department": departments.tolist(),
+            "location": self._str_column(df, "工作地点", "北京").tolist(),
+            "salary_range": salaries.tolist(),
+            "requirements": requirements.tolist(),
+            "description": descriptions.tolist(),
+            "status": statuses.tolist(),
+            "created_at": publish_dates.tolist(),
+            "publish_date": publish_dates.tolist(),
+            "candidate_count": [0] * len(df),
+            "recruit_count": recruit_counts.tolist(),
+            "recruiter": self._str_column(df, "招聘负责人", "HR").tolist(),
+            "recruiter_email": self._str_column(df, "负责人邮箱", "hr@company.com").tolist()
+        }
+        
+        return self._records(columns)
+    
+    def _records(self, columns):
+        """按列生成字典列表；NumPy/pandas标量在这里统一转换为Python类型，接口可以直接序列化"""
+        for key, values in columns.items():
+            if not all(self._is_native(value) for value in values):
+                columns[key] = [self._native(value) for value in values]
+        keys = list(columns)
+        return [dict(zip(keys, values)) for values in zip(*columns.values())]
+    
+    def _is_native(self, value):
+        return value is None or type(value) in (str, int, bool) or (type(value) is float and math.isfinite(value))
+    
+    def _native(self, value):
+        """NumPy标量转换为Python数值，pandas时间转换为datetime，NaN/NaT转换为None"""
+        if value is None or value is pd.NaT:
+            return None
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, pd.Timestamp):
+            return value.to_pydatetime()
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return value
+    
+    def _first_available(self, df, aliases):
+        """按别名顺序取每行第一个非空值"""
+        result = pd.Series(None, index=df.index, dtype=object)
+        for column in aliases:
+            if column in df.columns:
+                result = result.where(result.notna(), df[column].astype(object))
+        return result
+    
+    def _str_column(self, source, column, default):
+        """字符串列：非空值去除首尾空白，空值使用默认值（可以是逐行的默认值）
+        source 为 DataFrame 时按 column 取列，为 Series 时直接使用"""
+        result = self._defaults(source.index, default)
+        if column is None:
+            series = source
+        elif column in source.columns:
+            series = source[column]
+        else:
+            return result
+        mask = series.notna()
+        if mask.any():
+            result[mask] = series[mask].map(str).str.strip()
+        return result
+    
+    def _defaults(self, index, default):
+        """默认值序列：标量广播到每一行，None 保持为 None 而不是 NaN"""
+        if np.ndim(default) == 0:
+            values = np.full(len(index), default, dtype=object)
+        else:
+            values = np.asarray(default, dtype=object)
+        return pd.Series(values, index=index, dtype=object)
+    
+    def _raw_column(self, df, column, default):
+        """原样保留非空值，空值使用默认值"""
+        defaults = self._defaults(df.index, default)
+        if column not in df.columns:
+            return defaults
+        series = df[column]
+        values = np.where(series.notna(), series.astype(object), defaults.to_numpy())
+        return pd.Series(values, index=df.index, dtype=object)
+    
+    def _float_column(self, df, column):
+        """数值列：空值、无穷大和无法转换的值统一为NaN"""
+        if column not in df.columns:
+            return pd.Series(np.nan, index=df.index, dtype=float)
+        values = pd.to_numeric(df[column], errors="coerce").astype(float)
+        return values.where(~np.isinf(values))
+    
+    def _nullable(self, values):
+        """NaN转换为None，便于JSON序列化"""
+        return values.astype(object).where(values.notna(), None)
+    
+    def _date_column(self, source, column):
+        """日期列：字符串按 %Y-%m-%d 解析，日期类型直接使用，其余为NaT"""
+        if column is None:
+            series = source
+        elif column in source.columns:
+            series = source[column]
+        else:
+            return pd.Series(pd.NaT, index=source.index, dtype="datetime64[ns]")
+        
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        is_text = series.map(lambda v: isinstance(v, str))
+        is_date = series.map(lambda v: isinstance(v, datetime))
+        parsed = pd.to_datetime(series.where(is_text), format="%Y-%m-%d", errors="coerce")
+        if is_date.any():
+            parsed = parsed.fillna(pd.to_datetime(series.where(is_date), errors="coerce"))
+        return parsed
+    
+    def _salary_column(self, names, job_ids):
+        """批量生成薪资期望：每个姓名只计算一次哈希，区间运算向量化"""
+        hashes = names.map({
+            name: int(hashlib.md5(name.encode()).hexdigest()[:8], 16) for name in names.unique()
+        }).to_numpy(dtype=np.int64)
+        
+        job_numbers = pd.to_numeric(job_ids, errors="coerce")
+        min_salary = np.full(len(names), 12000, dtype=np.int64)
+        max_salary = np.full(len(names), 25000, dtype=np.int64)
+        for job_id, (low, high) in self.JOB_SALARY_RANGES.items():
+            matched = (job_numbers == job_id).to_numpy()
+            min_salary[matched] = low
+            max_salary[matched] = high
+        
+        range_size = max_salary - min_salary
+        lower_part = (range_size * 0.6).astype(np.int64)
+        upper_part = (range_size * 0.4).astype(np.int64)
+        # 70%的候选人期望薪资在前60%范围内
+        salary = np.where(
+            hashes % 10 < 7,
+            min_salary + hashes % lower_part,
+            min_salary + lower_part + hashes % upper_part
+        )
+        
+        # 格式化为K显示
+        salary = pd.Series(salary, index=names.index)
+        return ((salary // 1000).astype(str) + "K").where(salary >= 1000, salary.astype(str))
+    
+    def _warn_missing_resumes(self, located):
+        """汇总提示简历目录中找不到的简历文件"""
+        missing = [
+            str(self.base_path / folder / resume_file)
+            for folder, resume_file, found in located if not found
+        ]
+        if missing:
+            print(f"警告: {len(missing)} 个简历文件不存在，例如: {missing[:3]}")
+    
     def _get_fallback_candidates(self):
         """备用候选人数据"""
         return [
@@ -362,27 +546,12 @@ class ExcelDataLoader:
             # 筛选有薪资期望的候选人
             salary_candidates = []
             for c in pos_candidates:
-                salary_str = c.get("expected_salary", "")
-                if salary_str and salary_str != "面议" and salary_str != "未提供":
-                    # 尝试提取数字
-                    try:
-                        # 处理各种薪资格式：15000, 15K, 15k, 1.5万等
-                        import re
-                        numbers = re.findall(r'[\d.]+', salary_str)
-                        if numbers:
-                            salary_num = float(numbers[0])
-                            # 处理K和万的单位
-                            if 'k' in salary_str.lower() or 'K' in salary_str:
-                                salary_num *= 1000
-                            elif '万' in salary_str:
-                                salary_num *= 10000
-                            
-                            salary_candidates.append({
-                                "candidate": c,
-                                "salary_num": salary_num
-                            })
-                    except:
-                        continue
+                salary_num = self.parse_salary(c.get("expected_salary", ""))
+                if salary_num is not None:
+                    salary_candidates.append({
+                        "candidate": c,
+                        "salary_num": salary_num
+                    })
             
             if salary_candidates:
                 # 按薪资排序，取最低的
@@ -396,83 +565,46 @@ class ExcelDataLoader:
         
         return lowest_salary_candidates
     
-    def _safe_str(self, value, default="未提供"):
-        """安全转换为字符串"""
-        return str(value).strip() if pd.notna(value) else default
-    
-    def _safe_float(self, value):
-        """安全转换为浮点数"""
-        if pd.notna(value) and not np.isinf(value):
-            return float(value)
-        return None
-    
-    def _get_resume_info(self, candidate_name, position):
-        """根据候选人姓名和职位获取简历文件夹和文件名"""
-        # 职位到文件夹的映射
-        position_folder_mapping = {
-            "Python工程师服务器端开发": "Python工程师服务器端开发",
-            "C端产品经理-AIGC领域": "C端产品经理-AIGC领域",
-            "金融海外投资新媒体内容文案编辑运营": "金融海外投资新媒体内容文案编辑运营"
-        }
-        
-        # 根据职位名称匹配文件夹
-        resume_folder = None
-        for pos_key, folder_name in position_folder_mapping.items():
-            if pos_key in position or position in pos_key:
-                resume_folder = folder_name
-                break
+    def parse_salary(self, salary_str):
+        """期望薪资转换为数字（15000, 15K, 15k, 1.5万等），面议、未提供或无法识别时返回 None"""
+        if not salary_str or salary_str == "面议" or salary_str == "未提供":
+            return None
+        try:
+            numbers = re.findall(r'[\d.]+', salary_str)
+            if not numbers:
+                return None
+            salary_num = float(numbers[0])
+            # 处理K和万的单位
+            if 'k' in salary_str.lower():
+                salary_num *= 1000
+            elif '万' in salary_str:
+                salary_num *= 10000
+            return salary_num
+        except (TypeError, ValueError):
+            return None
+    
+    def _resume_folder(self, position):
+        """根据职位名称确定简历文件夹"""
+        # 优先使用简历目录中名称最接近的职位文件夹
+        folder = resume_catalog.folder_for_position(position)
+        if folder:
+            return folder
         
         # 如果没有匹配到，尝试根据关键词匹配
-        if not resume_folder:
-            if "Python" in position or "python" in position or "工程师" in position:
-                resume_folder = "Python工程师服务器端开发"
-            elif "产品" in position or "PM" in position:
-                resume_folder = "C端产品经理-AIGC领域"
-            elif "新媒体" in position or "编辑" in position or "运营" in position:
-                resume_folder = "金融海外投资新媒体内容文案编辑运营"
-            else:
-                resume_folder = "Python工程师服务器端开发"  # 默认文件夹
-        
-        # 简历文件名就是候选人姓名.pdf
-        resume_file = f"{candidate_name}.pdf"
-        
-        # 验证文件是否存在
-        resume_path = self.base_path / resume_folder / resume_file
-        if not resume_path.exists():
-            print(f"警告: 简历文件不存在: {resume_path}")
-        
-        return resume_folder, resume_file
+        if "Python" in position or "python" in position or "工程师" in position:
+            return "Python工程师服务器端开发"
+        elif "产品" in position or "PM" in position:
+            return "C端产品经理-AIGC领域"
+        elif "新媒体" in position or "编辑" in position or "运营" in position:
+            return "金融海外投资新媒体内容文案编辑运营"
+        return "Python工程师服务器端开发"  # 默认文件夹
     
-    def _generate_realistic_salary(self, name, position, job_id):
-        """基于真实数据生成合理的薪资期望"""
-        # 根据职位ID设置基础薪资范围（参考job.xlsx中的薪资）
-        job_salary_ranges = {
-            1001: (15000, 35000),  # Python工程师 15K~35K
-            1002: (12000, 18000),  # 产品经理 12K~18K  
-            1003: (9000, 15000)    # 新媒体运营 9-15K
-        }
-        
-        # 根据姓名生成一致的随机数（这样每次运行结果一致）
-        import hashlib
-        hash_val = int(hashlib.md5(name.encode()).hexdigest()[:8], 16)
-        
-        # 获取职位的薪资范围
-        salary_range = job_salary_ranges.get(job_id, (12000, 25000))
-        min_salary, max_salary = salary_range
-        
-        # 生成薪资期望（在范围内随机，但偏向中低端）
-        range_size = max_salary - min_salary
-        # 70%的候选人期望薪资在前60%范围内
-        if hash_val % 10 < 7:
-            salary = min_salary + (hash_val % int(range_size * 0.6))
-        else:
-            salary = min_salary + int(range_size * 0.6) + (hash_val % int(range_size * 0.4))
-        
-        # 格式化为K显示
-        if salary >= 1000:
-            return f"{salary // 1000}K"
-        else:
-            return f"{salary}"
+    def _locate_resume(self, candidate_name, position, default_folder):
+        """返回 (简历文件夹, 文件名, 是否存在)；目录中没有时默认为 职位文件夹/姓名.pdf"""
+        entry = resume_catalog.find(name=candidate_name, position=position)
+        if entry:
+            return entry["folder"], entry["filename"], True
+        return default_folder, f"{candidate_name}.pdf", False
     
     def get_top_candidates(self, candidates, limit=5):
         """获取评分最高的候选人"""
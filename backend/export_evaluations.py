@@ -3,16 +3,16 @@
 导出候选人评分数据到CSV
 """
 
-import sqlite3
 import pandas as pd
 from pathlib import Path
 import json
+from db_pool import db_pool
 
 def export_evaluations_to_csv():
     """导出评分数据到CSV文件"""
     
     # 连接数据库
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     
     try:
         # 查询候选人基本信息和评分数据
@@ -88,7 +88,7 @@ def export_evaluations_to_csv():
 def load_real_candidate_data():
     """从真实数据文件加载候选人信息并插入数据库"""
     
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+JSON响应 - 所有接口共用的快速序列化
+安装了 orjson 时使用 orjson（原生支持 datetime、NumPy 标量和数组），否则使用标准库 json；
+Decimal、集合等其他类型由 _default 转换，无法识别的对象转为字符串
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _default(obj):
+    """序列化器不能直接处理的类型"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if np is not None:
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+    return str(obj)
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(content):
+        """序列化为UTF-8字节"""
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
+else:
+    def dumps(content):
+        """序列化为UTF-8字节"""
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                          default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 dumps 序列化的JSON响应；接口直接返回它时还可以跳过 FastAPI 的 jsonable_encoder"""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def backend():
+    """当前使用的序列化器"""
+    return "orjson" if orjson is not None else "json"
@@ -3,12 +3,13 @@
 为候选人生成模拟评分数据
 """
 
-import sqlite3
 import random
 import json
 from datetime import datetime, timedelta
 import pandas as pd
 from pathlib import Path
+from db_pool import db_pool
+from migrations import ensure_schema
 
 def generate_realistic_scores():
     """生成符合实际情况的评分数据"""
@@ -196,30 +197,11 @@ def generate_feedback(candidate, scores):
 def save_to_database(evaluations):
     """保存评分数据到数据库"""
     
-    conn = sqlite3.connect('recruitment.db')
+    ensure_schema()
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
-        # 创建表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS candidate_evaluations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                candidate_id INTEGER,
-                knowledge REAL,
-                skill REAL,
-                ability REAL,
-                personality REAL,
-                motivation REAL,
-                value REAL,
-                total_score REAL,
-                strengths TEXT,
-                improvements TEXT,
-                summary TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
         # 清除旧数据
         cursor.execute('DELETE FROM candidate_evaluations')
         
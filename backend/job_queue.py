@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+后台任务队列 - 耗时的大模型操作在工作线程中执行，接口立即返回任务ID
+任务保存在数据库的 background_jobs 表中，进程重启后排队中的任务继续执行；
+相同类型、相同参数的任务在排队或执行期间只会存在一个。
+工作线程可以运行在API进程中（job_queue.workers），也可以单独启动 job_worker.py 扩展
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+from config import config
+from db_pool import db_pool
+from migrations import run_migrations
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+
+class JobQueue:
+    """SQLite持久化的后台任务队列"""
+
+    def __init__(self, workers=None, poll_interval=None, stale_after=None, pool=None):
+        self.workers = config.get('job_queue.workers', 2) if workers is None else workers
+        self.poll_interval = poll_interval or config.get('job_queue.poll_interval_seconds', 1.0)
+        self.stale_after = stale_after or config.get('job_queue.stale_after_seconds', 900)
+        self.pool = pool or db_pool
+
+        self._handlers = {}
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
+        self._schema_ready = False
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _ensure_schema(self):
+        if not self._schema_ready:
+            with self.pool.connection() as conn:
+                run_migrations(conn)
+            self._schema_ready = True
+
+    def register(self, job_type, handler):
+        """注册任务处理函数：async handler(params) -> 可JSON序列化的结果"""
+        self._handlers[job_type] = handler
+
+    @staticmethod
+    def dedupe_key(job_type, params):
+        payload = json.dumps({"type": job_type, "params": params}, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def submit(self, job_type, params, dedupe_params=None):
+        """
+        提交任务，返回 (任务, 是否新建)
+        已有相同的任务在排队或执行时直接返回该任务；dedupe_params 用于指定去重依据（默认为全部参数）
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"未注册的任务类型: {job_type}")
+        self._ensure_schema()
+
+        key = self.dedupe_key(job_type, params if dedupe_params is None else dedupe_params)
+        with self.pool.connection() as conn:
+            # 在同一个写事务中查找和插入，其他提交者或工作线程不会在两步之间改变任务状态
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('''
+                SELECT id FROM background_jobs
+                WHERE dedupe_key = ? AND status IN (?, ?)
+            ''', (key, QUEUED, RUNNING)).fetchone()
+            if row:
+                # 相同任务仍在排队或执行中
+                job_id = row[0]
+                created = False
+            else:
+                job_id = uuid.uuid4().hex
+                conn.execute('''
+                    INSERT INTO background_jobs (id, job_type, dedupe_key, params_json, status, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (job_id, job_type, key, json.dumps(params, ensure_ascii=False), QUEUED, time.time()))
+                created = True
+            conn.commit()
+
+        self._wakeup.set()
+        return self.get(job_id), created
+
+    def get(self, job_id):
+        """查询任务状态和结果，任务不存在时返回None"""
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            row = conn.execute('''
+                SELECT id, job_type, status, params_json, result_json, error,
+                       attempts, worker_id, created_at, started_at, finished_at
+                FROM background_jobs WHERE id = ?
+            ''', (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, status=None, job_type=None, limit=50):
+        """最近提交的任务（不含结果内容）"""
+        self._ensure_schema()
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if job_type:
+            conditions.append("job_type = ?")
+            params.append(job_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'''
+                SELECT id, job_type, status, params_json, NULL, error,
+                       attempts, worker_id, created_at, started_at, finished_at
+                FROM background_jobs {where}
+                ORDER BY created_at DESC
+                LIMIT ?
+            ''', (*params, limit)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    async def wait(self, job_id, timeout):
+        """长轮询：等待任务结束或超时，返回任务当前状态；数据库查询在线程池中执行，不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        job = await loop.run_in_executor(None, self.get, job_id)
+        while job and job["status"] not in FINISHED_STATUSES and time.monotonic() < deadline:
+            await asyncio.sleep(min(0.5, max(0.0, deadline - time.monotonic())))
+            job = await loop.run_in_executor(None, self.get, job_id)
+        return job
+
+    @staticmethod
+    def _row_to_job(row):
+        (job_id, job_type, status, params_json, result_json, error,
+         attempts, worker_id, created_at, started_at, finished_at) = row
+        return {
+            "job_id": job_id,
+            "job_type": job_type,
+            "status": status,
+            "params": json.loads(params_json) if params_json else {},
+            "result": json.loads(result_json) if result_json else None,
+            "error": error,
+            "attempts": attempts,
+            "worker_id": worker_id,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at
+        }
+
+    def _claim(self, worker_id):
+        """原子地领取最早排队的任务，多个线程或进程不会领取同一个任务"""
+        with self.pool.connection() as conn:
+            row = conn.execute('''
+                UPDATE background_jobs
+                SET status = ?, worker_id = ?, started_at = ?, attempts = attempts + 1
+                WHERE id = (
+                    SELECT id FROM background_jobs
+                    WHERE status = ?
+                    ORDER BY created_at
+                    LIMIT 1
+                )
+                RETURNING id, job_type, params_json
+            ''', (RUNNING, worker_id, time.time(), QUEUED)).fetchone()
+            conn.commit()
+        return row
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self.pool.connection() as conn:
+            conn.execute('''
+                UPDATE background_jobs
+                SET status = ?, result_json = ?, error = ?, finished_at = ?
+                WHERE id = ?
+            ''', (
+                status,
+                json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                error,
+                time.time(),
+                job_id
+            ))
+            conn.commit()
+
+    def run_once(self, worker_id, loop):
+        """领取并执行一个任务，没有排队的任务时返回False"""
+        claimed = self._claim(worker_id)
+        if claimed is None:
+            return False
+
+        job_id, job_type, params_json = claimed
+        handler = self._handlers.get(job_type)
+        try:
+            if handler is None:
+                raise ValueError(f"未注册的任务类型: {job_type}")
+            result = loop.run_until_complete(handler(json.loads(params_json)))
+            self._finish(job_id, SUCCEEDED, result=result)
+        except Exception as e:
+            # HTTPException 的错误信息在 detail 中
+            error = getattr(e, "detail", None) or str(e) or type(e).__name__
+            print(f"后台任务失败 {job_type} {job_id}: {error}")
+            self._finish(job_id, FAILED, error=str(error))
+        return True
+
+    def requeue_stale(self):
+        """把执行时间超过 stale_after 秒的任务（工作进程已退出）重新排队"""
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            cursor = conn.execute('''
+                UPDATE background_jobs
+                SET status = ?, worker_id = NULL, started_at = NULL
+                WHERE status = ? AND started_at < ?
+            ''', (QUEUED, RUNNING, time.time() - self.stale_after))
+            conn.commit()
+        if cursor.rowcount:
+            print(f"重新排队超时的后台任务: {cursor.rowcount} 个")
+        return cursor.rowcount
+
+    def _run(self, worker_id):
+        # 每个工作线程使用自己的事件循环（llm_gateway 按事件循环创建客户端）
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    if self.run_once(worker_id, loop):
+                        continue
+                except Exception as e:
+                    print(f"后台任务队列出错: {e}")
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+        finally:
+            loop.close()
+
+    def start(self, workers=None):
+        """启动工作线程"""
+        workers = self.workers if workers is None else workers
+        if self._threads or workers <= 0:
+            return
+        self._ensure_schema()
+        self.requeue_stale()
+        self._stop_event.clear()
+        for i in range(workers):
+            worker_id = f"{self._worker_prefix}:{i}"
+            thread = threading.Thread(target=self._run, args=(worker_id,), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """停止工作线程（正在执行的任务完成后退出）"""
+        self._stop_event.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self):
+        """各状态的任务数量"""
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM background_jobs GROUP BY status"
+            ).fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        counts.update(dict(rows))
+        return {"workers": len(self._threads), "jobs": counts}
+
+
+# 创建全局任务队列实例
+job_queue = JobQueue()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+后台任务工作进程
+与API进程分开运行，执行排队中的大模型任务；可以启动多个进程，按负载独立于API扩展
+
+用法: python job_worker.py [--workers N]
+API进程本身不需要执行任务时，把配置中的 job_queue.workers 设为 0
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 添加当前目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main as api  # 导入时注册各类任务的处理函数
+from job_queue import job_queue
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description="后台任务工作进程")
+    parser.add_argument("--workers", type=int, default=max(job_queue.workers, 1),
+                        help="工作线程数")
+    args = parser.parse_args(argv)
+
+    api.init_db()
+    job_queue.start(workers=args.workers)
+    print(f"后台任务工作进程已启动，工作线程: {args.workers}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("正在停止工作进程...")
+    finally:
+        job_queue.stop()
+        api.score_buffer.stop()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+大模型响应缓存 - 相同的请求直接返回已保存的回复
+缓存键是 (模型, 温度, 最大token数, 消息) 的SHA-256，结果保存在SQLite中，进程重启后仍然有效；
+超过有效期的记录视为未命中，条目数或总字节数超过上限时按最近访问时间淘汰
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+from config import config
+from db_pool import db_pool
+from migrations import run_migrations
+
+
+class LLMResponseCache:
+    """SQLite持久化的大模型响应缓存"""
+
+    def __init__(self, enabled=None, ttl_seconds=None, max_entries=None, max_bytes=None, pool=None):
+        self.enabled = config.get('llm_cache.enabled', True) if enabled is None else enabled
+        self.ttl_seconds = ttl_seconds or config.get('llm_cache.ttl_seconds', 604800)
+        self.max_entries = max_entries or config.get('llm_cache.max_entries', 5000)
+        self.max_bytes = max_bytes or config.get('llm_cache.max_bytes', 50 * 1024 * 1024)
+        self.pool = pool or db_pool
+
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._bypassed = 0
+        self._evictions = 0
+        self._bytes_served = 0
+        self._bytes_stored = 0
+
+    def _ensure_schema(self):
+        if not self._schema_ready:
+            with self.pool.connection() as conn:
+                run_migrations(conn)
+            self._schema_ready = True
+
+    @staticmethod
+    def make_key(model, temperature, max_tokens, messages):
+        """请求内容的哈希"""
+        payload = json.dumps({
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": messages
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def record_bypass(self):
+        """记录一次跳过缓存的调用"""
+        with self._lock:
+            self._bypassed += 1
+
+    def get(self, key):
+        """读取缓存的回复，未命中或已过期返回None"""
+        if not self.enabled:
+            return None
+        self._ensure_schema()
+        now = time.time()
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT response, size_bytes, created_at FROM llm_response_cache WHERE cache_key = ?",
+                (key,)
+            ).fetchone()
+            if row and now - row[2] > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (key,))
+                conn.commit()
+                with self._lock:
+                    self._expired += 1
+                row = None
+            elif row:
+                conn.execute('''
+                    UPDATE llm_response_cache
+                    SET last_accessed = ?, hit_count = hit_count + 1
+                    WHERE cache_key = ?
+                ''', (now, key))
+                conn.commit()
+
+        with self._lock:
+            if row:
+                self._hits += 1
+                self._bytes_served += row[1]
+            else:
+                self._misses += 1
+        return row[0] if row else None
+
+    def put(self, key, model, response):
+        """保存回复，并在超出上限时淘汰最久未访问的记录"""
+        if not self.enabled or not response:
+            return
+        self._ensure_schema()
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self.pool.connection() as conn:
+            conn.execute('''
+                INSERT INTO llm_response_cache
+                    (cache_key, model, response, size_bytes, hit_count, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, 0, ?, ?)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    response = excluded.response, size_bytes = excluded.size_bytes,
+                    created_at = excluded.created_at, last_accessed = excluded.last_accessed
+            ''', (key, model, response, size, now, now))
+            evicted = self._evict(conn)
+            conn.commit()
+
+        with self._lock:
+            self._bytes_stored += size
+            self._evictions += evicted
+
+    def _evict(self, conn):
+        """按最近访问时间从旧到新删除，直到条目数和总字节数都不超过上限"""
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_response_cache"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return 0
+
+        victims = []
+        rows = conn.execute(
+            "SELECT cache_key, size_bytes FROM llm_response_cache ORDER BY last_accessed"
+        )
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM llm_response_cache WHERE cache_key = ?", victims)
+        return len(victims)
+
+    def clear(self):
+        """清空缓存"""
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM llm_response_cache")
+            conn.commit()
+
+    def stats(self):
+        """缓存命中统计"""
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_response_cache"
+            ).fetchone()
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": entries,
+                "total_bytes": total,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "expired": self._expired,
+                "bypassed": self._bypassed,
+                "evictions": self._evictions,
+                "bytes_served": self._bytes_served,
+                "bytes_stored": self._bytes_stored,
+                "ttl_seconds": self.ttl_seconds,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes
+            }
+
+
+# 创建全局LLM响应缓存实例
+llm_cache = LLMResponseCache()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+LLM网关 - 所有大模型调用共享的异步客户端
+基于 AsyncOpenAI，调用不会阻塞事件循环；并发数由信号量限制，HTTP连接在调用之间复用，
+每次调用都有超时时间；相同请求的回复由 llm_cache 缓存。
+每类操作有自己的截止时间，可重试的错误按退避策略重试，连续失败时熔断器让调用立即失败
+（见 llm_resilience.py）；可选的对冲请求在首个请求迟迟未返回时再发一个相同请求
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from collections import Counter
+
+import httpx
+import openai
+
+from config import config
+from llm_cache import llm_cache
+from metrics import llm_call_seconds, llm_calls, llm_tokens
+from llm_resilience import (
+    BREAKER_REASONS, CLOSED, CircuitBreaker, LLMCallError, RetryPolicy, classify_error
+)
+
+
+class LLMGateway:
+    """异步LLM网关"""
+
+    def __init__(self, api_key=None, base_url=None, model=None,
+                 max_concurrency=None, timeout=None, max_connections=None, cache=None,
+                 retry_policy=None, breaker=None, hedge_after=None, deadlines=None):
+        self.api_key = api_key or config.get('llm.api_key')
+        self.base_url = base_url or config.get('llm.base_url')
+        self.model = model or config.get('llm.model', 'ernie-4.5-turbo-32k')
+        self.max_concurrency = max_concurrency or config.get('llm.max_concurrency', 8)
+        self.timeout = timeout or config.get('llm.timeout_seconds', 60)
+        self.max_connections = max_connections or config.get('llm.max_connections', 20)
+        self.cache = cache or llm_cache
+
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=config.get('llm_resilience.max_attempts', 3),
+            base_delay=config.get('llm_resilience.retry_base_delay', 0.5),
+            max_delay=config.get('llm_resilience.retry_max_delay', 8.0)
+        )
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=config.get('llm_resilience.breaker_failure_threshold', 5),
+            reset_timeout=config.get('llm_resilience.breaker_reset_seconds', 30)
+        )
+        # 0 表示不发对冲请求
+        self.hedge_after = hedge_after if hedge_after is not None else config.get('llm_resilience.hedge_after_seconds', 0)
+        self.deadlines = deadlines or config.get('llm_resilience.deadlines', {"default": 90})
+
+        # AsyncOpenAI 的连接和信号量都绑定事件循环：服务进程只有一个循环，
+        # 批处理脚本每次 asyncio.run 会新建循环，因此按循环分别创建
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+        self._calls = 0
+        self._errors = 0
+        self._timeouts = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._streams = 0
+        self._cancelled = 0
+        self._retries = 0
+        self._hedged_requests = 0
+        self._hedge_wins = 0
+        self._failures = Counter()
+
+    def _get_client(self):
+        """当前事件循环的客户端和信号量"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.get(loop)
+            if entry is None:
+                http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    ),
+                    timeout=self.timeout
+                )
+                # 重试由网关按截止时间统一控制，关闭客户端自带的重试
+                client = openai.AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=http_client,
+                    max_retries=0
+                )
+                entry = (client, asyncio.Semaphore(self.max_concurrency))
+                self._clients[loop] = entry
+            return entry
+
+    def deadline_for(self, operation):
+        """操作的截止时间（秒），包括排队、重试等待和所有尝试"""
+        return self.deadlines.get(operation, self.deadlines.get("default", 90))
+
+    async def chat_completion(self, messages, temperature=0.7, max_tokens=2000, timeout=None,
+                              use_cache=True, operation="default"):
+        """
+        调用聊天补全接口，返回回复文本；use_cache=False 时跳过缓存重新生成
+        失败时抛出 LLMCallError，reason 为 circuit_open / deadline / timeout / connection /
+        rate_limited / server_error / client_error / error
+        """
+        cache_key = self.cache.make_key(self.model, temperature, max_tokens, messages)
+        if use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                llm_calls.inc(operation, "cache_hit")
+                return cached
+        else:
+            self.cache.record_bypass()
+
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            content = await self._request(messages, temperature, max_tokens, timeout, operation)
+        except LLMCallError as e:
+            outcome = e.reason
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            llm_call_seconds.observe(time.perf_counter() - start, operation, outcome)
+            llm_calls.inc(operation, outcome)
+        self.cache.put(cache_key, self.model, content)
+        return content
+
+    async def _request(self, messages, temperature, max_tokens, timeout, operation):
+        """在截止时间内发出请求，可重试的错误按退避策略重试"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_for(operation)
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            attempt += 1
+            remaining = deadline - loop.time()
+            settled = False
+            try:
+                content = await asyncio.wait_for(
+                    self._hedged(messages, temperature, max_tokens, min(timeout or self.timeout, remaining),
+                                 operation),
+                    timeout=remaining
+                )
+                self.breaker.record_success()
+                settled = True
+                return content
+            except Exception as e:
+                reason = classify_error(e)
+                if reason == "timeout" and loop.time() >= deadline - 0.01:
+                    reason = "deadline"
+                self._failures[reason] += 1
+                if reason in BREAKER_REASONS:
+                    self.breaker.record_failure()
+                else:
+                    # 服务有响应（如请求参数错误），不计入熔断
+                    self.breaker.record_success()
+                settled = True
+
+                if not self.retry_policy.should_retry(reason, attempt):
+                    raise LLMCallError(reason, f"{operation} 调用失败: {e}") from e
+                delay = self.retry_policy.delay(attempt)
+                if loop.time() + delay >= deadline:
+                    self._failures["deadline"] += 1
+                    raise LLMCallError("deadline", f"{operation} 超过截止时间: {e}") from e
+                self._retries += 1
+                print(f"{operation} 调用失败（{reason}），{delay:.2f} 秒后重试（第 {attempt} 次失败）")
+                await asyncio.sleep(delay)
+            finally:
+                if not settled:
+                    self.breaker.abandon()
+
+    async def _hedged(self, messages, temperature, max_tokens, timeout, operation):
+        """首个请求超过 hedge_after 秒未返回时再发一个相同请求，先成功的结果生效，另一个被取消"""
+        if not self.hedge_after or self.breaker.state != CLOSED:
+            return await self._attempt(messages, temperature, max_tokens, timeout, operation)
+
+        tasks = [asyncio.ensure_future(self._attempt(messages, temperature, max_tokens, timeout, operation))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done:
+                self._hedged_requests += 1
+                tasks.append(asyncio.ensure_future(self._attempt(messages, temperature, max_tokens, timeout, operation)))
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self._hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _attempt(self, messages, temperature, max_tokens, timeout, operation):
+        """经过并发限制向模型发出一次请求，记录token用量"""
+        client, semaphore = self._get_client()
+        async with semaphore:
+            self._calls += 1
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            try:
+                response = await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=timeout
+                )
+                if response.usage:
+                    llm_tokens.inc(operation, "prompt", amount=response.usage.prompt_tokens)
+                    llm_tokens.inc(operation, "completion", amount=response.usage.completion_tokens)
+                return response.choices[0].message.content
+            except openai.APITimeoutError:
+                self._timeouts += 1
+                self._errors += 1
+                raise
+            except Exception:
+                self._errors += 1
+                raise
+            finally:
+                self._in_flight -= 1
+
+    async def stream_chat_completion(self, messages, temperature=0.7, max_tokens=2000, timeout=None,
+                                     use_cache=True, operation="default"):
+        """
+        流式调用聊天补全接口，逐段返回回复文本
+        调用方停止迭代（如客户端断开导致任务被取消）时关闭上游连接，释放并发名额；
+        完整的回复写入缓存，缓存命中时一次返回全部文本。
+        已输出的片段无法撤回，流式调用不重试，但同样受熔断器和截止时间限制
+        """
+        cache_key = self.cache.make_key(self.model, temperature, max_tokens, messages)
+        if use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                llm_calls.inc(operation, "cache_hit")
+                yield cached
+                return
+        else:
+            self.cache.record_bypass()
+
+        try:
+            self.breaker.before_call()
+        except LLMCallError:
+            llm_calls.inc(operation, "circuit_open")
+            raise
+        client, semaphore = self._get_client()
+        start = time.perf_counter()
+        outcome = "ok"
+        async with semaphore:
+            self._calls += 1
+            self._streams += 1
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            stream = None
+            completed = False
+            parts = []
+            try:
+                stream = await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=min(timeout or self.timeout, self.deadline_for(operation)),
+                    stream=True
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+                completed = True
+                self.breaker.record_success()
+            except (asyncio.CancelledError, GeneratorExit):
+                self._cancelled += 1
+                outcome = "cancelled"
+                self.breaker.abandon()
+                raise
+            except Exception as e:
+                if isinstance(e, openai.APITimeoutError):
+                    self._timeouts += 1
+                self._errors += 1
+                reason = outcome = classify_error(e)
+                self._failures[reason] += 1
+                if reason in BREAKER_REASONS:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                raise LLMCallError(reason, f"{operation} 流式调用失败: {e}") from e
+            finally:
+                self._in_flight -= 1
+                llm_call_seconds.observe(time.perf_counter() - start, operation, outcome)
+                llm_calls.inc(operation, outcome)
+                if not completed and stream is not None:
+                    await stream.close()
+
+        self.cache.put(cache_key, self.model, "".join(parts))
+
+    async def close(self):
+        """关闭当前事件循环的客户端连接"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.pop(loop, None)
+        if entry:
+            await entry[0].close()
+
+    def stats(self):
+        """调用统计"""
+        return {
+            "model": self.model,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "calls": self._calls,
+            "errors": self._errors,
+            "timeouts": self._timeouts,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "streams": self._streams,
+            "cancelled_streams": self._cancelled,
+            "resilience": {
+                "breaker": self.breaker.stats(),
+                "retries": self._retries,
+                "hedged_requests": self._hedged_requests,
+                "hedge_wins": self._hedge_wins,
+                "failures": dict(self._failures)
+            }
+        }
+
+
+# 创建全局LLM网关实例
+llm_gateway = LLMGateway()
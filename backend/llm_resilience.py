@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+大模型调用的容错策略 - 熔断器、带抖动的指数退避重试和错误分类
+连续失败达到阈值后熔断器打开，之后的调用立即失败，不再等待超时；
+冷却时间过后放行一个探测请求，成功则恢复。可重试的错误（超时、连接失败、限流、5xx）
+按指数退避加随机抖动重试，重试等待不会超过调用的截止时间
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import openai
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 可以重试的失败原因；这些失败和超过截止时间计入熔断器，请求本身的错误（4xx）不计入
+RETRYABLE_REASONS = {"timeout", "connection", "rate_limited", "server_error"}
+BREAKER_REASONS = RETRYABLE_REASONS | {"deadline"}
+
+
+class LLMCallError(Exception):
+    """大模型调用失败，reason 说明失败原因，调用方据此返回带原因的降级结果"""
+
+    def __init__(self, reason, message=""):
+        super().__init__(message or reason)
+        self.reason = reason
+
+
+def classify_error(error):
+    """把异常归类为失败原因"""
+    if isinstance(error, LLMCallError):
+        return error.reason
+    if isinstance(error, (openai.APITimeoutError, asyncio.TimeoutError)):
+        return "timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection"
+    if isinstance(error, openai.RateLimitError):
+        return "rate_limited"
+    if isinstance(error, openai.InternalServerError):
+        return "server_error"
+    if isinstance(error, openai.APIStatusError):
+        return "server_error" if error.status_code >= 500 else "client_error"
+    return "error"
+
+
+class CircuitBreaker:
+    """熔断器：closed 正常放行，open 立即失败，half_open 只放行一个探测请求"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+        self._opened_count = 0
+        self._rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """调用前检查；熔断中抛出 LLMCallError('circuit_open')"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self._rejected += 1
+        raise LLMCallError("circuit_open", "大模型服务熔断中，请稍后再试")
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def abandon(self):
+        """调用被取消、既未成功也未失败时释放探测名额"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            state = self._current_state()
+            self._failures += 1
+            self._probe_in_flight = False
+            if state == HALF_OPEN or (state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._opened_count += 1
+                print(f"大模型调用连续失败 {self._failures} 次，熔断 {self.reset_timeout} 秒")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "opened": self._opened_count,
+                "rejected": self._rejected
+            }
+
+
+class RetryPolicy:
+    """指数退避重试：第 n 次重试前等待 [0, min(max_delay, base_delay * 2^(n-1))] 内的随机时间"""
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def should_retry(self, reason, attempt):
+        return reason in RETRYABLE_REASONS and attempt < self.max_attempts
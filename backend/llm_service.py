@@ -3,20 +3,19 @@
 LLM服务 - 集成百度文心大模型
 """
 
-import openai
+import asyncio
 import json
-import PyPDF2
 from pathlib import Path
 import re
 from config import config
+from llm_gateway import llm_gateway
+from llm_resilience import classify_error
+from prompt_context import estimate_tokens
+from text_extractor import text_extractor
 
 class ErnieLLMService:
     def __init__(self):
-        # 从配置文件加载API配置
-        self.client = openai.OpenAI(
-            api_key=config.get('llm.api_key'),
-            base_url=config.get('llm.base_url')
-        )
+        # 从配置文件加载模型参数，请求统一经过异步的 llm_gateway
         self.model = config.get('llm.model', 'ernie-4.5-turbo-32k')
         self.temperature = config.get('llm.temperature', 0.7)
         self.max_tokens = config.get('llm.max_tokens', 2000)
@@ -31,40 +30,34 @@ class ErnieLLMService:
             "Value": "价值观，也包括个人价值观及对企业文化的认同度"
         }
 
-    def chat(self, prompt):
+    async def chat(self, prompt, use_cache=True, operation="chat"):
         """
         通用聊天方法，用于简单的文本生成
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await llm_gateway.chat_completion(
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self.temperature,
-                max_tokens=self.max_tokens
+                max_tokens=self.max_tokens,
+                use_cache=use_cache,
+                operation=operation
             )
             
-            return response.choices[0].message.content
-            
         except Exception as e:
             print(f"LLM调用失败: {e}")
             return ""
 
     def extract_text_from_pdf(self, pdf_path):
-        """从PDF简历中提取文本"""
+        """从PDF简历中提取文本（PyPDF2，结果按文件内容缓存）"""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text.strip()
+            return text_extractor.extract_pdf(pdf_path, engine="pypdf2")
         except Exception as e:
             print(f"PDF文本提取失败: {e}")
             return ""
 
-    def generate_interview_questions(self, candidate_info, resume_text, job_description):
+    async def generate_interview_questions(self, candidate_info, resume_text, job_description, use_cache=True):
         """
         基于候选人信息、简历内容和职位描述生成面试问题
         """
@@ -115,17 +108,17 @@ class ErnieLLMService:
 """
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = await llm_gateway.chat_completion(
                 messages=[
                     {"role": "system", "content": "你是一位经验丰富的HR面试专家，擅长根据候选人背景设计深度面试问题。"},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=2000
+                max_tokens=2000,
+                use_cache=use_cache,
+                operation="generate_questions"
             )
-            
-            content = response.choices[0].message.content
+
             
             # 尝试解析JSON响应
             try:
@@ -142,7 +135,7 @@ class ErnieLLMService:
                 
         except Exception as e:
             print(f"LLM调用失败: {e}")
-            return self._generate_fallback_questions(candidate_info)
+            return {**self._generate_fallback_questions(candidate_info), "fallback_reason": classify_error(e)}
 
     def _parse_text_response(self, content):
         """解析文本响应为结构化数据"""
@@ -194,7 +187,7 @@ class ErnieLLMService:
             "interview_strategy": "基于候选人背景进行深度交流，重点关注专业能力和文化匹配度。"
         }
 
-    def regenerate_questions_with_feedback(self, candidate_info, resume_text, job_description, feedback):
+    async def regenerate_questions_with_feedback(self, candidate_info, resume_text, job_description, feedback, use_cache=True):
         """根据管理员反馈重新生成面试问题"""
         
         prompt = f"""
@@ -247,17 +240,17 @@ class ErnieLLMService:
 """
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = await llm_gateway.chat_completion(
                 messages=[
                     {"role": "system", "content": "你是一位经验丰富的HR面试专家，擅长根据候选人背景和反馈意见设计深度面试问题。"},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=2000
+                max_tokens=2000,
+                use_cache=use_cache,
+                operation="regenerate_questions"
             )
-            
-            content = response.choices[0].message.content
+
             
             # 尝试解析JSON响应
             try:
@@ -274,7 +267,7 @@ class ErnieLLMService:
                 
         except Exception as e:
             print(f"LLM调用失败: {e}")
-            return self._generate_fallback_questions(candidate_info)
+            return {**self._generate_fallback_questions(candidate_info), "fallback_reason": classify_error(e)}
 
     def _generate_fallback_questions(self, candidate_info):
         """生成备用问题"""
@@ -348,7 +341,7 @@ class ErnieLLMService:
             "interview_strategy": "通过多维度问题全面了解候选人的专业能力、个人特质和发展潜力。"
         }
 
-    def evaluate_answer(self, question, answer, dimension):
+    async def evaluate_answer(self, question, answer, dimension, use_cache=True):
         """
         评估候选人回答并给出分数
         """
@@ -381,17 +374,17 @@ class ErnieLLMService:
 """
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = await llm_gateway.chat_completion(
                 messages=[
                     {"role": "system", "content": "你是一位专业的HR评估专家，能够客观公正地评估候选人的面试表现。"},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
-                max_tokens=500
+                max_tokens=500,
+                use_cache=use_cache,
+                operation="evaluate_answer"
             )
-            
-            content = response.choices[0].message.content
+
             
             # 尝试解析JSON响应
             try:
@@ -407,7 +400,8 @@ class ErnieLLMService:
                 "score": 75,
                 "feedback": "回答基本符合要求，表达清晰。",
                 "strengths": ["表达清晰"],
-                "improvements": ["可以更加具体"]
+                "improvements": ["可以更加具体"],
+                "fallback_reason": "unparseable"
             }
                 
         except Exception as e:
@@ -416,8 +410,133 @@ class ErnieLLMService:
                 "score": 70,
                 "feedback": "系统评估异常，建议人工复核。",
                 "strengths": [],
-                "improvements": []
+                "improvements": [],
+                "fallback_reason": classify_error(e)
+            }
+
+    async def evaluate_answers_batch(self, answers, use_cache=True, token_budget=None):
+        """
+        批量评估一场面试的所有回答
+        answers: [{"question": ..., "answer": ..., "dimension": ...}]，返回与之一一对应的评估结果；
+        问答按token预算打包成一个或几个请求，解析失败的题目再单独调用 evaluate_answer
+        """
+        token_budget = token_budget or config.get('batch_evaluation.token_budget', 3000)
+        batches = self._pack_answers(answers, token_budget)
+        replies = await asyncio.gather(*(
+            self._evaluate_batch(answers, batch, use_cache) for batch in batches
+        ))
+        
+        results = [None] * len(answers)
+        for reply in replies:
+            for index, evaluation in reply.items():
+                results[index] = evaluation
+        
+        failed = [i for i, evaluation in enumerate(results) if evaluation is None]
+        if failed:
+            print(f"批量评分中有 {len(failed)} 道题未能解析，逐题重新评分")
+            singles = await asyncio.gather(*(
+                self.evaluate_answer(
+                    answers[i].get("question"), answers[i].get("answer"), answers[i].get("dimension"),
+                    use_cache=use_cache
+                )
+                for i in failed
+            ))
+            for i, evaluation in zip(failed, singles):
+                results[i] = {**evaluation, "batched": False}
+        
+        print(f"批量评分完成: {len(answers)} 道题, {len(batches)} 次批量请求, {len(failed)} 道逐题评分")
+        return results
+    
+    def _answer_block(self, index, item):
+        dimension = item.get("dimension")
+        return f"""
+### 编号 {index + 1}
+评估维度：{dimension} - {self.evaluation_dimensions.get(dimension, '')}
+面试问题：{item.get("question")}
+候选人回答：{item.get("answer")}
+"""
+    
+    def _pack_answers(self, answers, token_budget):
+        """按token预算和每批题目数上限把问答分组，返回 [[下标, ...], ...]"""
+        max_questions = config.get('batch_evaluation.max_questions', 10)
+        budget = token_budget - estimate_tokens(self._batch_prompt(""))
+        
+        batches, current, used = [], [], 0
+        for index, item in enumerate(answers):
+            cost = estimate_tokens(self._answer_block(index, item))
+            if current and (used + cost > budget or len(current) >= max_questions):
+                batches.append(current)
+                current, used = [], 0
+            # 单题超出预算时单独成批
+            current.append(index)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _batch_prompt(self, blocks):
+        return f"""
+请作为专业的HR评估专家，对候选人在同一场面试中的以下回答逐题评分。
+
+每道题请从以下几个方面进行评估：
+1. 回答的完整性和逻辑性
+2. 专业知识的深度和准确性
+3. 表达能力和沟通技巧
+4. 与岗位要求的匹配度
+5. 回答的真实性和可信度
+
+{blocks}
+请对每道题给出0-100分的评分和简要的评估理由，并按以下JSON格式返回（id 为题目编号，每道题都要返回）：
+{{
+    "evaluations": [
+        {{
+            "id": 1,
+            "score": 85,
+            "feedback": "评估理由和建议",
+            "strengths": ["优势点1", "优势点2"],
+            "improvements": ["改进建议1", "改进建议2"]
+        }}
+    ]
+}}
+"""
+    
+    async def _evaluate_batch(self, answers, batch, use_cache):
+        """评估一批问答，返回 {下标: 评估结果}；未返回或格式不正确的题目不在结果中"""
+        blocks = "".join(self._answer_block(index, answers[index]) for index in batch)
+        try:
+            content = await llm_gateway.chat_completion(
+                messages=[
+                    {"role": "system", "content": "你是一位专业的HR评估专家，能够客观公正地评估候选人的面试表现。"},
+                    {"role": "user", "content": self._batch_prompt(blocks)}
+                ],
+                temperature=0.3,
+                max_tokens=min(200 * len(batch) + 100, self.max_tokens),
+                use_cache=use_cache,
+                operation="evaluate_answers_batch"
+            )
+            json_match = re.search(r'\{.*\}', content, re.DOTALL)
+            evaluations = json.loads(json_match.group()).get("evaluations", []) if json_match else []
+        except Exception as e:
+            print(f"批量评估回答时出错: {e}")
+            return {}
+        
+        results = {}
+        for evaluation in evaluations if isinstance(evaluations, list) else []:
+            try:
+                index = int(evaluation["id"]) - 1
+                score = float(evaluation["score"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if index not in batch or not 0 <= score <= 100:
+                continue
+            results[index] = {
+                "score": int(score) if score.is_integer() else score,
+                "feedback": str(evaluation.get("feedback", "")),
+                "strengths": evaluation.get("strengths") or [],
+                "improvements": evaluation.get("improvements") or [],
+                "batched": True
             }
+        return results
 
 # 创建全局LLM服务实例
 llm_service = ErnieLLMService()
\ No newline at end of file
@@ -1,21 +1,47 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from fastapi import FastAPI, HTTPException, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
+import os
 import sqlite3
 import json
 import hashlib
-import secrets
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime
 from llm_service import llm_service
+from llm_gateway import llm_gateway
+from llm_resilience import classify_error
+from llm_cache import llm_cache
+from text_extractor import text_extractor
 from ai_chat_service import ai_chat_service
 from email_service import email_service
 from excel_data_loader import excel_loader
 from resume_parser import resume_parser
-
-app = FastAPI(title="AI招聘系统API")
+from candidate_aggregates import (
+    CANDIDATE_SESSIONS_PAGE_SQL,
+    INTERVIEW_QUESTION_IDS_SQL,
+    LATEST_INTERVIEW_QUESTIONS_SQL,
+    LATEST_SESSION_QUESTIONS_SQL,
+    SESSION_ANSWERS_SQL,
+    _json_list
+)
+from candidate_listing import list_candidates
+from db_pool import db_pool
+from migrations import ensure_schema
+from score_buffer import score_buffer
+from job_queue import job_queue, FINISHED_STATUSES, FAILED
+from resume_catalog import resume_catalog
+from resume_files import file_response
+from metrics import metrics, MetricsMiddleware
+from auth import password_hasher, token_service
+from fast_json import FastJSONResponse
+from dashboard_stats import dashboard_stats
+
+# 所有接口默认使用 orjson 序列化（未安装时退回标准库 json）
+app = FastAPI(title="AI招聘系统API", default_response_class=FastJSONResponse)
 
 # 允许跨域
 app.add_middleware(
@@ -24,8 +50,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
+# 按路由记录请求数和耗时（/metrics）
+app.add_middleware(MetricsMiddleware)
+
 # 数据模型
 class Candidate(BaseModel):
     name: str
@@ -77,159 +107,67 @@ class CandidateCreate(BaseModel):
     summary: Optional[str] = ""
     invitation_code: Optional[str] = None
 
-# 初始化数据库
+# 初始化数据库：按版本执行结构迁移，接口中只做增删改查
 def init_db():
-    conn = sqlite3.connect('recruitment.db')
-    cursor = conn.cursor()
-    
-    # 候选人表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS candidates (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            phone TEXT,
-            education TEXT,
-            experience TEXT,
-            skills TEXT,
-            current_position TEXT,
-            expected_salary TEXT,
-            summary TEXT,
-            resume_file_path TEXT,
-            invitation_code TEXT,
-            status TEXT DEFAULT '待面试',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # 检查并添加缺失的列
-    cursor.execute('PRAGMA table_info(candidates)')
-    columns = [column[1] for column in cursor.fetchall()]
-    
-    # 添加新字段
-    new_columns = {
-        'phone': 'TEXT',
-        'education': 'TEXT', 
-        'experience': 'TEXT',
-        'skills': 'TEXT',
-        'current_position': 'TEXT',
-        'expected_salary': 'TEXT',
-        'summary': 'TEXT',
-        'resume_file_path': 'TEXT',
-        'status': 'TEXT DEFAULT "待面试"',
-        'updated_at': 'TIMESTAMP'
-    }
-    
-    for col_name, col_type in new_columns.items():
-        if col_name not in columns:
-            try:
-                cursor.execute(f'ALTER TABLE candidates ADD COLUMN {col_name} {col_type}')
-                print(f"Added {col_name} column to candidates table")
-            except Exception as e:
-                print(f"Column {col_name} might already exist: {e}")
-    
-    # 更新updated_at字段
-    cursor.execute('UPDATE candidates SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL')
-    
-    # 候选人状态变更日志表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS candidate_status_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            candidate_id INTEGER,
-            old_status TEXT,
-            new_status TEXT,
-            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (candidate_id) REFERENCES candidates (id)
-        )
-    ''')
-    
-    # 职位表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS jobs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            department TEXT NOT NULL,
-            salary_min INTEGER,
-            salary_max INTEGER,
-            description TEXT,
-            requirements TEXT,
-            status TEXT DEFAULT '招聘中',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # 面试会话表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS interview_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            candidate_id INTEGER,
-            session_id TEXT UNIQUE,
-            status TEXT DEFAULT '进行中',
-            score REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (candidate_id) REFERENCES candidates (id)
-        )
-    ''')
-    
-    # 面试问答表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS interview_qa (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT,
-            question TEXT,
-            answer TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (session_id) REFERENCES interview_sessions (session_id)
-        )
-    ''')
-    
-    # 用户表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            user_type TEXT DEFAULT 'candidate',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # AI反馈表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS candidate_ai_feedback (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            candidate_id INTEGER NOT NULL,
-            strengths TEXT,
-            improvements TEXT,
-            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (candidate_id) REFERENCES candidates (id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    version = ensure_schema()
+    print(f"数据库结构版本: v{version}")
 
 # API路由
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    score_buffer.start()
+    job_queue.start()
+    resume_catalog.start()
+    dashboard_stats.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    job_queue.stop(timeout=30)
+    resume_catalog.stop()
+    dashboard_stats.stop()
+    score_buffer.stop()
+    await llm_gateway.close()
+    password_hasher.shutdown()
+    db_pool.close_all()
 
 @app.get("/")
 async def root():
     return {"message": "AI招聘系统API"}
 
+# 各组件的统计，/api/system/cache-stats 和 /metrics 共用
+COMPONENT_STATS = {
+    "excel": excel_loader.cache_stats,
+    "db_pool": db_pool.stats,
+    "score_buffer": score_buffer.stats,
+    "llm_gateway": llm_gateway.stats,
+    "llm_cache": llm_cache.stats,
+    "resume_text": text_extractor.stats,
+    "job_queue": job_queue.stats,
+    "stats_snapshot": ai_chat_service.snapshot.stats,
+    "resume_catalog": resume_catalog.stats,
+    "password_hasher": password_hasher.stats,
+    "token_cache": token_service.stats,
+    "dashboard_stats": dashboard_stats.stats
+}
+for component, collect in COMPONENT_STATS.items():
+    metrics.register_collector(component, collect)
+
+@app.get("/api/system/cache-stats")
+async def get_cache_stats():
+    """Excel解析缓存、数据库连接池、评分写缓冲、LLM网关、各类缓存和后台任务队列和简历目录状态"""
+    return {component: collect() for component, collect in COMPONENT_STATS.items()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus 文本格式的运行指标：接口耗时、SQLite语句耗时、大模型调用耗时和token用量、Excel解析耗时、组件统计"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # 用户认证API
 @app.post("/api/auth/register")
 async def register_user(user: UserRegister):
-    """用户注册"""
-    import hashlib
-    import secrets
-    
-    conn = sqlite3.connect('recruitment.db')
+    """用户注册（密码哈希在线程池中计算）"""
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -239,15 +177,13 @@ async def register_user(user: UserRegister):
             raise HTTPException(status_code=400, detail="邮箱已被注册")
         
         # 生成密码哈希
-        salt = secrets.token_hex(16)
-        password_hash = hashlib.pbkdf2_hmac('sha256', user.password.encode(), salt.encode(), 100000)
-        password_hash_hex = salt + password_hash.hex()
+        password_hash = await password_hasher.hash(user.password)
         
         # 插入用户
         cursor.execute('''
             INSERT INTO users (name, email, password_hash, user_type)
             VALUES (?, ?, ?, ?)
-        ''', (user.name, user.email, password_hash_hex, user.user_type))
+        ''', (user.name, user.email, password_hash, user.user_type))
         
         conn.commit()
         user_id = cursor.lastrowid
@@ -273,13 +209,8 @@ async def register_user(user: UserRegister):
 
 @app.post("/api/auth/login")
 async def login_user(user: UserLogin):
-    """用户登录"""
-    import hashlib
-    import secrets
-    import jwt
-    from datetime import datetime, timedelta
-    
-    conn = sqlite3.connect('recruitment.db')
+    """用户登录（密码验证在线程池中计算，使用恒定时间比较）"""
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -305,24 +236,19 @@ async def login_user(user: UserLogin):
                 raise HTTPException(status_code=401, detail="该账号不是候选人账号")
         
         # 验证密码
-        salt = stored_hash[:32]  # 前32个字符是salt
-        stored_password_hash = stored_hash[32:]  # 后面是密码哈希
-        
-        password_hash = hashlib.pbkdf2_hmac('sha256', user.password.encode(), salt.encode(), 100000)
-        
-        if password_hash.hex() != stored_password_hash:
+        matched, needs_rehash = await password_hasher.verify(user.password, stored_hash)
+        if not matched:
             raise HTTPException(status_code=401, detail="邮箱或密码错误")
         
-        # 生成JWT token
-        secret_key = "your-secret-key-here"  # 在生产环境中应该使用环境变量
-        payload = {
-            "user_id": user_id,
-            "email": email,
-            "user_type": db_user_type,
-            "exp": datetime.utcnow() + timedelta(days=7)
-        }
+        # 旧格式或迭代次数已调整的哈希按当前参数重新计算
+        if needs_rehash:
+            new_hash = await password_hasher.hash(user.password)
+            cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (new_hash, user_id))
+            conn.commit()
+            password_hasher.record_rehash()
         
-        token = jwt.encode(payload, secret_key, algorithm="HS256")
+        # 生成JWT token
+        token = token_service.issue(user_id, email, db_user_type)
         
         return {
             "success": True,
@@ -344,10 +270,25 @@ async def login_user(user: UserLogin):
     finally:
         conn.close()
 
+@app.get("/api/auth/verify")
+async def verify_token(request: Request):
+    """验证 Authorization: Bearer 令牌，返回其中的用户信息（验证结果缓存到令牌过期）"""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="缺少登录令牌")
+    try:
+        payload = token_service.verify(token.strip())
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="登录已过期")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="登录令牌无效")
+    return {"success": True, "user": payload}
+
 @app.post("/api/candidates")
 async def create_candidate(candidate: Candidate):
     """创建候选人"""
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -364,167 +305,36 @@ async def create_candidate(candidate: Candidate):
         conn.close()
 
 @app.get("/api/candidates")
-async def get_candidates():
-    """获取候选人列表 - 合并Excel数据和数据库面试数据"""
+async def get_candidates(position: Optional[str] = None, status: Optional[str] = None,
+                         min_score: Optional[float] = None, max_score: Optional[float] = None,
+                         sort: Optional[str] = None, limit: Optional[int] = None, offset: int = 0,
+                         fields: Optional[str] = None):
+    """
+    获取候选人列表 - 合并Excel数据和数据库面试数据
+    可按职位（包含）、状态、分数范围筛选，sort 为排序字段（前加 - 降序），limit/offset 分页，
+    fields 为逗号分隔的返回字段（如 id,name,score，省略面试问题等大字段）；筛选后的总数在 X-Total-Count 响应头中
+    """
+    if limit is not None:
+        limit = max(0, min(limit, 500))
     try:
         # 从Excel加载真实候选人数据
         candidates = excel_loader.load_candidates()
         
-        # 连接数据库
-        conn = sqlite3.connect('recruitment.db')
-        cursor = conn.cursor()
-        
-        for candidate in candidates:
-            candidate_name = candidate.get('name')
-            candidate_email = candidate.get('email')
-            
-            # 1. 查询数据库中的面试评分（优先使用数据库数据）
-            # 需要查询两个表：interview_session_questions 和 interview_sessions
-            
-            # 先查询 interview_session_questions 表（有预生成问题的会话）
-            cursor.execute('''
-                SELECT 
-                    isq.session_id,
-                    COUNT(ia.id) as answer_count,
-                    AVG(ia.score) as avg_score,
-                    MAX(ia.created_at) as last_answer_time
-                FROM interview_session_questions isq
-                LEFT JOIN interview_answers ia ON isq.session_id = ia.session_id
-                WHERE isq.candidate_name = ?
-                GROUP BY isq.session_id
-                ORDER BY last_answer_time DESC
-                LIMIT 1
-            ''', (candidate_name,))
-            
-            db_interview_1 = cursor.fetchone()
-            
-            # 再查询 interview_sessions 表（使用预生成问题的会话）
-            cursor.execute('''
-                SELECT 
-                    isess.session_id,
-                    COUNT(ia.id) as answer_count,
-                    AVG(ia.score) as avg_score,
-                    MAX(ia.created_at) as last_answer_time
-                FROM interview_sessions isess
-                JOIN candidates c ON isess.candidate_id = c.id
-                LEFT JOIN interview_answers ia ON isess.session_id = ia.session_id
-                WHERE c.name = ?
-                GROUP BY isess.session_id
-                ORDER BY last_answer_time DESC
-                LIMIT 1
-            ''', (candidate_name,))
-            
-            db_interview_2 = cursor.fetchone()
-            
-            # 选择最新的面试记录（有回答的）
-            db_interview = None
-            if db_interview_1 and db_interview_1[1] > 0:  # 有回答
-                if db_interview_2 and db_interview_2[1] > 0:  # 两个都有回答
-                    # 选择最新的
-                    time1 = db_interview_1[3] if db_interview_1[3] else ''
-                    time2 = db_interview_2[3] if db_interview_2[3] else ''
-                    db_interview = db_interview_1 if time1 > time2 else db_interview_2
-                else:
-                    db_interview = db_interview_1
-            elif db_interview_2 and db_interview_2[1] > 0:
-                db_interview = db_interview_2
-            
-            # 如果数据库中有面试会话记录，说明候选人已经面试
-            if db_interview and db_interview[0]:  # 有会话记录
-                session_id, answer_count, avg_score, last_answer_time = db_interview
-                
-                # 只要有面试会话记录，就认为已完成面试
-                if answer_count > 0:  # 有回答记录
-                    candidate['status'] = '已完成'
-                    candidate['score'] = int(avg_score) if avg_score else None
-                    candidate['interview_date'] = last_answer_time.split()[0] if last_answer_time else candidate.get('interview_date')
-                    candidate['db_interview'] = True
-                    candidate['answer_count'] = answer_count
-                    
-                    # 计算各维度的实际分数（从所有会话中统计）
-                    # 需要通过session_id关联到候选人
-                    cursor.execute('''
-                        SELECT ia.dimension, AVG(ia.score) as avg_score
-                        FROM interview_answers ia
-                        WHERE ia.session_id IN (
-                            SELECT session_id FROM interview_session_questions WHERE candidate_name = ?
-                            UNION
-                            SELECT isess.session_id FROM interview_sessions isess
-                            JOIN candidates c ON isess.candidate_id = c.id
-                            WHERE c.name = ?
-                        ) AND ia.score IS NOT NULL
-                        GROUP BY ia.dimension
-                    ''', (candidate_name, candidate_name))
-                    
-                    dimension_scores = cursor.fetchall()
-                    
-                    # 维度映射
-                    dimension_map = {
-                        'Knowledge': 'knowledge_score',
-                        'Skill': 'skill_score',
-                        'Ability': 'ability_score',
-                        'Personality': 'personality_score',
-                        'Motivation': 'motivation_score',
-                        'Value': 'value_score'
-                    }
-                    
-                    # 更新各维度分数
-                    for dimension, avg_score in dimension_scores:
-                        score_key = dimension_map.get(dimension)
-                        if score_key:
-                            candidate[score_key] = round(avg_score, 1) if avg_score else None
-                else:
-                    # 有会话但没有回答，保持原状态
-                    candidate['db_interview'] = False
-                    candidate['answer_count'] = 0
-            else:
-                candidate['db_interview'] = False
-                candidate['answer_count'] = 0
-            
-            # 2. 查询该候选人的面试问题
-            cursor.execute('''
-                SELECT questions_json, strategy, created_at, updated_at
-                FROM interview_questions
-                WHERE candidate_name = ? OR candidate_email = ?
-                ORDER BY updated_at DESC
-                LIMIT 1
-            ''', (candidate_name, candidate_email))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                questions_json, strategy, created_at, updated_at = result
-                candidate['interview_questions'] = json.loads(questions_json) if questions_json else []
-                candidate['interview_strategy'] = strategy
-                candidate['questions_generated_at'] = updated_at or created_at
-                candidate['has_questions'] = True
-            else:
-                candidate['interview_questions'] = []
-                candidate['interview_strategy'] = ''
-                candidate['questions_generated_at'] = None
-                candidate['has_questions'] = False
-        
-        conn.close()
-        
-        # 确保数据可以JSON序列化
-        import numpy as np
-        
-        def clean_for_json(obj):
-            if isinstance(obj, dict):
-                return {k: clean_for_json(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [clean_for_json(item) for item in obj]
-            elif isinstance(obj, (np.integer, np.floating)):
-                return obj.item()
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif obj is None or isinstance(obj, (str, int, float, bool)):
-                return obj
-            else:
-                return str(obj)
+        # 筛选、排序后只为当前页补充面试数据（查询次数与候选人数量无关）
+        with db_pool.connection() as conn:
+            try:
+                candidates, total = list_candidates(
+                    conn.cursor(), candidates, position=position, status=status,
+                    min_score=min_score, max_score=max_score, sort=sort,
+                    limit=limit, offset=offset, fields=fields
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
-        cleaned_candidates = clean_for_json(candidates)
-        return cleaned_candidates
+        # Excel数据在加载时已转换为Python类型，直接序列化，不经过 jsonable_encoder
+        return FastJSONResponse(content=candidates, headers={"X-Total-Count": str(total)})
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"加载候选人数据失败: {e}")
         import traceback
@@ -537,7 +347,7 @@ async def start_interview(candidate: Candidate):
     """开始面试 - 如果有预生成的问题，创建关联会话"""
     import uuid
     
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -566,13 +376,7 @@ async def start_interview(candidate: Candidate):
                 print(f"创建新候选人: {candidate.name}, ID: {candidate_id}")
         
         # 检查是否有预生成的问题
-        cursor.execute('''
-            SELECT questions_json, strategy
-            FROM interview_questions
-            WHERE candidate_name = ? OR candidate_email = ?
-            ORDER BY updated_at DESC
-            LIMIT 1
-        ''', (candidate.name, candidate.email))
+        cursor.execute(LATEST_INTERVIEW_QUESTIONS_SQL, (candidate.name, candidate.email))
         
         questions_result = cursor.fetchone()
         
@@ -580,7 +384,7 @@ async def start_interview(candidate: Candidate):
         
         if questions_result:
             # 有预生成的问题，创建关联会话到 interview_session_questions 表
-            questions_json, strategy = questions_result
+            questions_json, strategy = questions_result[:2]
             
             print(f"找到预生成的问题，创建关联会话: {session_id}")
             
@@ -605,21 +409,10 @@ async def start_interview(candidate: Candidate):
 
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats():
-    """获取仪表板统计数据 - 使用真实Excel数据"""
+    """获取仪表板统计数据 - 读取随面试、评分和状态变更增量维护的统计（候选人工作簿变化时自动重建）"""
     try:
-        # 从Excel加载真实数据
-        candidates = excel_loader.load_candidates()
-        stats = excel_loader.get_dashboard_stats(candidates)
-        
-        # 确保所有数值都是JSON可序列化的
-        import numpy as np
-        for key, value in stats.items():
-            if isinstance(value, (np.integer, np.floating)):
-                stats[key] = value.item()
-            elif isinstance(value, float) and (np.isnan(value) or np.isinf(value)):
-                stats[key] = 0.0
-        
-        return stats
+        # 读取在线程池中执行，统计尚未建立需要重建时也不阻塞事件循环
+        return FastJSONResponse(content=await run_in_threadpool(dashboard_stats.read))
     except Exception as e:
         print(f"加载统计数据失败: {e}")
         import traceback
@@ -632,71 +425,56 @@ async def get_dashboard_stats():
             "average_score": 0.0
         }
 
-@app.get("/api/resume/{folder}/{filename}")
-async def get_resume(folder: str, filename: str):
-    """获取简历文件"""
-    from fastapi.responses import Response
-    import os
+@app.api_route("/api/resume/{folder}/{filename}", methods=["GET", "HEAD"])
+async def get_resume(folder: str, filename: str, request: Request):
+    """获取简历文件（支持 ETag 条件请求和 Range 分段读取）"""
     from urllib.parse import unquote
-    from pathlib import Path
     
-    try:
-        # URL解码
-        folder = unquote(folder)
-        filename = unquote(filename)
-        
-        print(f"请求文件: folder={folder}, filename={filename}")
-        
-        # 获取当前脚本的目录
-        current_dir = Path(__file__).parent
-        print(f"当前目录: {current_dir}")
-        
-        # 构建文件路径 - 尝试多个可能的路径
-        possible_paths = [
-            current_dir.parent / "resouse" / folder / filename,  # ../resouse/
-            current_dir / ".." / "resouse" / folder / filename,  # ../resouse/
-            Path("resouse") / folder / filename,  # ./resouse/
-            Path(".") / "resouse" / folder / filename,  # ./resouse/
-        ]
-        
-        file_path = None
-        for path in possible_paths:
-            abs_path = path.resolve()
-            print(f"检查路径: {abs_path}")
-            if abs_path.exists():
-                file_path = abs_path
-                break
-        
-        if not file_path:
-            print(f"所有路径都不存在:")
-            for path in possible_paths:
-                print(f"  - {path.resolve()}")
-            raise HTTPException(status_code=404, detail=f"简历文件未找到: {filename}")
-        
-        print(f"找到文件: {file_path}")
-        
-        # 读取文件内容
-        with open(file_path, 'rb') as f:
-            file_content = f.read()
-        
-        # 返回文件内容
-        return Response(
-            content=file_content,
-            media_type='application/pdf',
-            headers={
-                "Content-Disposition": "inline",
-                "Cache-Control": "public, max-age=3600",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                "Access-Control-Allow-Headers": "*"
-            }
-        )
-        
-    except Exception as e:
-        print(f"获取简历文件时出错: {e}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"服务器错误: {str(e)}")
+    folder = unquote(folder)
+    filename = unquote(filename)
+    
+    # 只返回简历目录中的文件，文件名中的 ../ 等路径不会被解析
+    resolved = resume_catalog.resolve(folder, filename)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail=f"简历文件未找到: {filename}")
+    
+    file_path, stat_result = resolved
+    return file_response(
+        file_path,
+        stat_result,
+        request.headers,
+        method=request.method,
+        extra_headers={
+            "Content-Disposition": "inline",
+            "Cache-Control": "public, max-age=3600",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+            "Access-Control-Allow-Headers": "*",
+            "Access-Control-Expose-Headers": "Accept-Ranges, Content-Range, Content-Length, ETag"
+        }
+    )
+
+@app.get("/api/resume-catalog")
+async def get_resume_catalog(name: Optional[str] = None, email: Optional[str] = None, position: Optional[str] = None):
+    """查询简历目录：传入姓名或邮箱时返回该候选人的简历（含大小、SHA-256和页数），否则列出所有简历"""
+    # 目录扫描、读取文件计算哈希和解析页数都是阻塞操作，放到线程池执行
+    return await run_in_threadpool(describe_resume_catalog, name, email, position)
+
+def describe_resume_catalog(name=None, email=None, position=None):
+    """简历目录查询（同步）"""
+    if name or email:
+        entry = resume_catalog.find(name=name, email=email, position=position)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="未找到该候选人的简历")
+        return resume_catalog.describe(entry)
+    
+    return {
+        "resumes": [
+            {"folder": entry["folder"], "filename": entry["filename"]}
+            for entry in resume_catalog.entries()
+        ],
+        "folders": resume_catalog.folders()
+    }
 
 # 候选人评分数据模型
 class CandidateEvaluation(BaseModel):
@@ -715,31 +493,10 @@ class CandidateEvaluation(BaseModel):
 @app.post("/api/candidates/{candidate_id}/evaluation")
 async def save_candidate_evaluation(candidate_id: int, evaluation: CandidateEvaluation):
     """保存候选人评分"""
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
-        # 创建评分表（如果不存在）
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS candidate_evaluations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                candidate_id INTEGER,
-                knowledge INTEGER,
-                skill INTEGER,
-                ability INTEGER,
-                personality INTEGER,
-                motivation INTEGER,
-                value INTEGER,
-                total_score REAL,
-                strengths TEXT,
-                improvements TEXT,
-                summary TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (candidate_id) REFERENCES candidates (id)
-            )
-        ''')
-        
         # 检查是否已存在评分记录
         cursor.execute("SELECT id FROM candidate_evaluations WHERE candidate_id = ?", (candidate_id,))
         existing = cursor.fetchone()
@@ -772,6 +529,8 @@ async def save_candidate_evaluation(candidate_id: int, evaluation: CandidateEval
                 evaluation.summary
             ))
         
+        # 仪表板统计与评分在同一事务中更新
+        dashboard_stats.refresh(cursor, candidate_id=candidate_id)
         conn.commit()
         return {"message": "评分保存成功", "candidate_id": candidate_id}
         
@@ -784,7 +543,7 @@ async def save_candidate_evaluation(candidate_id: int, evaluation: CandidateEval
 @app.get("/api/candidates/{candidate_id}/evaluation")
 async def get_candidate_evaluation(candidate_id: int):
     """获取候选人评分"""
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -826,7 +585,7 @@ async def get_candidate_evaluation(candidate_id: int):
 @app.put("/api/candidates/{candidate_id}/status")
 async def update_candidate_status(candidate_id: int, status_update: CandidateStatusUpdate):
     """更新候选人状态"""
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -846,13 +605,7 @@ async def update_candidate_status(candidate_id: int, status_update: CandidateSta
             candidate_name = db_candidate[1]
         else:
             # 候选人不在数据库中，从Excel数据查找并插入
-            candidates = excel_loader.load_candidates()
-            excel_candidate = None
-            
-            for candidate in candidates:
-                if candidate.get('id') == candidate_id:
-                    excel_candidate = candidate
-                    break
+            excel_candidate = excel_loader.get_candidate(candidate_id)
             
             if not excel_candidate:
                 raise HTTPException(status_code=404, detail="候选人未找到")
@@ -872,14 +625,14 @@ async def update_candidate_status(candidate_id: int, status_update: CandidateSta
             candidate_name = excel_candidate['name']
             old_status = excel_candidate.get('status', '已完成')
         
-        conn.commit()
-        
         # 记录状态变更日志
         cursor.execute('''
             INSERT INTO candidate_status_log (candidate_id, old_status, new_status, changed_at)
             VALUES (?, ?, ?, CURRENT_TIMESTAMP)
         ''', (candidate_id, old_status, status_update.status))
         
+        # 状态、变更日志和仪表板统计在同一事务中提交
+        dashboard_stats.refresh(cursor, candidate_id=candidate_id)
         conn.commit()
         
         return {
@@ -929,20 +682,31 @@ class GenerateQuestionsRequest(BaseModel):
     position: str
     position_code: Optional[str] = None
     feedback: Optional[str] = None  # 管理员的修改意见
+    use_cache: bool = True  # False 时跳过大模型响应缓存重新生成
 
 @app.post("/api/candidates/{candidate_id}/generate-questions")
-async def generate_candidate_questions(candidate_id: int, request: GenerateQuestionsRequest):
-    """为指定候选人生成或重新生成面试问题"""
+async def generate_candidate_questions(candidate_id: int, request: GenerateQuestionsRequest, background: bool = False):
+    """为指定候选人生成或重新生成面试问题（background=true 时提交后台任务并立即返回任务ID）"""
+    if background:
+        return submit_background_job("generate_questions", {
+            "candidate_id": candidate_id,
+            "request": request.model_dump()
+        })
     try:
         print(f"为候选人 {request.candidate_name} (ID: {candidate_id}) 生成面试问题")
         
-        # 查找简历文件
-        resume_path = find_resume_path(request.candidate_name)
+        # 查找简历文件（目录扫描和PDF解析是阻塞操作，放到线程池执行）
+        resume_path = await run_in_threadpool(
+            resume_catalog.find_path,
+            name=request.candidate_name,
+            email=request.candidate_email,
+            position=request.position
+        )
         resume_text = ""
         
         if resume_path:
             try:
-                resume_text = llm_service.extract_text_from_pdf(resume_path)
+                resume_text = await run_in_threadpool(llm_service.extract_text_from_pdf, resume_path)
                 print(f"成功读取简历: {resume_path}")
             except Exception as e:
                 print(f"读取简历失败: {e}")
@@ -960,50 +724,34 @@ async def generate_candidate_questions(candidate_id: int, request: GenerateQuest
         # 如果有管理员反馈，添加到提示中
         if request.feedback:
             # 使用LLM根据反馈重新生成问题
-            questions_data = llm_service.regenerate_questions_with_feedback(
-                candidate_data, resume_text, job_description, request.feedback
+            questions_data = await llm_service.regenerate_questions_with_feedback(
+                candidate_data, resume_text, job_description, request.feedback,
+                use_cache=request.use_cache
             )
         else:
             # 正常生成问题
-            questions_data = llm_service.generate_interview_questions(
-                candidate_data, resume_text, job_description
+            questions_data = await llm_service.generate_interview_questions(
+                candidate_data, resume_text, job_description,
+                use_cache=request.use_cache
             )
         
         # 保存到interview_questions表
-        conn = sqlite3.connect('recruitment.db')
+        conn = db_pool.get_connection()
         cursor = conn.cursor()
         
         try:
-            # 创建表（如果不存在）
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS interview_questions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    candidate_name TEXT,
-                    candidate_email TEXT,
-                    position_code TEXT,
-                    questions_json TEXT,
-                    strategy TEXT,
-                    resume_path TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
             # 检查是否已存在
-            cursor.execute('''
-                SELECT id FROM interview_questions 
-                WHERE candidate_name = ? OR candidate_email = ?
-            ''', (request.candidate_name, request.candidate_email))
+            cursor.execute(INTERVIEW_QUESTION_IDS_SQL, (request.candidate_name, request.candidate_email))
             
             existing = cursor.fetchone()
             
             if existing:
                 # 更新现有记录
-                cursor.execute('''
+                cursor.execute(f'''
                     UPDATE interview_questions 
                     SET questions_json = ?, strategy = ?, resume_path = ?, 
                         position_code = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE candidate_name = ? OR candidate_email = ?
+                    WHERE id IN ({INTERVIEW_QUESTION_IDS_SQL})
                 ''', (
                     json.dumps(questions_data["questions"], ensure_ascii=False),
                     questions_data.get("interview_strategy", ""),
@@ -1036,6 +784,7 @@ async def generate_candidate_questions(candidate_id: int, request: GenerateQuest
                 "message": "面试问题生成成功",
                 "questions": questions_data["questions"],
                 "strategy": questions_data.get("interview_strategy", ""),
+                "fallback_reason": questions_data.get("fallback_reason"),
                 "generated_at": datetime.now().isoformat()
             }
             
@@ -1053,8 +802,7 @@ async def get_candidate_questions(candidate_id: int):
     """获取候选人的面试问题"""
     try:
         # 从Excel数据获取候选人信息
-        candidates = excel_loader.load_candidates()
-        candidate_data = next((c for c in candidates if c.get('id') == candidate_id), None)
+        candidate_data = excel_loader.get_candidate(candidate_id)
         
         if not candidate_data:
             raise HTTPException(status_code=404, detail="候选人未找到")
@@ -1063,16 +811,10 @@ async def get_candidate_questions(candidate_id: int):
         candidate_email = candidate_data.get('email')
         
         # 查询面试问题
-        conn = sqlite3.connect('recruitment.db')
+        conn = db_pool.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT questions_json, strategy, created_at, updated_at, position_code
-            FROM interview_questions
-            WHERE candidate_name = ? OR candidate_email = ?
-            ORDER BY updated_at DESC
-            LIMIT 1
-        ''', (candidate_name, candidate_email))
+        cursor.execute(LATEST_INTERVIEW_QUESTIONS_SQL, (candidate_name, candidate_email))
         
         result = cursor.fetchone()
         conn.close()
@@ -1543,43 +1285,6 @@ def generate_default_questions():
         "interview_strategy": "通过多维度问题全面了解候选人的专业能力、个人特质和发展潜力。"
     }
 
-def find_resume_path(candidate_name):
-    """根据候选人姓名查找简历文件路径"""
-    from pathlib import Path
-    import os
-    
-    # 获取当前脚本的目录
-    current_dir = Path(__file__).parent
-    
-    # 简历文件夹映射
-    resume_folders = [
-        "Python工程师服务器端开发",
-        "C端产品经理-AIGC领域", 
-        "金融海外投资新媒体内容文案编辑运营"
-    ]
-    
-    # 尝试多个可能的路径
-    possible_base_paths = [
-        current_dir.parent / "resouse",  # ../resouse/
-        current_dir / ".." / "resouse",  # ../resouse/
-        Path("resouse"),  # ./resouse/
-        Path(".") / "resouse"  # ./resouse/
-    ]
-    
-    for base_path in possible_base_paths:
-        for folder in resume_folders:
-            folder_path = base_path / folder
-            if folder_path.exists():
-                print(f"检查文件夹: {folder_path}")
-                for pdf_file in folder_path.glob("*.pdf"):
-                    print(f"检查文件: {pdf_file.stem} vs {candidate_name}")
-                    if candidate_name in pdf_file.stem:
-                        print(f"找到匹配文件: {pdf_file}")
-                        return str(pdf_file)
-    
-    print(f"未找到候选人 {candidate_name} 的简历文件")
-    return None
-
 def get_job_description(position_code):
     """获取职位描述"""
     # 这里可以从数据库或配置文件获取职位描述
@@ -1607,23 +1312,10 @@ def save_interview_questions(candidate, questions_data):
     """保存面试问题到数据库"""
     import uuid
     
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
-        # 创建面试会话问题表（用于存储具体面试会话的问题）
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS interview_session_questions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT UNIQUE,
-                candidate_name TEXT,
-                candidate_email TEXT,
-                questions_json TEXT,
-                strategy TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
         session_id = str(uuid.uuid4())
         
         cursor.execute('''
@@ -1646,7 +1338,7 @@ def save_interview_questions(candidate, questions_data):
 @app.get("/api/interview/{session_id}/questions")
 async def get_interview_questions(session_id: str):
     """获取面试问题"""
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -1686,28 +1378,13 @@ async def submit_answer(session_id: str, answer_data: dict):
         candidate_name = get_candidate_name_by_session(session_id)
         
         # 使用LLM评估回答
-        evaluation = llm_service.evaluate_answer(question_text, answer_text, dimension)
+        evaluation = await llm_service.evaluate_answer(question_text, answer_text, dimension)
         
         # 保存回答和评分到数据库
-        conn = sqlite3.connect('recruitment.db')
+        conn = db_pool.get_connection()
         cursor = conn.cursor()
         
         try:
-            # 创建回答表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS interview_answers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT,
-                    question_id INTEGER,
-                    question_text TEXT,
-                    answer_text TEXT,
-                    dimension TEXT,
-                    score INTEGER,
-                    feedback TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
             cursor.execute('''
                 INSERT INTO interview_answers 
                 (session_id, question_id, question_text, answer_text, dimension, score, feedback)
@@ -1717,6 +1394,9 @@ async def submit_answer(session_id: str, answer_data: dict):
                 dimension, evaluation["score"], evaluation["feedback"]
             ))
             
+            # 仪表板统计与回答在同一事务中更新
+            if candidate_name:
+                dashboard_stats.refresh(cursor, candidate_name=candidate_name)
             conn.commit()
             
         finally:
@@ -1739,9 +1419,62 @@ async def submit_answer(session_id: str, answer_data: dict):
         print(f"处理面试回答失败: {e}")
         raise HTTPException(status_code=500, detail=f"处理回答失败: {str(e)}")
 
+@app.post("/api/interview/{session_id}/answers")
+async def submit_answers_batch(session_id: str, answers_data: dict):
+    """
+    一次提交整场面试的回答并批量评分
+    问答按token预算打包成一个或几个大模型请求，回答和评分在同一个事务中保存
+    """
+    answers = answers_data.get("answers") or []
+    if not answers:
+        raise HTTPException(status_code=400, detail="回答列表不能为空")
+    # 在调用大模型之前检查必填字段，避免评分完成后因缺少维度等字段整批回滚
+    for index, item in enumerate(answers, 1):
+        missing = [field for field in ("question", "answer", "dimension") if not item.get(field)]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"第{index}个回答缺少字段: {', '.join(missing)}")
+    
+    try:
+        candidate_name = get_candidate_name_by_session(session_id)
+        evaluations = await llm_service.evaluate_answers_batch(
+            answers, use_cache=answers_data.get("use_cache", True)
+        )
+        
+        with db_pool.connection() as conn:
+            conn.executemany('''
+                INSERT INTO interview_answers 
+                (session_id, question_id, question_text, answer_text, dimension, score, feedback)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
+                    session_id, item.get("question_id"), item.get("question"), item.get("answer"),
+                    item.get("dimension"), evaluation["score"], evaluation["feedback"]
+                )
+                for item, evaluation in zip(answers, evaluations)
+            ])
+            # 评分写缓冲与回答在同一事务中提交，按题目顺序同一维度保留最后一题的评分
+            if candidate_name:
+                for item, evaluation in zip(answers, evaluations):
+                    score_buffer.record(candidate_name, item.get("dimension"), evaluation["score"], conn=conn)
+                dashboard_stats.refresh(conn.cursor(), candidate_name=candidate_name)
+            conn.commit()
+        
+        return {
+            "evaluations": [
+                {"question_id": item.get("question_id"), **evaluation}
+                for item, evaluation in zip(answers, evaluations)
+            ],
+            "batched": sum(1 for evaluation in evaluations if evaluation.get("batched")),
+            "message": f"已提交 {len(answers)} 个回答"
+        }
+        
+    except Exception as e:
+        print(f"批量处理面试回答失败: {e}")
+        raise HTTPException(status_code=500, detail=f"批量处理回答失败: {str(e)}")
+
 def get_candidate_name_by_session(session_id):
     """根据会话ID获取候选人姓名"""
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -1775,9 +1508,11 @@ def get_candidate_name_by_session(session_id):
         conn.close()
 
 @app.get("/api/candidates/{candidate_id}/ai-feedback")
-async def generate_candidate_feedback(candidate_id: int, regenerate: bool = False):
-    """使用AI生成候选人的优势亮点和待改进项（带缓存）"""
-    conn = sqlite3.connect('recruitment.db')
+async def generate_candidate_feedback(candidate_id: int, regenerate: bool = False, background: bool = False):
+    """使用AI生成候选人的优势亮点和待改进项（带缓存，background=true 时提交后台任务）"""
+    if background:
+        return submit_background_job("ai_feedback", {"candidate_id": candidate_id, "regenerate": regenerate})
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -1803,8 +1538,7 @@ async def generate_candidate_feedback(candidate_id: int, regenerate: bool = Fals
         
         print(f"生成新的AI反馈，候选人ID: {candidate_id}")
         # 获取候选人信息
-        candidates = excel_loader.load_candidates()
-        candidate_data = next((c for c in candidates if c.get('id') == candidate_id), None)
+        candidate_data = excel_loader.get_candidate(candidate_id)
         
         if not candidate_data:
             raise HTTPException(status_code=404, detail="候选人未找到")
@@ -1814,13 +1548,7 @@ async def generate_candidate_feedback(candidate_id: int, regenerate: bool = Fals
         position = candidate_data.get('position', '未知职位')
         
         # 获取面试记录
-        cursor.execute('''
-            SELECT session_id, questions_json, strategy, created_at
-            FROM interview_session_questions
-            WHERE candidate_name = ? OR candidate_email = ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        ''', (candidate_name, candidate_email))
+        cursor.execute(LATEST_SESSION_QUESTIONS_SQL, (candidate_name, candidate_email))
         
         session = cursor.fetchone()
         
@@ -1894,18 +1622,17 @@ async def generate_candidate_feedback(candidate_id: int, regenerate: bool = Fals
 """
         
         try:
-            response = llm_service.client.chat.completions.create(
-                model=llm_service.model,
+            content = await llm_gateway.chat_completion(
                 messages=[
                     {"role": "system", "content": "你是一位专业的HR评估专家，擅长分析候选人表现并提供建设性反馈。"},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=llm_service.temperature,
-                max_tokens=800
+                max_tokens=800,
+                use_cache=not regenerate,
+                operation="ai_feedback"
             )
             
-            content = response.choices[0].message.content
-            
             # 解析JSON响应
             import re
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
@@ -1937,6 +1664,7 @@ async def generate_candidate_feedback(candidate_id: int, regenerate: bool = Fals
             return {
                 **result,
                 "cached": False,
+                "fallback_reason": classify_error(e),
                 "generated_at": datetime.now().isoformat()
             }
             
@@ -1953,18 +1681,6 @@ async def generate_candidate_feedback(candidate_id: int, regenerate: bool = Fals
 def save_ai_feedback(cursor, candidate_id, feedback):
     """保存AI反馈到数据库"""
     try:
-        # 创建表（如果不存在）
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS candidate_ai_feedback (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                candidate_id INTEGER NOT NULL,
-                strengths TEXT,
-                improvements TEXT,
-                generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (candidate_id) REFERENCES candidates (id)
-            )
-        ''')
-        
         # 插入反馈
         cursor.execute('''
             INSERT INTO candidate_ai_feedback (candidate_id, strengths, improvements)
@@ -2050,9 +1766,12 @@ def generate_basic_feedback(avg_scores, position):
     }
 
 @app.get("/api/candidates/{candidate_id}/interview-records")
-async def get_candidate_interview_records(candidate_id: int):
-    """获取候选人的面试对话记录"""
-    conn = sqlite3.connect('recruitment.db')
+async def get_candidate_interview_records(candidate_id: int, limit: Optional[int] = None, offset: int = 0):
+    """获取候选人的面试对话记录（会话按时间倒序；传入 limit 时分页，最大 100，不传时返回全部会话）"""
+    if limit is not None:
+        limit = max(1, min(limit, 100))
+    offset = max(0, offset)
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -2062,8 +1781,7 @@ async def get_candidate_interview_records(candidate_id: int):
         
         if not candidate:
             # 尝试从Excel数据中查找
-            candidates = excel_loader.load_candidates()
-            candidate_data = next((c for c in candidates if c.get('id') == candidate_id), None)
+            candidate_data = excel_loader.get_candidate(candidate_id)
             if not candidate_data:
                 raise HTTPException(status_code=404, detail="候选人未找到")
             candidate_name = candidate_data.get('name')
@@ -2071,77 +1789,47 @@ async def get_candidate_interview_records(candidate_id: int):
         else:
             candidate_name, candidate_email = candidate
         
-        # 查找该候选人的面试会话
-        # 1. 从interview_session_questions表查询（有预生成问题的会话）
-        # 优先按姓名匹配
-        cursor.execute('''
-            SELECT session_id, questions_json, strategy, created_at
-            FROM interview_session_questions
-            WHERE candidate_name = ?
-            ORDER BY created_at DESC
-        ''', (candidate_name,))
-        
-        sessions_with_questions = cursor.fetchall()
-        
-        # 2. 从interview_sessions表查询（使用预生成问题的会话）
-        # 优先按姓名匹配
-        cursor.execute('''
-            SELECT isess.session_id, NULL as questions_json, NULL as strategy, isess.created_at
-            FROM interview_sessions isess
-            JOIN candidates c ON isess.candidate_id = c.id
-            WHERE c.name = ?
-            ORDER BY isess.created_at DESC
-        ''', (candidate_name,))
-        
-        sessions_without_questions = cursor.fetchall()
-        
-        # 合并两种会话，去重
-        all_sessions = {}
-        for session in sessions_with_questions:
-            all_sessions[session[0]] = session
-        for session in sessions_without_questions:
-            if session[0] not in all_sessions:
-                all_sessions[session[0]] = session
-        
-        sessions = list(all_sessions.values())
-        sessions.sort(key=lambda x: x[3], reverse=True)  # 按创建时间排序
+        # 查找该候选人当前页的面试会话
+        # LIMIT -1 表示不限制数量
+        page_size = -1 if limit is None else limit
+        cursor.execute(CANDIDATE_SESSIONS_PAGE_SQL, (candidate_name, candidate_name, candidate_name, page_size, offset))
+        sessions = cursor.fetchall()
         
         if not sessions:
+            if offset:
+                cursor.execute(CANDIDATE_SESSIONS_PAGE_SQL, (candidate_name, candidate_name, candidate_name, 1, 0))
+                total_sessions = (cursor.fetchone() or (0,) * 5)[4]
+            else:
+                total_sessions = 0
             return {
                 "candidate_id": candidate_id,
                 "candidate_name": candidate_name,
+                "candidate_email": candidate_email,
+                "total_sessions": total_sessions,
+                "offset": offset,
+                "limit": limit,
+                "has_more": False,
                 "sessions": [],
-                "message": "该候选人暂无面试记录"
+                "message": "该候选人暂无面试记录" if not total_sessions else "没有更多面试记录"
             }
+        total_sessions = sessions[0][4]
         
-        # 获取每个会话的问答记录
-        interview_records = []
+        # 一次查询当前页所有会话的回答
+        cursor.execute(SESSION_ANSWERS_SQL, (_json_list(session[0] for session in sessions),))
+        answers_by_session = {}
+        for row in cursor.fetchall():
+            answers_by_session.setdefault(row[0], []).append(row[1:])
         
-        for session in sessions:
-            session_id, questions_json, strategy, created_at = session
-            
-            # 解析问题列表
-            import json
+        interview_records = []
+        for session_id, questions_json, strategy, created_at, _ in sessions:
             questions = json.loads(questions_json) if questions_json else []
+            # 问题ID到问题详情，用于查找追问
+            questions_by_id = {q.get('id'): q for q in questions}
+            answers = answers_by_session.get(session_id, [])
             
-            # 获取该会话的所有回答
-            cursor.execute('''
-                SELECT question_id, question_text, answer_text, dimension, score, feedback, created_at
-                FROM interview_answers
-                WHERE session_id = ?
-                ORDER BY question_id
-            ''', (session_id,))
-            
-            answers = cursor.fetchall()
-            
-            # 组合问题和回答
             qa_pairs = []
-            for answer in answers:
-                q_id, q_text, a_text, dimension, score, feedback, answer_time = answer
-                
-                # 找到对应的问题详情
-                question_detail = next((q for q in questions if q.get('id') == q_id), None)
-                
+            for q_id, q_text, a_text, dimension, score, feedback, answer_time in answers:
+                question_detail = questions_by_id.get(q_id)
                 qa_pairs.append({
                     "question_id": q_id,
                     "question": q_text,
@@ -2166,7 +1854,10 @@ async def get_candidate_interview_records(candidate_id: int):
             "candidate_id": candidate_id,
             "candidate_name": candidate_name,
             "candidate_email": candidate_email,
-            "total_sessions": len(interview_records),
+            "total_sessions": total_sessions,
+            "offset": offset,
+            "limit": limit,
+            "has_more": offset + len(interview_records) < total_sessions,
             "sessions": interview_records
         }
         
@@ -2191,11 +1882,13 @@ async def ai_chat(message_data: dict):
             raise HTTPException(status_code=400, detail="消息内容不能为空")
         
         # 调用AI聊天服务
-        result = ai_chat_service.chat_with_ai(user_message, context)
+        result = await ai_chat_service.chat_with_ai(user_message, context)
         
         return {
             "response": result["response"],
             "timestamp": result["timestamp"],
+            "context_usage": result.get("context_usage"),
+            "fallback_reason": result.get("fallback_reason"),
             "success": True
         }
         
@@ -2203,19 +1896,62 @@ async def ai_chat(message_data: dict):
         print(f"AI聊天失败: {e}")
         raise HTTPException(status_code=500, detail=f"AI聊天失败: {str(e)}")
 
+def sse_event(event, data):
+    """格式化一条 Server-Sent Events 消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(chunks, done_data):
+    """
+    把文本片段转发为SSE流：每段一条 delta 事件，结束时发送 done 事件
+    客户端断开时Starlette取消该任务，迭代中的上游流式请求随之关闭
+    """
+    from fastapi.responses import StreamingResponse
+    
+    async def events():
+        try:
+            async for chunk in chunks:
+                yield sse_event("delta", {"content": chunk})
+            yield sse_event("done", {**done_data, "timestamp": datetime.now().isoformat()})
+        except Exception as e:
+            print(f"流式输出失败: {e}")
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            await chunks.aclose()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/ai-chat/stream")
+async def ai_chat_stream(message_data: dict):
+    """AI数据分析助手对话（SSE流式返回）"""
+    user_message = message_data.get("message", "")
+    if not user_message:
+        raise HTTPException(status_code=400, detail="消息内容不能为空")
+    
+    # done 事件在流结束时发送，其中带上本次请求的上下文token用量
+    done_data = {"success": True}
+    chunks = ai_chat_service.stream_chat(user_message, message_data.get("context", {}), usage=done_data)
+    return sse_response(chunks, done_data)
+
 @app.post("/api/generate-report")
-async def generate_analytics_report(report_data: dict):
-    """生成数据分析报告"""
+async def generate_analytics_report(report_data: dict, background: bool = False):
+    """生成数据分析报告（background=true 时提交后台任务）"""
+    if background:
+        return submit_background_job("generate_report", {"report_data": report_data})
     try:
         report_type = report_data.get("type", "comprehensive")
         
         # 生成报告
-        result = ai_chat_service.generate_analytics_report(report_type)
+        result = await ai_chat_service.generate_analytics_report(report_type)
         
         return {
             "report": result["report"],
             "report_type": result["report_type"],
             "generated_at": result["generated_at"],
+            "fallback_reason": result.get("fallback_reason"),
             "success": True
         }
         
@@ -2223,6 +1959,13 @@ async def generate_analytics_report(report_data: dict):
         print(f"生成报告失败: {e}")
         raise HTTPException(status_code=500, detail=f"生成报告失败: {str(e)}")
 
+@app.post("/api/generate-report/stream")
+async def generate_analytics_report_stream(report_data: dict):
+    """生成数据分析报告（SSE流式返回）"""
+    report_type = report_data.get("type", "comprehensive")
+    chunks = ai_chat_service.stream_analytics_report(report_type)
+    return sse_response(chunks, {"success": True, "report_type": report_type})
+
 @app.post("/api/candidates/{candidate_name}/finalize-scores")
 async def finalize_candidate_scores(candidate_name: str, score_data: dict):
     """完成面试后，最终确定候选人各维度评分"""
@@ -2262,7 +2005,7 @@ async def send_report_email(email_data: EmailReportRequest):
     """发送报告邮件"""
     try:
         # 生成报告
-        report_result = ai_chat_service.generate_analytics_report(email_data.reportType)
+        report_result = await ai_chat_service.generate_analytics_report(email_data.reportType)
         
         if 'error' in report_result:
             raise HTTPException(status_code=500, detail="报告生成失败")
@@ -2416,7 +2159,7 @@ async def get_jobs():
         excel_jobs = excel_loader.load_jobs()
         
         # 从数据库加载新创建的职位
-        conn = sqlite3.connect('recruitment.db')
+        conn = db_pool.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -2459,7 +2202,7 @@ async def get_jobs():
 @app.post("/api/jobs")
 async def create_job(job: JobCreate):
     """创建新职位"""
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -2500,7 +2243,7 @@ async def create_job(job: JobCreate):
 @app.post("/api/candidates")
 async def create_candidate(candidate: CandidateCreate):
     """创建新候选人"""
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -2540,8 +2283,8 @@ async def create_candidate(candidate: CandidateCreate):
         conn.close()
 
 @app.post("/api/candidates/parse-resume")
-async def parse_resume(file: UploadFile = File(...)):
-    """解析上传的简历文件"""
+async def parse_resume(file: UploadFile = File(...), background: bool = False):
+    """解析上传的简历文件（background=true 时保存文件后提交后台任务）"""
     try:
         # 检查文件类型
         allowed_types = ['.pdf', '.docx', '.doc']
@@ -2558,8 +2301,20 @@ async def parse_resume(file: UploadFile = File(...)):
         if len(file_content) > 10 * 1024 * 1024:
             raise HTTPException(status_code=400, detail="文件大小不能超过10MB")
         
+        if background:
+            # 相同内容的简历在解析期间只提交一次
+            file_path = resume_parser.save_uploaded_file(file_content, file.filename)
+            response = submit_background_job(
+                "parse_resume",
+                {"file_path": file_path},
+                dedupe_params={"sha256": hashlib.sha256(file_content).hexdigest()}
+            )
+            if response["deduplicated"]:
+                os.remove(file_path)
+            return response
+        
         # 解析简历
-        result = resume_parser.parse_resume_file(file_content, file.filename)
+        result = await resume_parser.parse_resume_file(file_content, file.filename)
         
         return result
         
@@ -2713,6 +2468,65 @@ async def test_email():
         print(f"测试邮件发送失败: {e}")
         raise HTTPException(status_code=500, detail=f"测试邮件发送失败: {str(e)}")
 
+# 后台任务API
+def submit_background_job(job_type, params, dedupe_params=None):
+    """提交后台任务，相同任务正在排队或执行时返回已有的任务ID"""
+    job, created = job_queue.submit(job_type, params, dedupe_params)
+    return {
+        "success": True,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "deduplicated": not created,
+        "status_url": f"/api/tasks/{job['job_id']}",
+        "result_url": f"/api/tasks/{job['job_id']}/result"
+    }
+
+async def _run_generate_questions_job(params):
+    request = GenerateQuestionsRequest(**params["request"])
+    return await generate_candidate_questions(params["candidate_id"], request)
+
+async def _run_ai_feedback_job(params):
+    return await generate_candidate_feedback(params["candidate_id"], regenerate=params["regenerate"])
+
+async def _run_generate_report_job(params):
+    return await generate_analytics_report(params["report_data"])
+
+async def _run_parse_resume_job(params):
+    return await resume_parser.parse_saved_file(params["file_path"])
+
+job_queue.register("generate_questions", _run_generate_questions_job)
+job_queue.register("ai_feedback", _run_ai_feedback_job)
+job_queue.register("generate_report", _run_generate_report_job)
+job_queue.register("parse_resume", _run_parse_resume_job)
+
+@app.get("/api/tasks")
+async def list_tasks(status: Optional[str] = None, job_type: Optional[str] = None, limit: int = 50):
+    """最近的后台任务"""
+    return {"tasks": job_queue.list_jobs(status=status, job_type=job_type, limit=min(limit, 200))}
+
+@app.get("/api/tasks/{job_id}")
+async def get_task(job_id: str, wait: float = 0):
+    """查询后台任务状态；wait 大于0时长轮询，最多等待 wait 秒（上限60秒）直到任务结束"""
+    if wait > 0:
+        job = await job_queue.wait(job_id, min(wait, 60))
+    else:
+        job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job
+
+@app.get("/api/tasks/{job_id}/result")
+async def get_task_result(job_id: str, wait: float = 0):
+    """获取后台任务结果：未完成时返回202，失败时返回500"""
+    job = await job_queue.wait(job_id, min(wait, 60)) if wait > 0 else job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if job["status"] not in FINISHED_STATUSES:
+        return FastJSONResponse(status_code=202, content={"job_id": job_id, "status": job["status"]})
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=500, detail=job["error"])
+    return job["result"]
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -2,8 +2,8 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-import sqlite3
 import json
+from db_pool import db_pool
 
 app = FastAPI(title="AI招聘系统API")
 
@@ -33,7 +33,7 @@ async def health():
 # 简单的候选人API
 @app.get("/api/candidates")
 async def get_candidates():
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM candidates LIMIT 10")
     candidates = cursor.fetchall()
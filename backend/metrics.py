@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+运行指标 - 以 Prometheus 文本格式输出的计数器和延迟直方图
+记录每个接口的请求数和耗时、每个调用位置的SQLite语句耗时、每类大模型调用的耗时、token用量和失败原因、
+Excel解析耗时；各组件已有的统计（缓存命中率等）在抓取时由采集函数读取。
+记录一次只是一次计时和字典累加，不依赖 prometheus_client
+"""
+
+import bisect
+import threading
+import time
+
+# 默认分桶（秒）
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """按标签值累加的计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """按标签值分别统计的延迟直方图（累计分桶、总数和总和）"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=HTTP_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # {标签值: [各桶计数..., 总数, 总和]}，桶计数不累计，输出时再累加
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 3)
+            row[index] += 1
+            row[-2] += 1
+            row[-1] += seconds
+
+    def time(self, *labels):
+        """with metric.time(...): 记录代码块耗时"""
+        return _Timer(self, labels)
+
+    def count(self, *labels):
+        with self._lock:
+            row = self._values.get(labels)
+            return row[-2] if row else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, list(row)) for labels, row in self._values.items())
+        for labels, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row):
+                cumulative += count
+                le = ("le", _format_value(float(bound)))
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, labels, le), cumulative
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), row[-2]
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), round(row[-1], 6)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """指标注册表：保存计数器和直方图，以及抓取时读取组件统计的采集函数"""
+
+    def __init__(self, prefix="recruitment"):
+        self.prefix = prefix
+        self._metrics = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(f"{self.prefix}_{name}", documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=HTTP_BUCKETS):
+        return self._register(Histogram(f"{self.prefix}_{name}", documentation, labelnames, buckets))
+
+    def register_collector(self, component, collect):
+        """collect() 返回组件的统计字典（如 cache_stats()），其中的数值在抓取时输出为 gauge"""
+        with self._lock:
+            self._collectors[component] = collect
+
+    def _component_samples(self):
+        with self._lock:
+            collectors = list(self._collectors.items())
+        name = f"{self.prefix}_component_stat"
+        for component, collect in collectors:
+            try:
+                stats = collect()
+            except Exception as e:
+                print(f"读取 {component} 统计失败: {e}")
+                continue
+            for key, value in _flatten(stats):
+                yield name, _format_labels(("component", "stat"), (component, key)), value
+
+    def render(self):
+        """Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+        component = f"{self.prefix}_component_stat"
+        lines.append(f"# HELP {component} 各组件 stats() 中的数值（缓存命中率、连接池、队列等）")
+        lines.append(f"# TYPE {component} gauge")
+        for name, labels, value in self._component_samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(stats, prefix=""):
+    """把嵌套的统计字典展开为 (a.b.c, 数值)；布尔值输出为 0/1，字符串忽略"""
+    for key, value in stats.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{path}.")
+        elif isinstance(value, bool):
+            yield path, int(value)
+        elif isinstance(value, (int, float)):
+            yield path, value
+
+
+class MetricsMiddleware:
+    """
+    ASGI中间件：按路由模板（如 /api/candidates/{candidate_id}/ai-feedback）记录请求数和耗时，
+    不按实际路径记录，避免标签数量随ID增长；流式响应记录到最后一段发送完成
+    """
+
+    def __init__(self, app, registry=None):
+        self.app = app
+        registry = registry or metrics
+        self.requests = registry.counter("http_requests_total", "HTTP请求数", ("method", "route", "status"))
+        self.latency = registry.histogram("http_request_duration_seconds", "HTTP请求耗时（秒）", ("method", "route"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            self.latency.observe(time.perf_counter() - start, method, path)
+            self.requests.inc(method, path, str(status))
+
+
+# 创建全局指标注册表
+metrics = MetricsRegistry()
+
+db_query_seconds = metrics.histogram(
+    "db_query_duration_seconds", "SQLite语句执行耗时（秒），按调用位置", ("site",), DB_BUCKETS
+)
+llm_call_seconds = metrics.histogram(
+    "llm_call_duration_seconds", "大模型调用耗时（秒），包括重试", ("operation", "outcome"), LLM_BUCKETS
+)
+llm_calls = metrics.counter("llm_calls_total", "大模型调用次数，outcome 为 ok、cache_hit 或失败原因",
+                            ("operation", "outcome"))
+llm_tokens = metrics.counter("llm_tokens_total", "大模型token用量", ("operation", "kind"))
+excel_load_seconds = metrics.histogram(
+    "excel_load_duration_seconds", "Excel工作簿解析耗时（秒），缓存命中不计", ("kind",), DB_BUCKETS + (10.0,)
+)
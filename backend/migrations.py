@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+数据库结构迁移
+按 schema_version 表记录的版本号依次执行迁移，每个迁移只执行一次；
+接口处理函数只执行增删改查，不再在请求中建表
+"""
+
+from db_pool import db_pool
+
+
+def _create_base_tables(cursor):
+    """基础表结构（已存在的旧数据库会跳过已有的表）"""
+    # 候选人表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS candidates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            phone TEXT,
+            education TEXT,
+            experience TEXT,
+            skills TEXT,
+            current_position TEXT,
+            expected_salary TEXT,
+            summary TEXT,
+            resume_file_path TEXT,
+            invitation_code TEXT,
+            status TEXT DEFAULT '待面试',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 候选人状态变更日志表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS candidate_status_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER,
+            old_status TEXT,
+            new_status TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (candidate_id) REFERENCES candidates (id)
+        )
+    ''')
+
+    # 职位表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            department TEXT NOT NULL,
+            salary_min INTEGER,
+            salary_max INTEGER,
+            description TEXT,
+            requirements TEXT,
+            status TEXT DEFAULT '招聘中',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 面试会话表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interview_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER,
+            session_id TEXT UNIQUE,
+            status TEXT DEFAULT '进行中',
+            score REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (candidate_id) REFERENCES candidates (id)
+        )
+    ''')
+
+    # 面试问答表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interview_qa (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            question TEXT,
+            answer TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (session_id) REFERENCES interview_sessions (session_id)
+        )
+    ''')
+
+    # 用户表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            user_type TEXT DEFAULT 'candidate',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # AI反馈表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS candidate_ai_feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER NOT NULL,
+            strengths TEXT,
+            improvements TEXT,
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (candidate_id) REFERENCES candidates (id)
+        )
+    ''')
+
+    # 评分表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS candidate_evaluations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER,
+            knowledge INTEGER,
+            skill INTEGER,
+            ability INTEGER,
+            personality INTEGER,
+            motivation INTEGER,
+            value INTEGER,
+            total_score REAL,
+            strengths TEXT,
+            improvements TEXT,
+            summary TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (candidate_id) REFERENCES candidates (id)
+        )
+    ''')
+
+    # 预生成的面试问题表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interview_questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_name TEXT,
+            candidate_email TEXT,
+            position_code TEXT,
+            questions_json TEXT,
+            strategy TEXT,
+            resume_path TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_candidate_email
+        ON interview_questions(candidate_email)
+    ''')
+
+    # 面试会话问题表（用于存储具体面试会话的问题）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interview_session_questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT UNIQUE,
+            candidate_name TEXT,
+            candidate_email TEXT,
+            questions_json TEXT,
+            strategy TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 面试回答表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interview_answers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            question_id INTEGER,
+            question_text TEXT,
+            answer_text TEXT,
+            dimension TEXT,
+            score INTEGER,
+            feedback TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _add_candidate_columns(cursor):
+    """旧版候选人表补充缺失的列"""
+    cursor.execute('PRAGMA table_info(candidates)')
+    columns = [column[1] for column in cursor.fetchall()]
+
+    new_columns = {
+        'phone': 'TEXT',
+        'education': 'TEXT',
+        'experience': 'TEXT',
+        'skills': 'TEXT',
+        'current_position': 'TEXT',
+        'expected_salary': 'TEXT',
+        'summary': 'TEXT',
+        'resume_file_path': 'TEXT',
+        'status': 'TEXT DEFAULT "待面试"',
+        'updated_at': 'TIMESTAMP'
+    }
+
+    for col_name, col_type in new_columns.items():
+        if col_name not in columns:
+            cursor.execute(f'ALTER TABLE candidates ADD COLUMN {col_name} {col_type}')
+            print(f"Added {col_name} column to candidates table")
+
+    cursor.execute('UPDATE candidates SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL')
+
+
+def _add_lookup_indexes(cursor):
+    """候选人、会话、回答等高频查询条件的索引"""
+    # 旧版预生成脚本创建的单列索引，由下面的复合索引替代
+    cursor.execute('DROP INDEX IF EXISTS idx_candidate_email')
+
+    indexes = [
+        ('idx_candidates_name', 'candidates(name)'),
+        ('idx_interview_sessions_candidate', 'interview_sessions(candidate_id, created_at)'),
+        ('idx_session_questions_name', 'interview_session_questions(candidate_name, created_at)'),
+        ('idx_session_questions_email', 'interview_session_questions(candidate_email, created_at)'),
+        # 覆盖按会话统计回答数、平均分、最后回答时间以及按维度求平均分的查询
+        ('idx_interview_answers_session', 'interview_answers(session_id, dimension, score, created_at)'),
+        ('idx_interview_questions_name', 'interview_questions(candidate_name, updated_at)'),
+        ('idx_interview_questions_email', 'interview_questions(candidate_email, updated_at)'),
+        ('idx_candidate_evaluations_candidate', 'candidate_evaluations(candidate_id)'),
+        ('idx_candidate_ai_feedback_candidate', 'candidate_ai_feedback(candidate_id, generated_at)'),
+    ]
+    for name, target in indexes:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+
+
+def _add_pending_score_updates(cursor):
+    """待写回候选人工作簿的评分（写缓冲），同一候选人同一维度只保留最新评分"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pending_score_updates (
+            candidate_name TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            score REAL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (candidate_name, dimension)
+        )
+    ''')
+
+
+def _add_llm_response_cache(cursor):
+    """大模型响应缓存，按 (模型, 温度, 消息) 的哈希寻址，last_accessed 用于LRU淘汰"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+            cache_key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            hit_count INTEGER DEFAULT 0,
+            created_at REAL NOT NULL,
+            last_accessed REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_llm_response_cache_accessed
+        ON llm_response_cache(last_accessed)
+    ''')
+
+
+def _add_resume_text_cache(cursor):
+    """简历PDF文本提取结果，按文件内容的SHA-256和解析引擎寻址"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resume_text_cache (
+            content_hash TEXT NOT NULL,
+            engine TEXT NOT NULL,
+            text TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (content_hash, engine)
+        )
+    ''')
+
+
+def _add_background_jobs(cursor):
+    """后台任务队列；同一去重键在排队或执行期间只允许一个任务"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS background_jobs (
+            id TEXT PRIMARY KEY,
+            job_type TEXT NOT NULL,
+            dedupe_key TEXT NOT NULL,
+            params_json TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result_json TEXT,
+            error TEXT,
+            attempts INTEGER DEFAULT 0,
+            worker_id TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_background_jobs_active
+        ON background_jobs(dedupe_key) WHERE status IN ('queued', 'running')
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_background_jobs_status
+        ON background_jobs(status, created_at)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_background_jobs_created
+        ON background_jobs(created_at)
+    ''')
+
+
+def _add_stats_snapshot(cursor):
+    """招聘统计快照：各数据源的解析结果、数据源版本号（由触发器维护）和汇总后的快照"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_source_versions (
+            source TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute(
+        "INSERT OR IGNORE INTO stats_source_versions (source, version) VALUES ('candidate_evaluations', 0)"
+    )
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_candidate_evaluations_{event.lower()}_version
+            AFTER {event} ON candidate_evaluations
+            BEGIN
+                UPDATE stats_source_versions SET version = version + 1
+                WHERE source = 'candidate_evaluations';
+            END
+        ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_sources (
+            source TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            data_json TEXT NOT NULL,
+            loaded_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_snapshots (
+            name TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            data_json TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            computed_at REAL NOT NULL
+        )
+    ''')
+
+
+def _add_dashboard_stats(cursor):
+    """仪表板统计：每个候选人一行，触发器把行的增删改同步到单行计数表和职位表"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dashboard_candidates (
+            candidate_id INTEGER PRIMARY KEY,
+            name TEXT,
+            position TEXT NOT NULL,
+            status TEXT,
+            score NUMERIC,
+            salary REAL,
+            created_at TEXT,
+            row_order INTEGER NOT NULL,
+            data_json TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_dashboard_candidates_name
+        ON dashboard_candidates(name)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_dashboard_candidates_position_score
+        ON dashboard_candidates(position, score)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_dashboard_candidates_position_salary
+        ON dashboard_candidates(position, salary)
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dashboard_positions (
+            position TEXT PRIMARY KEY,
+            candidates INTEGER NOT NULL DEFAULT 0,
+            first_row INTEGER,
+            best_json TEXT,
+            lowest_salary_json TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dashboard_counters (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_candidates INTEGER NOT NULL DEFAULT 0,
+            completed_interviews INTEGER NOT NULL DEFAULT 0,
+            in_progress_interviews INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            score_count INTEGER NOT NULL DEFAULT 0,
+            active_positions INTEGER NOT NULL DEFAULT 0,
+            source_key TEXT,
+            reconciled_at REAL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO dashboard_counters (id) VALUES (1)")
+
+    # 新行计入计数，旧行从计数中扣除；UPDATE 先扣除旧行再计入新行
+    add_row = '''
+        INSERT INTO dashboard_positions (position, candidates, first_row) VALUES (NEW.position, 1, NEW.row_order)
+        ON CONFLICT (position) DO UPDATE SET
+            candidates = candidates + 1,
+            first_row = MIN(COALESCE(first_row, excluded.first_row), excluded.first_row);
+        UPDATE dashboard_counters SET
+            total_candidates = total_candidates + 1,
+            completed_interviews = completed_interviews + (NEW.status IS '已完成'),
+            in_progress_interviews = in_progress_interviews + (NEW.status IS '面试中'),
+            score_sum = score_sum + COALESCE(NEW.score, 0),
+            score_count = score_count + (NEW.score IS NOT NULL),
+            active_positions = (SELECT COUNT(*) FROM dashboard_positions)
+        WHERE id = 1;
+    '''
+    remove_row = '''
+        UPDATE dashboard_positions SET candidates = candidates - 1 WHERE position = OLD.position;
+        DELETE FROM dashboard_positions WHERE position = OLD.position AND candidates <= 0;
+        UPDATE dashboard_counters SET
+            total_candidates = total_candidates - 1,
+            completed_interviews = completed_interviews - (OLD.status IS '已完成'),
+            in_progress_interviews = in_progress_interviews - (OLD.status IS '面试中'),
+            score_sum = score_sum - COALESCE(OLD.score, 0),
+            score_count = score_count - (OLD.score IS NOT NULL),
+            active_positions = (SELECT COUNT(*) FROM dashboard_positions)
+        WHERE id = 1;
+    '''
+    for event, body in (("INSERT", add_row), ("DELETE", remove_row), ("UPDATE", remove_row + add_row)):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_dashboard_candidates_{event.lower()}
+            AFTER {event} ON dashboard_candidates
+            BEGIN
+                {body}
+            END
+        ''')
+
+
+# 迁移列表：(版本号, 说明, 执行函数)，只能在末尾追加
+MIGRATIONS = [
+    (1, "基础表结构", _create_base_tables),
+    (2, "候选人表补充字段", _add_candidate_columns),
+    (3, "高频查询索引", _add_lookup_indexes),
+    (4, "评分写缓冲表", _add_pending_score_updates),
+    (5, "大模型响应缓存表", _add_llm_response_cache),
+    (6, "简历文本缓存表", _add_resume_text_cache),
+    (7, "后台任务队列表", _add_background_jobs),
+    (8, "招聘统计快照表", _add_stats_snapshot),
+    (9, "仪表板统计表", _add_dashboard_stats),
+]
+
+
+def get_schema_version(conn):
+    """当前数据库结构版本，未初始化时为0"""
+    row = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not row:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def run_migrations(conn):
+    """执行尚未应用的迁移，返回执行后的版本号"""
+    latest = MIGRATIONS[-1][0]
+    if get_schema_version(conn) >= latest:
+        return latest
+
+    cursor = conn.cursor()
+    # 加写锁后再检查版本，避免多个进程同时启动时重复迁移
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        current = get_schema_version(conn)
+
+        for version, description, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            migrate(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            print(f"数据库迁移完成: v{version} {description}")
+            current = version
+
+        conn.commit()
+        return current
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def ensure_schema():
+    """使用共享连接池执行迁移（启动和批处理脚本调用）"""
+    with db_pool.connection() as conn:
+        return run_migrations(conn)
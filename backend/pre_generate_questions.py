@@ -2,51 +2,35 @@
 """
 预生成面试问题脚本
 为所有候选人提前生成个性化面试问题并保存到数据库
+
+用法: python pre_generate_questions.py [--workers N] [--rate-limit 每分钟次数] [--pdf-processes N] [--reset]
+中断后重新运行会跳过进度文件中已成功的候选人
 """
 
-import sqlite3
+import argparse
+import asyncio
 import json
+import multiprocessing
 import sys
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
 # 添加当前目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from config import config
 from llm_service import llm_service
+from db_pool import db_pool
+from migrations import ensure_schema
+from resume_catalog import resume_catalog
 
 def init_questions_table():
-    """初始化面试问题表"""
-    conn = sqlite3.connect('recruitment.db')
-    cursor = conn.cursor()
-    
-    try:
-        # 创建面试问题表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS interview_questions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                candidate_name TEXT,
-                candidate_email TEXT,
-                position_code TEXT,
-                questions_json TEXT,
-                strategy TEXT,
-                resume_path TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 创建索引
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_candidate_email 
-            ON interview_questions(candidate_email)
-        ''')
-        
-        conn.commit()
-        print("面试问题表初始化完成")
-        
-    finally:
-        conn.close()
+    """初始化面试问题表（执行数据库迁移）"""
+    ensure_schema()
+    print("面试问题表初始化完成")
 
 def get_candidate_resume_mapping():
     """获取候选人和简历文件的映射关系"""
@@ -112,52 +96,59 @@ C端产品经理-AIGC领域
     
     return job_descriptions.get(position_code, "职位描述暂无")
 
+def find_resume_path(candidate_name, candidate_info):
+    """在简历目录中查找简历文件，找不到时使用映射中登记的 resouse/职位文件夹/文件名"""
+    entry = resume_catalog.find(name=candidate_name, position=candidate_info["position"])
+    if entry:
+        return entry["path"]
+    
+    folder, filename = Path(candidate_info["resume_path"]).parts[-2:]
+    resolved = resume_catalog.resolve(folder, filename)
+    if resolved:
+        return resolved[0]
+    
+    print(f"简历文件不存在: {candidate_info['resume_path']}")
+    return None
+
+def extract_resume_text(resume_path):
+    """提取简历文本（批量模式下在进程池中执行）"""
+    try:
+        resume_text = llm_service.extract_text_from_pdf(str(resume_path))
+        print(f"成功读取简历文件: {resume_path}")
+        return resume_text
+    except Exception as e:
+        print(f"读取简历失败: {e}")
+        return ""
+
+def build_candidate_data(candidate_name, candidate_info):
+    """构建候选人信息"""
+    return {
+        'name': candidate_name,
+        'email': f"{candidate_name.lower()}@example.com",  # 临时邮箱
+        'position': candidate_info["position"]
+    }
+
 def generate_questions_for_candidate(candidate_name, candidate_info):
     """为单个候选人生成面试问题"""
     print(f"\n正在为候选人 {candidate_name} 生成面试问题...")
     
     # 读取简历内容
-    resume_text = ""
-    
-    # 尝试多个可能的路径
-    possible_paths = [
-        Path("..") / candidate_info["resume_path"],  # ../resouse/...
-        Path(candidate_info["resume_path"]),         # resouse/...
-        Path(".") / ".." / candidate_info["resume_path"],  # ./resouse/...
-    ]
-    
-    resume_path = None
-    for path in possible_paths:
-        if path.exists():
-            resume_path = path
-            break
-    
-    if resume_path:
-        try:
-            resume_text = llm_service.extract_text_from_pdf(str(resume_path))
-            print(f"成功读取简历文件: {resume_path}")
-        except Exception as e:
-            print(f"读取简历失败: {e}")
-    else:
-        print(f"简历文件不存在，尝试的路径:")
-        for path in possible_paths:
-            print(f"  - {path.resolve()}")
+    resume_path = find_resume_path(candidate_name, candidate_info)
+    resume_text = extract_resume_text(resume_path) if resume_path else ""
     
     # 获取职位描述
     job_description = get_job_description(candidate_info["position_code"])
     
-    # 构建候选人信息
-    candidate_data = {
-        'name': candidate_name,
-        'email': f"{candidate_name.lower()}@example.com",  # 临时邮箱
-        'position': candidate_info["position"]
-    }
-    
     # 生成面试问题
     try:
-        questions_data = llm_service.generate_interview_questions(
-            candidate_data, resume_text, job_description
-        )
+        questions_data = asyncio.run(llm_service.generate_interview_questions(
+            build_candidate_data(candidate_name, candidate_info), resume_text, job_description
+        ))
+        
+        # 大模型调用失败时返回的是通用备用问题，不作为该候选人的个性化问题保存
+        if questions_data.get("fallback_reason"):
+            print(f"生成问题失败: {questions_data['fallback_reason']}")
+            return None
         
         print(f"成功生成 {len(questions_data['questions'])} 个问题")
         return questions_data
@@ -168,7 +159,7 @@ def generate_questions_for_candidate(candidate_name, candidate_info):
 
 def save_questions_to_db(candidate_name, candidate_info, questions_data):
     """保存问题到数据库"""
-    conn = sqlite3.connect('recruitment.db')
+    conn = db_pool.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -215,8 +206,125 @@ def save_questions_to_db(candidate_name, candidate_info, questions_data):
     finally:
         conn.close()
 
-def main():
+class RateLimiter:
+    """按固定间隔放行大模型请求，限制每分钟的调用次数"""
+    
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def load_checkpoint(checkpoint_path):
+    """读取进度文件 {候选人: 处理结果}"""
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_checkpoint(checkpoint_path, checkpoint):
+    """写入进度文件（先写临时文件再替换，中断时不会留下半个文件）"""
+    temp_path = f"{checkpoint_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, checkpoint_path)
+
+async def run_batch(resume_mapping, workers, rate_limit, checkpoint_path, pdf_processes, reset=False):
+    """
+    并行批量生成面试问题
+    PDF解析在进程池中执行，大模型调用在事件循环中并发（最多 workers 个，并受速率限制）；
+    每个候选人完成后写入进度文件，重新运行时跳过已成功的候选人
+    """
+    checkpoint = {} if reset else load_checkpoint(checkpoint_path)
+    pending = {
+        name: info for name, info in resume_mapping.items()
+        if checkpoint.get(name, {}).get("status") != "success"
+    }
+    skipped = len(resume_mapping) - len(pending)
+    if skipped:
+        print(f"跳过已生成的候选人: {skipped} 个")
+    
+    semaphore = asyncio.Semaphore(workers)
+    limiter = RateLimiter(rate_limit)
+    loop = asyncio.get_running_loop()
+    
+    # 使用 spawn 启动子进程，子进程不会继承父进程的数据库连接
+    with ProcessPoolExecutor(max_workers=pdf_processes,
+                             mp_context=multiprocessing.get_context("spawn")) as pdf_pool:
+        async def process(candidate_name, candidate_info):
+            start = time.perf_counter()
+            try:
+                resume_path = find_resume_path(candidate_name, candidate_info)
+                resume_text = ""
+                if resume_path:
+                    resume_text = await loop.run_in_executor(pdf_pool, extract_resume_text, str(resume_path))
+                
+                async with semaphore:
+                    await limiter.wait()
+                    questions_data = await llm_service.generate_interview_questions(
+                        build_candidate_data(candidate_name, candidate_info),
+                        resume_text,
+                        get_job_description(candidate_info["position_code"])
+                    )
+                
+                if questions_data.get("fallback_reason"):
+                    # 大模型调用失败时返回的是通用备用问题：不保存，记为失败，重新运行时重试
+                    result = {"status": "failed", "error": questions_data["fallback_reason"]}
+                else:
+                    save_questions_to_db(candidate_name, candidate_info, questions_data)
+                    result = {"status": "success", "questions": len(questions_data["questions"])}
+            except Exception as e:
+                result = {"status": "failed", "error": str(e)}
+            
+            result["seconds"] = round(time.perf_counter() - start, 2)
+            result["finished_at"] = datetime.now().isoformat(timespec="seconds")
+            checkpoint[candidate_name] = result
+            save_checkpoint(checkpoint_path, checkpoint)
+            
+            if result["status"] == "success":
+                print(f"✅ {candidate_name}: {result['questions']} 个问题 ({result['seconds']}s)")
+            else:
+                print(f"❌ {candidate_name}: {result['error']}")
+            return candidate_name, result
+        
+        results = await asyncio.gather(*[
+            process(name, info) for name, info in pending.items()
+        ])
+    
+    return dict(results), skipped
+
+def parse_args(argv=None):
+    """命令行参数，默认值来自配置文件的 pre_generate 部分"""
+    parser = argparse.ArgumentParser(description="为所有候选人预生成个性化面试问题")
+    parser.add_argument("--workers", type=int,
+                        default=config.get('pre_generate.workers', 4),
+                        help="同时进行的大模型请求数")
+    parser.add_argument("--rate-limit", type=float,
+                        default=config.get('pre_generate.rate_limit_per_minute', 60),
+                        help="每分钟最多发起的大模型请求数（0 表示不限制）")
+    parser.add_argument("--pdf-processes", type=int,
+                        default=config.get('pre_generate.pdf_processes', 2),
+                        help="解析PDF简历的进程数")
+    parser.add_argument("--checkpoint",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                             "pre_generate_checkpoint.json"),
+                        help="进度文件路径")
+    parser.add_argument("--reset", action="store_true", help="忽略进度文件，重新生成所有候选人")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """主函数"""
+    args = parse_args(argv)
     print("开始预生成面试问题...")
     
     # 初始化数据库表
@@ -225,24 +333,21 @@ def main():
     # 获取候选人映射
     resume_mapping = get_candidate_resume_mapping()
     
-    # 为每个候选人生成问题
-    success_count = 0
-    total_count = len(resume_mapping)
-    
-    for candidate_name, candidate_info in resume_mapping.items():
-        try:
-            questions_data = generate_questions_for_candidate(candidate_name, candidate_info)
-            
-            if questions_data:
-                save_questions_to_db(candidate_name, candidate_info, questions_data)
-                success_count += 1
-            else:
-                print(f"候选人 {candidate_name} 的问题生成失败")
-                
-        except Exception as e:
-            print(f"处理候选人 {candidate_name} 时出错: {e}")
+    results, skipped = asyncio.run(run_batch(
+        resume_mapping,
+        workers=args.workers,
+        rate_limit=args.rate_limit,
+        checkpoint_path=args.checkpoint,
+        pdf_processes=args.pdf_processes,
+        reset=args.reset
+    ))
     
-    print(f"\n预生成完成！成功: {success_count}/{total_count}")
+    success_count = sum(1 for r in results.values() if r["status"] == "success")
+    print(f"\n预生成完成！成功: {success_count}/{len(results)}，跳过: {skipped}")
+    for candidate_name, result in results.items():
+        if result["status"] != "success":
+            print(f"  失败: {candidate_name} - {result['error']}")
+    return results
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
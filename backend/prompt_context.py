@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+AI助手的提示词上下文构建 - 在token预算内挑选与问题最相关的数据
+基础统计总是包含；状态分布、职位分布、职位详情和候选人明细按与问题的相关度排序，
+放得下才放入。token数按中文每字约1个token、其他字符每4个约1个token估算
+"""
+
+import math
+import re
+
+from config import config
+
+CJK_PATTERN = re.compile(r'[㐀-鿿豈-﫿]')
+WORD_PATTERN = re.compile(r'[A-Za-z0-9@._-]+')
+
+# 问题中出现这些词时，候选人按总分排序
+HIGH_SCORE_WORDS = ('最高', '最好', '优秀', '排名', '排行', '前几', '高分', '最佳', 'top', 'Top', 'TOP')
+LOW_SCORE_WORDS = ('最低', '最差', '低分', '较差', '垫底')
+
+# 各汇总表的关键词，问题包含这些词时优先放入
+SECTION_KEYWORDS = {
+    "status": ('状态', '完成', '面试', '进度', '已面', '未面'),
+    "positions": ('职位', '岗位', '分布', '方向', '部门'),
+    "jobs": ('职位', '岗位', '薪资', '工资', '招聘人数', '招聘数量', '开启', '关闭'),
+}
+
+DIMENSIONS = (
+    ('Knowledge', '知识'), ('Skill', '技能'), ('Ability', '能力'),
+    ('Personality', '个性'), ('Motivation', '动机'), ('Value', '价值观'),
+)
+
+
+def estimate_tokens(text):
+    """估算文本的token数"""
+    if not text:
+        return 0
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def _terms(question):
+    """问题中的检索词：中文按相邻两字切分，英文数字按单词"""
+    terms = set(WORD_PATTERN.findall(question.lower()))
+    for segment in re.findall(r'[㐀-鿿豈-﫿]+', question):
+        if len(segment) == 1:
+            terms.add(segment)
+        terms.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    return terms
+
+
+def _relevance(text, terms):
+    lowered = text.lower()
+    return sum(1 for term in terms if term in lowered)
+
+
+def _number(value):
+    """有效的数值，空值和NaN返回None"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+class PromptContextBuilder:
+    """按token预算构建数据上下文"""
+
+    def __init__(self, budget_tokens=None):
+        self.budget_tokens = budget_tokens or config.get('ai_chat.context_token_budget', 6000)
+
+    def _core(self, stats):
+        """基础统计和各维度平均分（总是包含）"""
+        return f"""数据来源：
+- Excel候选人数据：{stats.get('excel_candidates', 0)}条
+- Excel职位数据：{stats.get('excel_jobs', 0)}条
+- JSON候选人数据：{stats.get('json_candidates', 0)}条
+- JSON职位数据：{stats.get('json_jobs', 0)}条
+
+基础统计：
+- 总候选人数：{stats.get('total_candidates', 0)}人
+- 总职位数：{stats.get('total_jobs', 0)}个
+- 已完成面试：{stats.get('completed_interviews', 0)}人
+- 面试完成率：{stats.get('completion_rate', 0):.1f}%
+- 平均总分：{stats.get('average_score', 0):.1f}分
+- 最高分：{stats.get('max_score', 0):.1f}分
+- 最低分：{stats.get('min_score', 0):.1f}分
+
+各维度平均分：
+- 专业知识：{stats.get('avg_knowledge', 0):.1f}分
+- 专业技能：{stats.get('avg_skill', 0):.1f}分
+- 综合能力：{stats.get('avg_ability', 0):.1f}分
+- 个性特质：{stats.get('avg_personality', 0):.1f}分
+- 求职动机：{stats.get('avg_motivation', 0):.1f}分
+- 价值观：{stats.get('avg_value', 0):.1f}分"""
+
+    def _sections(self, stats):
+        """可选的汇总表 {名称: 文本}"""
+        sections = {}
+        status_dist = stats.get('interview_status_distribution', {})
+        if status_dist:
+            sections["status"] = "面试状态分布：\n" + "\n".join(
+                f"- {status}：{count}人" for status, count in status_dist.items()
+            )
+        position_dist = stats.get('position_distribution', {})
+        if position_dist:
+            sections["positions"] = "职位分布：\n" + "\n".join(
+                f"- {pos}：{count}人" for pos, count in position_dist.items()
+            )
+        job_details = stats.get('job_details', [])
+        if job_details:
+            sections["jobs"] = "职位详情：\n" + "\n".join(
+                f"- {job.get('title', '未知')}: 薪资{job.get('salary', '未知')}, 招聘{job.get('count', 0)}人, 状态:{job.get('status', '未知')}"
+                for job in job_details
+            )
+        return sections
+
+    @staticmethod
+    def _candidate_line(candidate):
+        name = candidate.get('姓名', candidate.get('name', '未知'))
+        position = candidate.get('岗位名称', candidate.get('position', '未知职位'))
+        email = candidate.get('邮箱', candidate.get('email', '未知邮箱'))
+        line = f"{name} - {position} ({email})"
+
+        status = candidate.get('是否已面试（AI）', candidate.get('interview_status'))
+        if status:
+            line += f" 已面试:{status}"
+        total = _number(candidate.get('面试总评分', candidate.get('score')))
+        if total is not None:
+            line += f" 总分:{total:.0f}"
+        scores = [
+            f"{label}{score:.0f}" for key, label in DIMENSIONS
+            if (score := _number(candidate.get(key))) is not None
+        ]
+        if scores:
+            line += " 维度:" + "/".join(scores)
+        return line
+
+    @staticmethod
+    def _total_score(candidate):
+        total = _number(candidate.get('面试总评分', candidate.get('score')))
+        if total is not None:
+            return total
+        scores = [s for key, _ in DIMENSIONS if (s := _number(candidate.get(key))) is not None]
+        return sum(scores) / len(scores) if scores else None
+
+    def _rank_candidates(self, candidates, question, terms):
+        """按与问题的相关度排序候选人；询问高分/低分时按总分排序"""
+        lines = [self._candidate_line(c) for c in candidates]
+        order = list(range(len(candidates)))
+
+        if any(word in question for word in HIGH_SCORE_WORDS + LOW_SCORE_WORDS):
+            descending = any(word in question for word in HIGH_SCORE_WORDS)
+            scored = [i for i in order if self._total_score(candidates[i]) is not None]
+            scored.sort(key=lambda i: self._total_score(candidates[i]), reverse=descending)
+            rest = [i for i in order if self._total_score(candidates[i]) is None]
+            order = scored + rest
+        elif terms:
+            relevance = [_relevance(line, terms) for line in lines]
+            # 稳定排序：相关度相同的保持原有顺序
+            order.sort(key=lambda i: -relevance[i])
+        return [lines[i] for i in order]
+
+    def build(self, data, question=""):
+        """
+        返回 (上下文文本, 用量报告)
+        用量报告包含预算、已用token数、放入的汇总表和候选人条数
+        """
+        question = question or ""
+        stats = data.get('statistics', {})
+        terms = _terms(question)
+
+        parts = [self._core(stats)]
+        used = estimate_tokens(parts[0])
+        included = ["core"]
+        omitted = []
+
+        sections = self._sections(stats)
+        ranked = sorted(
+            sections,
+            key=lambda name: -sum(1 for word in SECTION_KEYWORDS[name] if word in question)
+        )
+        for name in ranked:
+            cost = estimate_tokens(sections[name]) + 1
+            if used + cost <= self.budget_tokens:
+                parts.append(sections[name])
+                used += cost
+                included.append(name)
+            else:
+                omitted.append(name)
+
+        candidates = data.get('candidate_excel') or data.get('candidates', [])
+        candidate_lines = []
+        header = "\n候选人明细（按与问题的相关度排序）："
+        header_cost = estimate_tokens(header) + 1
+        if candidates and used + header_cost < self.budget_tokens:
+            used += header_cost
+            for line in self._rank_candidates(candidates, question, terms):
+                entry = f"{len(candidate_lines) + 1}. {line}"
+                cost = estimate_tokens(entry) + 1
+                if used + cost > self.budget_tokens:
+                    break
+                candidate_lines.append(entry)
+                used += cost
+            if candidate_lines:
+                parts.append(header.strip() + "\n" + "\n".join(candidate_lines))
+            else:
+                used -= header_cost
+
+        context = "\n\n".join(parts)
+        usage = {
+            "budget_tokens": self.budget_tokens,
+            "context_tokens": estimate_tokens(context),
+            "sections": included,
+            "omitted_sections": omitted,
+            "candidates_included": len(candidate_lines),
+            "candidates_total": len(candidates)
+        }
+        return context, usage
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+简历目录 - resouse/ 下所有职位文件夹中简历文件的索引
+启动时扫描一次，之后由文件系统变更通知（安装了 watchdog 时）或定时检查目录修改时间来更新；
+按 (文件夹, 文件名)、候选人姓名、邮箱和职位查找都是字典查询，新增的职位文件夹无需改代码即可识别。
+文件的SHA-256和页数在第一次查询时计算，并按修改时间和大小缓存
+"""
+
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+
+import PyPDF2
+
+from config import config
+from db_pool import db_pool
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # 未安装 watchdog 时定时检查目录修改时间
+    Observer = None
+
+RESUME_ROOT = Path(__file__).parent.parent / "resouse"
+RESUME_SUFFIXES = ('.pdf', '.docx', '.doc')
+
+
+def _bigrams(text):
+    """中文按相邻两字、英文数字按单词切分，用于职位名称与文件夹名的模糊匹配"""
+    text = text.lower()
+    terms = set(re.findall(r'[a-z0-9]+', text))
+    for segment in re.findall(r'[一-鿿]+', text):
+        terms.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    return terms
+
+
+class ResumeCatalog:
+    """简历文件目录"""
+
+    def __init__(self, root=None, poll_interval=None, pool=None):
+        self.root = Path(root or RESUME_ROOT)
+        self.poll_interval = poll_interval or config.get('resume_catalog.poll_interval_seconds', 5)
+        self.pool = pool or db_pool
+
+        self._lock = threading.Lock()
+        self._files = {}      # {(文件夹, 文件名): 路径}
+        self._by_name = {}    # {姓名: [(文件夹, 文件名), ...]}
+        self._dir_mtimes = None
+        self._emails = {}     # {邮箱: 姓名}，由候选人工作簿登记
+        self._meta = {}       # {路径: (mtime_ns, 大小, sha256, 页数)}
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._observer = None
+
+        self._hits = 0
+        self._misses = 0
+        self._rebuilds = 0
+
+    # 索引
+
+    def _scan_dir_mtimes(self):
+        """根目录和各职位文件夹的修改时间，文件增删会改变所在目录的修改时间"""
+        mtimes = {}
+        try:
+            mtimes[""] = self.root.stat().st_mtime_ns
+            for entry in os.scandir(self.root):
+                if entry.is_dir() and not entry.name.startswith('.'):
+                    mtimes[entry.name] = entry.stat().st_mtime_ns
+        except FileNotFoundError:
+            pass
+        return mtimes
+
+    def rebuild(self):
+        """重新扫描所有职位文件夹"""
+        mtimes = self._scan_dir_mtimes()
+        files = {}
+        by_name = {}
+        for folder in sorted(name for name in mtimes if name):
+            try:
+                entries = sorted(os.scandir(self.root / folder), key=lambda e: e.name)
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(RESUME_SUFFIXES):
+                    files[(folder, entry.name)] = Path(entry.path)
+                    by_name.setdefault(Path(entry.name).stem, []).append((folder, entry.name))
+
+        with self._lock:
+            self._files = files
+            self._by_name = by_name
+            self._dir_mtimes = mtimes
+            self._rebuilds += 1
+        print(f"简历目录已更新: {max(len(mtimes) - 1, 0)} 个职位文件夹, {len(files)} 份简历")
+
+    def refresh_if_changed(self):
+        """目录有变化时重新扫描，返回是否重新扫描"""
+        if self._dir_mtimes is None or self._scan_dir_mtimes() != self._dir_mtimes:
+            self.rebuild()
+            return True
+        return False
+
+    def _ensure_built(self):
+        if self._dir_mtimes is None:
+            self.rebuild()
+
+    def _refresh_on_miss(self):
+        """查不到时：监听已启动则索引已是最新；否则检查一次目录是否变化"""
+        if self._observer is not None or (self._thread and self._thread.is_alive()):
+            return False
+        return self.refresh_if_changed()
+
+    # 查询
+
+    def resolve(self, folder, filename):
+        """按 (职位文件夹, 文件名) 返回 (路径, stat结果)，不存在时返回 None"""
+        self._ensure_built()
+        path = self._files.get((folder, filename))
+        if path is None and self._refresh_on_miss():
+            path = self._files.get((folder, filename))
+        if path is None:
+            self._misses += 1
+            return None
+
+        try:
+            stat_result = path.stat()
+        except FileNotFoundError:
+            # 文件在索引更新之前被删除
+            self.rebuild()
+            self._misses += 1
+            return None
+        self._hits += 1
+        return path, stat_result
+
+    def folders(self):
+        """所有职位文件夹名"""
+        self._ensure_built()
+        return [name for name in self._dir_mtimes if name]
+
+    def folder_for_position(self, position):
+        """与职位名称最接近的简历文件夹，没有相关文件夹时返回 None"""
+        if not position:
+            return None
+        folders = self.folders()
+        for folder in folders:
+            if folder == position or position in folder or folder in position:
+                return folder
+
+        terms = _bigrams(position)
+        best, best_overlap = None, 0
+        for folder in folders:
+            overlap = len(terms & _bigrams(folder))
+            if overlap > best_overlap:
+                best, best_overlap = folder, overlap
+        return best
+
+    def register_emails(self, emails):
+        """登记 {邮箱: 姓名}，之后可以按邮箱查找简历"""
+        with self._lock:
+            self._emails.update(emails)
+
+    def _name_for_email(self, email):
+        name = self._emails.get(email)
+        if name:
+            return name
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT name FROM candidates WHERE email = ?", (email,)).fetchone()
+        return row[0] if row else None
+
+    def find(self, name=None, email=None, position=None):
+        """
+        查找候选人的简历，返回 {folder, filename, path} 或 None
+        姓名和邮箱至少提供一个；同名简历有多份时优先选择与职位匹配的文件夹
+        """
+        self._ensure_built()
+        if not name and email:
+            name = self._name_for_email(email)
+        if not name:
+            self._misses += 1
+            return None
+
+        keys = self._by_name.get(name)
+        if not keys and self._refresh_on_miss():
+            keys = self._by_name.get(name)
+        if not keys:
+            # 文件名带有其他内容时（如 "张三-简历.pdf"）按包含关系查找
+            keys = [key for stem, stem_keys in self._by_name.items() if name in stem for key in stem_keys]
+        if not keys:
+            self._misses += 1
+            return None
+
+        folder = self.folder_for_position(position) if len(keys) > 1 else None
+        key = next((k for k in keys if k[0] == folder), keys[0])
+        self._hits += 1
+        return {"folder": key[0], "filename": key[1], "path": self._files[key]}
+
+    def find_path(self, name=None, email=None, position=None):
+        """查找候选人简历的文件路径字符串"""
+        entry = self.find(name=name, email=email, position=position)
+        return str(entry["path"]) if entry else None
+
+    def describe(self, entry):
+        """补充文件大小、SHA-256和页数；文件未变化时使用缓存的结果"""
+        path = entry["path"]
+        stat_result = path.stat()
+        cached = self._meta.get(path)
+        if cached and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            sha256, pages = cached[2], cached[3]
+        else:
+            data = path.read_bytes()
+            sha256 = hashlib.sha256(data).hexdigest()
+            pages = None
+            if path.suffix.lower() == '.pdf':
+                try:
+                    pages = len(PyPDF2.PdfReader(path).pages)
+                except Exception as e:
+                    print(f"读取简历页数失败: {path}: {e}")
+            self._meta[path] = (stat_result.st_mtime_ns, stat_result.st_size, sha256, pages)
+        return {
+            "folder": entry["folder"],
+            "filename": entry["filename"],
+            "path": str(path),
+            "size": stat_result.st_size,
+            "sha256": sha256,
+            "pages": pages
+        }
+
+    def entries(self):
+        """目录中的所有简历 [{folder, filename, path}]"""
+        self._ensure_built()
+        return [
+            {"folder": folder, "filename": filename, "path": path}
+            for (folder, filename), path in self._files.items()
+        ]
+
+    # 变更监听
+
+    def start(self):
+        """建立索引并开始监听目录变化"""
+        self._ensure_built()
+        if Observer is not None:
+            catalog = self
+
+            class _Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    catalog.refresh_if_changed()
+
+            self._observer = Observer()
+            self._observer.schedule(_Handler(), str(self.root), recursive=True)
+            self._observer.start()
+            return
+
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll_loop, name="resume-catalog", daemon=True)
+        self._thread.start()
+
+    def _poll_loop(self):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.refresh_if_changed()
+            except Exception as e:
+                print(f"检查简历目录失败: {e}")
+
+    def stop(self):
+        """停止监听"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        """目录规模和查询统计"""
+        return {
+            "folders": max(len(self._dir_mtimes or {}) - 1, 0),
+            "files": len(self._files),
+            "hits": self._hits,
+            "misses": self._misses,
+            "rebuilds": self._rebuilds,
+            "watcher": "watchdog" if Observer is not None else "polling"
+        }
+
+
+# 全局简历目录
+resume_catalog = ResumeCatalog()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+简历文件服务 - 由简历目录（resume_catalog）定位的文件分段流式返回
+支持 ETag/If-None-Match、Last-Modified/If-Modified-Since 条件请求和 Range 分段请求：
+PDF阅读器可以按需读取部分页面，浏览器缓存未过期时直接返回 304
+"""
+
+from email.utils import formatdate, parsedate_to_datetime
+
+import anyio
+from fastapi.responses import Response
+
+CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(stat_result):
+    """由修改时间和大小生成的强校验ETag，文件被替换后随之变化"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def _not_modified(headers, etag, stat_result):
+    """条件请求：If-None-Match 优先，其次 If-Modified-Since"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(stat_result.st_mtime) <= since
+    return False
+
+
+def parse_range(range_header, size):
+    """
+    解析单段 Range 请求头，返回 (起始位置, 结束位置) 闭区间
+    无法解析、多段请求或结束位置小于起始位置（RFC 7233 视为无效，忽略）返回 None，按完整文件返回；
+    格式正确但起始位置超出文件大小抛出 ValueError（416）
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+
+    start_text, end_text = (part.strip() for part in spec.split("-", 1))
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # bytes=-N：最后 N 个字节
+            suffix = int(end_text)
+            if suffix <= 0:
+                return None
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise ValueError(f"范围超出文件大小: {range_header}")
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(Response):
+    """
+    返回文件的 [start, end] 区间：服务器支持 ASGI zerocopysend 扩展时由服务器直接 sendfile，
+    否则按 CHUNK_SIZE 分块读取发送，内存占用与文件大小无关
+    """
+
+    def __init__(self, path, start, end, status_code=200, headers=None, media_type=None, send_body=True):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.send_body = send_body
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+        self.headers["content-length"] = str(end - start + 1 if end >= start else 0)
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        remaining = self.end - self.start + 1
+        if not self.send_body or remaining <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": self.start,
+                    "count": remaining,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(self.start)
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # 文件在发送过程中被截断
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def file_response(path, stat_result, request_headers, method="GET", media_type="application/pdf", extra_headers=None):
+    """按请求头返回 200 / 206 / 304 / 416 响应"""
+    size = stat_result.st_size
+    etag = file_etag(stat_result)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+        **(extra_headers or {})
+    }
+
+    if _not_modified(request_headers, etag, stat_result):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    # If-Range 与当前版本不一致时文件已变化，返回完整文件
+    if range_header and (not if_range or if_range in (etag, headers["Last-Modified"])):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    send_body = method.upper() != "HEAD"
+    if byte_range is None:
+        return FileRangeResponse(path, 0, size - 1, headers=headers, media_type=media_type, send_body=send_body)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return FileRangeResponse(path, start, end, status_code=206, headers=headers,
+                             media_type=media_type, send_body=send_body)
+
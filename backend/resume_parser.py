@@ -1,11 +1,12 @@
+import asyncio
 import os
 import json
 import re
 from pathlib import Path
 from typing import Dict, Optional
-import pdfplumber
 import docx
 from llm_service import llm_service
+from text_extractor import text_extractor
 
 class ResumeParser:
     def __init__(self):
@@ -13,15 +14,9 @@ class ResumeParser:
         self.upload_dir.mkdir(parents=True, exist_ok=True)
     
     def extract_text_from_pdf(self, file_path: str) -> str:
-        """从PDF文件提取文本"""
+        """从PDF文件提取文本（pdfplumber，结果按文件内容缓存）"""
         try:
-            text = ""
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            return text.strip()
+            return text_extractor.extract_pdf(file_path, engine="pdfplumber")
         except Exception as e:
             print(f"PDF解析失败: {e}")
             return ""
@@ -49,7 +44,7 @@ class ResumeParser:
         else:
             raise ValueError(f"不支持的文件格式: {file_ext}")
     
-    def parse_resume_with_ai(self, resume_text: str) -> Dict:
+    async def parse_resume_with_ai(self, resume_text: str, use_cache: bool = True) -> Dict:
         """使用AI解析简历内容"""
         prompt = f"""
 请分析以下简历内容，提取关键信息并以JSON格式返回。请严格按照以下格式返回，如果某个字段无法确定，请返回空字符串：
@@ -74,7 +69,7 @@ class ResumeParser:
         
         try:
             # 调用AI服务
-            response = llm_service.chat(prompt)
+            response = await llm_service.chat(prompt, use_cache=use_cache, operation="parse_resume")
             
             # 尝试解析JSON
             # 清理响应文本，移除可能的markdown标记
@@ -154,14 +149,19 @@ class ResumeParser:
         
         return str(file_path)
     
-    def parse_resume_file(self, file_content: bytes, filename: str) -> Dict:
+    async def parse_resume_file(self, file_content: bytes, filename: str) -> Dict:
         """解析简历文件的完整流程"""
+        # 1. 保存文件
+        loop = asyncio.get_running_loop()
+        file_path = await loop.run_in_executor(None, self.save_uploaded_file, file_content, filename)
+        return await self.parse_saved_file(file_path)
+    
+    async def parse_saved_file(self, file_path: str) -> Dict:
+        """解析已保存的简历文件（后台任务直接使用保存后的路径）"""
         try:
-            # 1. 保存文件
-            file_path = self.save_uploaded_file(file_content, filename)
-            
-            # 2. 提取文本
-            resume_text = self.extract_text_from_file(file_path)
+            # 2. 提取文本（PDF/Word解析是阻塞操作，在线程池中执行，不阻塞事件循环）
+            loop = asyncio.get_running_loop()
+            resume_text = await loop.run_in_executor(None, self.extract_text_from_file, file_path)
             
             if not resume_text.strip():
                 return {
@@ -171,7 +171,7 @@ class ResumeParser:
                 }
             
             # 3. AI解析
-            parsed_data = self.parse_resume_with_ai(resume_text)
+            parsed_data = await self.parse_resume_with_ai(resume_text)
             
             # 4. 添加文件路径
             parsed_data["resume_file_path"] = file_path
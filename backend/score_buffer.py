@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+评分写缓冲 - 面试评分先写入SQLite，再按批次合并写回候选人工作簿
+提交回答时只执行一次UPSERT；后台线程按间隔（以及应用关闭时）把积累的评分一次性写入Excel，
+写工作簿时持有文件锁，多个进程或接口并发更新也不会互相覆盖
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from config import config
+from db_pool import db_pool
+from migrations import run_migrations
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只在进程内加锁
+    fcntl = None
+
+
+class ScoreWriteBuffer:
+    """候选人评分写缓冲"""
+
+    def __init__(self, workbook_path=None, flush_interval=None, pool=None):
+        self.workbook_path = Path(workbook_path or Path(__file__).parent.parent / "resouse" / "candidate.xlsx")
+        self.lock_path = self.workbook_path.with_name(f".{self.workbook_path.name}.lock")
+        self.flush_interval = flush_interval or config.get('score_buffer.flush_interval_seconds', 10)
+        self.pool = pool or db_pool
+
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._schema_ready = False
+
+        self._recorded = 0
+        self._flushes = 0
+        self._flushed_updates = 0
+        self._last_flush_at = None
+        self._last_error = None
+
+    def _ensure_schema(self):
+        if not self._schema_ready:
+            with self.pool.connection() as conn:
+                run_migrations(conn)
+            self._schema_ready = True
+
+    def record(self, candidate_name, dimension, score, conn=None):
+        """
+        记录一次评分更新，同一候选人同一维度只保留最新的评分
+        传入 conn 时在调用方的事务中写入，由调用方提交
+        """
+        self._ensure_schema()
+        if conn is not None:
+            self._upsert(conn, candidate_name, dimension, score)
+        else:
+            with self.pool.connection() as conn:
+                self._upsert(conn, candidate_name, dimension, score)
+                conn.commit()
+        self._recorded += 1
+
+    @staticmethod
+    def _upsert(conn, candidate_name, dimension, score):
+        conn.execute('''
+            INSERT INTO pending_score_updates (candidate_name, dimension, score, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (candidate_name, dimension)
+            DO UPDATE SET score = excluded.score, updated_at = excluded.updated_at
+        ''', (candidate_name, dimension, score))
+
+    def pending_scores(self, candidate_name=None):
+        """尚未写回工作簿的评分 {姓名: {维度: 评分}}"""
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            if candidate_name is None:
+                rows = conn.execute(
+                    "SELECT candidate_name, dimension, score FROM pending_score_updates"
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT candidate_name, dimension, score FROM pending_score_updates WHERE candidate_name = ?",
+                    (candidate_name,)
+                ).fetchall()
+
+        pending = {}
+        for name, dimension, score in rows:
+            pending.setdefault(name, {})[dimension] = score
+        return pending
+
+    @contextmanager
+    def _workbook_lock(self):
+        """进程内互斥 + 跨进程文件锁"""
+        with self._flush_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def flush(self):
+        """把所有待写评分合并后一次写入工作簿，返回写入的评分条数"""
+        self._ensure_schema()
+        with self._workbook_lock():
+            with self.pool.connection() as conn:
+                updates = conn.execute(
+                    "SELECT candidate_name, dimension, score FROM pending_score_updates"
+                ).fetchall()
+            if not updates:
+                return 0
+
+            if not self.workbook_path.exists():
+                print(f"候选人文件不存在: {self.workbook_path}，评分保留在缓冲中")
+                return 0
+
+            df = pd.read_excel(self.workbook_path)
+            names = set(df['姓名'])
+            applied = []
+            changed = False
+            for candidate_name, dimension, score in updates:
+                if candidate_name not in names:
+                    print(f"未找到候选人: {candidate_name}，丢弃 {dimension} 评分")
+                else:
+                    df.loc[df['姓名'] == candidate_name, dimension] = score
+                    changed = True
+                applied.append((candidate_name, dimension, score))
+
+            if changed:
+                # 先写临时文件再替换，读取方不会看到写了一半的工作簿
+                temp_path = self.workbook_path.with_name(f".{self.workbook_path.name}.tmp")
+                df.to_excel(temp_path, index=False, engine='openpyxl')
+                os.replace(temp_path, self.workbook_path)
+
+            # 只删除已写入的值；写入期间被再次更新的评分留到下一批
+            with self.pool.connection() as conn:
+                conn.executemany('''
+                    DELETE FROM pending_score_updates
+                    WHERE candidate_name = ? AND dimension = ? AND score IS ?
+                ''', applied)
+                conn.commit()
+
+            self._flushes += 1
+            self._flushed_updates += len(applied)
+            self._last_flush_at = time.time()
+            print(f"评分写回工作簿: {len(applied)} 条")
+            return len(applied)
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+                self._last_error = None
+            except Exception as e:
+                self._last_error = str(e)
+                print(f"评分写回工作簿失败: {e}")
+
+    def start(self):
+        """启动后台写回线程（每个进程只有一个写线程）"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="score-buffer-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程并写回剩余评分"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"评分写回工作簿失败: {e}")
+
+    def stats(self):
+        """写缓冲状态"""
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            pending = conn.execute("SELECT COUNT(*) FROM pending_score_updates").fetchone()[0]
+        return {
+            "pending_updates": pending,
+            "recorded_updates": self._recorded,
+            "flushes": self._flushes,
+            "flushed_updates": self._flushed_updates,
+            "last_flush_at": self._last_flush_at,
+            "last_error": self._last_error,
+            "flush_interval_seconds": self.flush_interval
+        }
+
+
+# 创建全局实例
+score_buffer = ScoreWriteBuffer()
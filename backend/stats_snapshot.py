@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+招聘统计快照 - AI助手使用的数据上下文预先汇总后保存在数据库中
+每个数据源（JSON、职位/候选人工作簿、评分CSV、数据库评分表）有自己的指纹：
+文件使用修改时间和大小，数据库评分表使用触发器维护的版本号。
+只有指纹变化的数据源会重新读取，其余数据源复用已保存的解析结果；
+快照保存在SQLite中，多个工作进程共享，数据未变化时直接返回内存中的快照
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from db_pool import db_pool
+from migrations import run_migrations
+
+ROOT = Path(__file__).parent.parent
+
+
+def _records(df):
+    return df.to_dict('records')
+
+
+class StatsSnapshot:
+    """按数据源增量刷新的统计快照"""
+
+    def __init__(self, build, name="recruitment", root=None, pool=None):
+        """build(data) -> (带 statistics 的数据, 数据摘要)"""
+        self.build = build
+        self.name = name
+        self.pool = pool or db_pool
+        root = Path(root or ROOT)
+
+        # 数据源: (指纹依据的文件, 读取函数)；文件为None的数据源使用数据库版本号
+        self.sources = {
+            "real_data": (root / "frontend" / "data" / "real_data.json", self._load_real_data),
+            "job_excel": (root / "resouse" / "job.xlsx", self._load_job_excel),
+            "candidate_excel": (root / "resouse" / "candidate.xlsx", self._load_candidate_excel),
+            "csv_evaluations": (root / "frontend" / "data" / "candidate_evaluations.csv", self._load_csv_evaluations),
+            "db_evaluations": (None, self._load_db_evaluations),
+        }
+
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._memory = None  # (指纹, 数据, 摘要)
+
+        self._memory_hits = 0
+        self._shared_hits = 0
+        self._rebuilds = 0
+        self._source_reloads = 0
+        self._last_build_ms = None
+
+    def _ensure_schema(self):
+        if not self._schema_ready:
+            with self.pool.connection() as conn:
+                run_migrations(conn)
+            self._schema_ready = True
+
+    # 数据源读取
+
+    def _load_real_data(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            real_data = json.load(f)
+        return {'jobs': real_data.get('jobs', []), 'candidates': real_data.get('candidates', [])}
+
+    def _load_job_excel(self, path):
+        return {'job_excel': _records(pd.read_excel(path))}
+
+    def _load_candidate_excel(self, path):
+        return {'candidate_excel': _records(pd.read_excel(path))}
+
+    def _load_csv_evaluations(self, path):
+        return {'csv_evaluations': _records(pd.read_csv(path, encoding='utf-8'))}
+
+    def _load_db_evaluations(self, path):
+        with self.pool.connection() as conn:
+            rows = conn.execute('''
+                SELECT candidate_id, knowledge, skill, ability, personality,
+                       motivation, value, total_score, updated_at
+                FROM candidate_evaluations
+                ORDER BY updated_at DESC
+            ''').fetchall()
+        keys = ('candidate_id', 'knowledge', 'skill', 'ability', 'personality',
+                'motivation', 'value', 'total_score', 'updated_at')
+        return {'db_evaluations': [dict(zip(keys, row)) for row in rows], 'interview_sessions': []}
+
+    @staticmethod
+    def _empty_section(source):
+        return {
+            "real_data": {'jobs': [], 'candidates': []},
+            "job_excel": {'job_excel': []},
+            "candidate_excel": {'candidate_excel': []},
+            "csv_evaluations": {'csv_evaluations': []},
+            "db_evaluations": {'db_evaluations': [], 'interview_sessions': []},
+        }[source]
+
+    # 指纹
+
+    def _fingerprints(self, conn):
+        """各数据源当前的指纹：只需要 stat() 和一次主键查询"""
+        fingerprints = {}
+        for source, (path, _) in self.sources.items():
+            if path is None:
+                row = conn.execute(
+                    "SELECT version FROM stats_source_versions WHERE source = 'candidate_evaluations'"
+                ).fetchone()
+                fingerprints[source] = f"v{row[0] if row else 0}"
+            else:
+                try:
+                    stat = path.stat()
+                    fingerprints[source] = f"{stat.st_mtime_ns}:{stat.st_size}"
+                except FileNotFoundError:
+                    fingerprints[source] = "missing"
+        return fingerprints
+
+    def _read_source(self, source, fingerprint):
+        """读取单个数据源；统一经过JSON往返，新读取和从数据库恢复的结果类型一致"""
+        path, loader = self.sources[source]
+        if fingerprint == "missing":
+            return self._empty_section(source)
+        try:
+            section = loader(path)
+        except Exception as e:
+            print(f"读取数据源 {source} 失败: {e}")
+            return self._empty_section(source)
+        return json.loads(json.dumps(section, ensure_ascii=False, default=str))
+
+    # 快照
+
+    def get(self):
+        """返回 (招聘数据, 数据摘要)；只有数据源变化时才重新汇总"""
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            fingerprints = self._fingerprints(conn)
+            combined = json.dumps(fingerprints, sort_keys=True)
+
+            memory = self._memory
+            if memory and memory[0] == combined:
+                self._memory_hits += 1
+                return memory[1], memory[2]
+
+            with self._lock:
+                # 其他进程已经汇总过相同数据时直接使用
+                row = conn.execute(
+                    "SELECT fingerprint, data_json, summary FROM stats_snapshots WHERE name = ?",
+                    (self.name,)
+                ).fetchone()
+                if row and row[0] == combined:
+                    data = json.loads(row[1])
+                    self._memory = (combined, data, row[2])
+                    self._shared_hits += 1
+                    return data, row[2]
+
+                return self._rebuild(conn, fingerprints, combined)
+
+    def _rebuild(self, conn, fingerprints, combined):
+        start = time.perf_counter()
+        stored = {
+            source: (fingerprint, data_json)
+            for source, fingerprint, data_json in conn.execute(
+                "SELECT source, fingerprint, data_json FROM stats_sources"
+            )
+        }
+
+        data = {}
+        for source, fingerprint in fingerprints.items():
+            if source in stored and stored[source][0] == fingerprint:
+                section = json.loads(stored[source][1])
+            else:
+                section = self._read_source(source, fingerprint)
+                conn.execute('''
+                    INSERT OR REPLACE INTO stats_sources (source, fingerprint, data_json, loaded_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (source, fingerprint, json.dumps(section, ensure_ascii=False), time.time()))
+                self._source_reloads += 1
+                print(f"统计快照：重新读取数据源 {source}")
+            data.update(section)
+
+        data, summary = self.build(data)
+        data = json.loads(json.dumps(data, ensure_ascii=False, default=str))
+        conn.execute('''
+            INSERT OR REPLACE INTO stats_snapshots (name, fingerprint, data_json, summary, computed_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (self.name, combined, json.dumps(data, ensure_ascii=False), summary, time.time()))
+        conn.commit()
+
+        self._memory = (combined, data, summary)
+        self._rebuilds += 1
+        self._last_build_ms = round((time.perf_counter() - start) * 1000, 1)
+        return data, summary
+
+    def invalidate(self):
+        """丢弃所有已保存的解析结果和快照，下次读取时全部重新汇总"""
+        self._ensure_schema()
+        with self._lock:
+            with self.pool.connection() as conn:
+                conn.execute("DELETE FROM stats_sources")
+                conn.execute("DELETE FROM stats_snapshots WHERE name = ?", (self.name,))
+                conn.commit()
+            self._memory = None
+
+    def stats(self):
+        """快照命中统计"""
+        return {
+            "memory_hits": self._memory_hits,
+            "shared_hits": self._shared_hits,
+            "rebuilds": self._rebuilds,
+            "source_reloads": self._source_reloads,
+            "last_build_ms": self._last_build_ms
+        }
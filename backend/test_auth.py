@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+测试用户认证：密码哈希在线程池中计算且不阻塞事件循环、旧格式哈希可登录并自动升级、恒定时间比较、已验证令牌缓存
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import jwt
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from auth import PasswordHasher, TokenService
+from db_pool import SQLitePool
+from migrations import run_migrations
+
+
+def test_hash_and_verify():
+    """哈希记录迭代次数；旧格式和迭代次数变化的哈希需要重新计算"""
+    hasher = PasswordHasher(iterations=1000, workers=2)
+    stored = hasher.hash_sync("secret")
+    assert stored.startswith("pbkdf2_sha256$1000$")
+    assert hasher.verify_sync("secret", stored) == (True, False)
+    assert hasher.verify_sync("wrong", stored) == (False, False)
+
+    legacy = "a" * 32 + hashlib.pbkdf2_hmac("sha256", b"secret", b"a" * 32, 100000).hex()
+    assert hasher.verify_sync("secret", legacy) == (True, True)
+    assert PasswordHasher(iterations=2000, workers=1).verify_sync("secret", stored) == (True, True)
+    assert hasher.verify_sync("secret", "pbkdf2_sha256$broken") == (False, False)
+    assert hasher.stats()["rejected"] == 2
+
+
+def test_hashing_does_not_block_event_loop():
+    """计算哈希期间事件循环仍在运行其他任务"""
+    hasher = PasswordHasher(iterations=400000, workers=1)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        stored = await hasher.hash("secret")
+        elapsed = time.perf_counter() - start
+        task.cancel()
+        return stored, ticks, elapsed
+
+    stored, ticks, elapsed = asyncio.run(run())
+    hasher.shutdown()
+    assert stored.startswith("pbkdf2_sha256$400000$")
+    assert ticks > 0
+    print(f"✅ 哈希耗时 {elapsed * 1000:.0f}ms，期间事件循环运行了 {ticks} 次其他任务")
+
+
+def test_token_verify_cache():
+    """同一令牌第二次验证命中缓存；过期和被篡改的令牌被拒绝"""
+    tokens = TokenService(secret_key="test-secret", expire_days=1, cache_size=2)
+    token = tokens.issue(1, "a@example.com", "admin")
+    assert tokens.verify(token)["email"] == "a@example.com"
+    assert tokens.verify(token)["user_type"] == "admin"
+    assert tokens.stats()["hits"] == 1 and tokens.stats()["misses"] == 1
+
+    expired = jwt.encode({"user_id": 1, "exp": datetime.utcnow() - timedelta(seconds=1)}, "test-secret",
+                         algorithm="HS256")
+    for bad in (expired, token[:-2] + "xx"):
+        try:
+            tokens.verify(bad)
+            assert False, "无效令牌应被拒绝"
+        except jwt.InvalidTokenError:
+            pass
+    assert tokens.stats()["invalid"] == 2
+
+    for user_id in (2, 3):
+        tokens.verify(tokens.issue(user_id, f"{user_id}@example.com", "candidate"))
+    assert tokens.stats()["cached_tokens"] == 2
+
+
+def test_login_upgrades_legacy_hash():
+    """旧格式哈希的用户可以登录，登录后哈希升级为新格式；令牌可通过 /api/auth/verify 验证"""
+    import main
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "auth.db"), pool_size=2)
+        legacy = "b" * 32 + hashlib.pbkdf2_hmac("sha256", b"secret", b"b" * 32, 100000).hex()
+        with pool.connection() as conn:
+            run_migrations(conn)
+            conn.execute("INSERT INTO users (name, email, password_hash, user_type) VALUES (?, ?, ?, ?)",
+                         ("管理员", "admin@example.com", legacy, "admin"))
+            conn.commit()
+
+        originals = (main.db_pool, main.password_hasher)
+        main.db_pool, main.password_hasher = pool, PasswordHasher(iterations=1000, workers=2)
+
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                wrong = await client.post("/api/auth/login", json={
+                    "email": "admin@example.com", "password": "wrong", "user_type": "admin"})
+                login = await client.post("/api/auth/login", json={
+                    "email": "admin@example.com", "password": "secret", "user_type": "admin"})
+                again = await client.post("/api/auth/login", json={
+                    "email": "admin@example.com", "password": "secret", "user_type": "admin"})
+                token = login.json()["token"]
+                verified = await client.get("/api/auth/verify", headers={"Authorization": f"Bearer {token}"})
+                missing = await client.get("/api/auth/verify")
+                return wrong, login, again, verified, missing
+
+        try:
+            wrong, login, again, verified, missing = asyncio.run(run())
+            assert wrong.status_code == 401
+            assert login.status_code == 200 and again.status_code == 200
+            assert verified.status_code == 200 and verified.json()["user"]["email"] == "admin@example.com"
+            assert missing.status_code == 401
+
+            with pool.connection() as conn:
+                stored = conn.execute("SELECT password_hash FROM users").fetchone()[0]
+            assert stored.startswith("pbkdf2_sha256$1000$")
+            assert main.password_hasher.stats()["rehashed"] == 1
+        finally:
+            main.password_hasher.shutdown()
+            main.db_pool, main.password_hasher = originals
+            pool.close_all()
+
+
+if __name__ == "__main__":
+    test_hash_and_verify()
+    test_hashing_does_not_block_event_loop()
+    test_token_verify_cache()
+    test_login_upgrades_legacy_hash()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+测试批量评分：整场面试在一次请求中评分、超出预算时分批、未解析的题目逐题评分、回答和评分在同一事务中保存
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import llm_service as llm_service_module
+from db_pool import SQLitePool
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway
+from migrations import run_migrations
+from test_llm_gateway import _start_server
+
+
+class MockBatchHandler(BaseHTTPRequestHandler):
+    """
+    模拟 /chat/completions：批量请求按题目编号返回评分（回答中含 SKIP 的题目不返回），
+    单题请求返回固定评分
+    """
+
+    prompts = []
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        prompt = json.loads(self.rfile.read(length))["messages"][-1]["content"]
+        MockBatchHandler.prompts.append(prompt)
+
+        blocks = re.findall(r"### 编号 (\d+)\n.*?候选人回答：(.*?)\n", prompt, re.DOTALL)
+        if blocks:
+            content = json.dumps({"evaluations": [
+                {"id": int(number), "score": 80 + int(number) % 10, "feedback": f"第{number}题回答完整",
+                 "strengths": ["逻辑清晰"], "improvements": []}
+                for number, answer in blocks if "SKIP" not in answer
+            ]}, ensure_ascii=False)
+        else:
+            content = json.dumps({"score": 60, "feedback": "单题评分", "strengths": [], "improvements": []},
+                                 ensure_ascii=False)
+
+        body = json.dumps({
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "mock-model",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20}
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+DIMENSIONS = ["Knowledge", "Skill", "Ability", "Personality", "Motivation"]
+
+
+def _answers(count, skip=()):
+    return [
+        {
+            "question_id": i + 1,
+            "question": f"问题{i + 1}：请介绍你的项目经验",
+            "answer": ("SKIP " if i in skip else "") + f"我负责了第{i + 1}个项目的后端开发",
+            "dimension": DIMENSIONS[i % len(DIMENSIONS)]
+        }
+        for i in range(count)
+    ]
+
+
+def _with_gateway(run):
+    MockBatchHandler.prompts = []
+    server, base_url = _start_server(MockBatchHandler)
+    gateway = LLMGateway(api_key="test", base_url=base_url, model="mock-model", max_concurrency=4,
+                         timeout=10, cache=LLMResponseCache(enabled=False))
+    original = llm_service_module.llm_gateway
+    llm_service_module.llm_gateway = gateway
+
+    async def wrapped():
+        try:
+            return await run()
+        finally:
+            await gateway.close()
+
+    try:
+        return asyncio.run(wrapped())
+    finally:
+        llm_service_module.llm_gateway = original
+        server.shutdown()
+
+
+def test_one_request_per_interview_with_fallback():
+    """10 道题一次批量请求；未返回评分的题目再单独评分"""
+    service = llm_service_module.ErnieLLMService()
+    answers = _answers(10, skip={3})
+
+    results = _with_gateway(lambda: service.evaluate_answers_batch(answers))
+    assert len(MockBatchHandler.prompts) == 2
+    assert results[0] == {"score": 81, "feedback": "第1题回答完整", "strengths": ["逻辑清晰"],
+                          "improvements": [], "batched": True}
+    assert results[3]["score"] == 60 and results[3]["batched"] is False
+    assert all(r["batched"] for i, r in enumerate(results) if i != 3)
+    print("✅ 10 道题 1 次批量请求 + 1 次逐题评分")
+
+
+def test_batches_split_by_token_budget():
+    """超出token预算时分成多个请求，结果顺序与提交顺序一致"""
+    service = llm_service_module.ErnieLLMService()
+    answers = _answers(6)
+    batches = service._pack_answers(answers, token_budget=400)
+    assert len(batches) > 1 and sum(batches, []) == list(range(6))
+
+    results = _with_gateway(lambda: service.evaluate_answers_batch(answers, token_budget=400))
+    assert len(MockBatchHandler.prompts) == len(batches)
+    assert [r["feedback"] for r in results] == [f"第{i}题回答完整" for i in range(1, 7)]
+
+
+def test_endpoint_saves_answers_in_one_transaction():
+    """批量接口保存所有回答，评分进入写缓冲"""
+    import main
+    from score_buffer import score_buffer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "batch.db"), pool_size=2)
+        with pool.connection() as conn:
+            run_migrations(conn)
+            conn.execute('''
+                INSERT INTO interview_session_questions (session_id, candidate_name, candidate_email, questions_json)
+                VALUES ('s1', '张三', 'zhangsan@example.com', '[]')
+            ''')
+            conn.commit()
+
+        originals = (main.db_pool, score_buffer.pool)
+        main.db_pool, score_buffer.pool = pool, pool
+
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post("/api/interview/s1/answers", json={"answers": _answers(5)})
+
+        try:
+            response = _with_gateway(run)
+            assert response.status_code == 200
+            data = response.json()
+            assert data["batched"] == 5 and [e["question_id"] for e in data["evaluations"]] == [1, 2, 3, 4, 5]
+
+            with pool.connection() as conn:
+                saved = conn.execute(
+                    "SELECT question_id, score FROM interview_answers WHERE session_id = 's1' ORDER BY question_id"
+                ).fetchall()
+            assert saved == [(1, 81), (2, 82), (3, 83), (4, 84), (5, 85)]
+            assert score_buffer.pending_scores("张三")["张三"]["Knowledge"] == 81
+        finally:
+            main.db_pool, score_buffer.pool = originals
+            pool.close_all()
+
+
+def test_endpoint_rejects_incomplete_answers_before_scoring():
+    """缺少维度、题目或回答时返回400，不调用大模型也不保存任何回答"""
+    import main
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "batch.db"), pool_size=2)
+        with pool.connection() as conn:
+            run_migrations(conn)
+
+        answers = _answers(3)
+        del answers[1]["dimension"]
+        original = main.db_pool
+        main.db_pool = pool
+
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post("/api/interview/s1/answers", json={"answers": answers})
+
+        try:
+            response = _with_gateway(run)
+            assert response.status_code == 400
+            assert "第2个回答" in response.json()["detail"] and "dimension" in response.json()["detail"]
+            assert MockBatchHandler.prompts == []
+            with pool.connection() as conn:
+                assert conn.execute("SELECT COUNT(*) FROM interview_answers").fetchone()[0] == 0
+        finally:
+            main.db_pool = original
+            pool.close_all()
+
+
+if __name__ == "__main__":
+    test_one_request_per_interview_with_fallback()
+    test_batches_split_by_token_budget()
+    test_endpoint_saves_answers_in_one_transaction()
+    test_endpoint_rejects_incomplete_answers_before_scoring()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+测试候选人面试数据批量聚合与旧的逐行查询结果一致
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_candidates import build_dataset, legacy_enrich_candidates
+from candidate_aggregates import attach_latest_questions, enrich_candidates_with_interviews
+
+
+def _compare(db_path, candidates):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        legacy = legacy_enrich_candidates(cursor, copy.deepcopy(candidates))
+        batch = enrich_candidates_with_interviews(cursor, copy.deepcopy(candidates))
+    finally:
+        conn.close()
+    return legacy, batch
+
+
+def test_matches_legacy_on_generated_data():
+    """随机生成的数据集上两种实现输出相同的JSON"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        candidates = build_dataset(db_path, 200, seed=7)
+        legacy, batch = _compare(db_path, candidates)
+        assert json.dumps(legacy, ensure_ascii=False) == json.dumps(batch, ensure_ascii=False)
+        print(f"✅ {len(candidates)} 个候选人结果一致")
+
+
+def test_matches_legacy_on_edge_cases():
+    """姓名/邮箱分别匹配、两类会话都有回答、候选人缺少维度字段等情况"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        build_dataset(db_path, 0)
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        # 张三：两类会话都有回答，普通会话更新
+        cursor.execute("INSERT INTO candidates (name, email) VALUES ('张三', 'zs@example.com')")
+        zs_id = cursor.lastrowid
+        cursor.execute("INSERT INTO interview_session_questions (session_id, candidate_name, candidate_email, questions_json) VALUES ('q1', '张三', 'zs@example.com', '[]')")
+        cursor.execute("INSERT INTO interview_sessions (candidate_id, session_id) VALUES (?, 's1')", (zs_id,))
+        cursor.executemany(
+            "INSERT INTO interview_answers (session_id, question_id, dimension, score, created_at) VALUES (?, ?, ?, ?, ?)",
+            [('q1', 1, 'Knowledge', 80, '2025-01-01 10:00:00'),
+             ('q1', 2, 'Skill', None, '2025-01-01 10:05:00'),
+             ('s1', 1, 'Knowledge', 60, '2025-01-02 09:00:00'),
+             ('s1', 2, 'Value', 91, '2025-01-02 09:10:00'),
+             ('s1', 3, 'Unknown', 50, '2025-01-02 09:20:00')]
+        )
+
+        # 李四：只有未回答的会话；面试问题只能按邮箱匹配
+        cursor.execute("INSERT INTO interview_session_questions (session_id, candidate_name, candidate_email, questions_json) VALUES ('q2', '李四', 'ls@example.com', '[]')")
+        cursor.execute("INSERT INTO interview_questions (candidate_name, candidate_email, questions_json, strategy, updated_at) VALUES ('别名', 'ls@example.com', '[{\"id\": 1}]', '按邮箱', '2025-03-01 00:00:00')")
+
+        # 王五：姓名和邮箱各匹配一条问题记录，取更新时间较新的
+        cursor.execute("INSERT INTO interview_questions (candidate_name, candidate_email, questions_json, strategy, updated_at) VALUES ('王五', 'other@example.com', '[{\"id\": 2}]', '按姓名', '2025-03-02 00:00:00')")
+        cursor.execute("INSERT INTO interview_questions (candidate_name, candidate_email, questions_json, strategy, updated_at) VALUES ('别名2', 'ww@example.com', '[{\"id\": 3}]', '按邮箱', '2025-03-05 00:00:00')")
+        cursor.execute("INSERT INTO interview_questions (candidate_name, candidate_email, questions_json, strategy, created_at, updated_at) VALUES (NULL, NULL, NULL, '空记录', '2025-03-09 00:00:00', NULL)")
+
+        conn.commit()
+        conn.close()
+
+        candidates = [
+            {"id": 1, "name": "张三", "email": "zs@example.com", "status": "待面试", "score": None, "interview_date": "2025-01-01"},
+            {"id": 2, "name": "李四", "email": "ls@example.com", "status": "面试中", "score": None, "interview_date": "2025-01-01",
+             "knowledge_score": 70.0},
+            {"id": 3, "name": "王五", "email": "ww@example.com", "status": "待面试", "score": None, "interview_date": "2025-01-01"},
+            {"id": 4, "name": "赵六", "email": None, "status": "待面试", "score": None, "interview_date": "2025-01-01"},
+        ]
+
+        legacy, batch = _compare(db_path, candidates)
+        assert json.dumps(legacy, ensure_ascii=False) == json.dumps(batch, ensure_ascii=False)
+        assert batch[0]["db_interview"] is True and batch[0]["interview_date"] == "2025-01-02"
+        assert batch[1]["interview_strategy"] == "按邮箱"
+        assert batch[2]["interview_strategy"] == "按邮箱"
+        assert batch[3]["has_questions"] is False
+        print("✅ 边界情况结果一致")
+
+
+def test_same_last_answer_time_picks_smallest_session():
+    """多个会话最后回答时间相同时（同表或跨表）两种实现都取 session_id 最小的会话"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        build_dataset(db_path, 0)
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        # 张三：同表两个会话时间相同，session_id 较大的先插入
+        for session_id in ("q-b", "q-a"):
+            cursor.execute("INSERT INTO interview_session_questions (session_id, candidate_name, candidate_email, questions_json) VALUES (?, '张三', 'zs@example.com', '[]')", (session_id,))
+        # 李四：两类会话各一个，时间相同
+        cursor.execute("INSERT INTO candidates (name, email) VALUES ('李四', 'ls@example.com')")
+        cursor.execute("INSERT INTO interview_sessions (candidate_id, session_id) VALUES (?, 'a-session')", (cursor.lastrowid,))
+        cursor.execute("INSERT INTO interview_session_questions (session_id, candidate_name, candidate_email, questions_json) VALUES ('b-session', '李四', 'ls@example.com', '[]')")
+        cursor.executemany(
+            "INSERT INTO interview_answers (session_id, question_id, dimension, score, created_at) VALUES (?, 1, 'Skill', ?, '2025-01-05 10:00:00')",
+            [('q-b', 90), ('q-a', 60), ('b-session', 95), ('a-session', 55)]
+        )
+        conn.commit()
+        conn.close()
+
+        candidates = [
+            {"id": 1, "name": "张三", "email": "zs@example.com", "status": "待面试", "score": None, "interview_date": None},
+            {"id": 2, "name": "李四", "email": "ls@example.com", "status": "待面试", "score": None, "interview_date": None},
+        ]
+        legacy, batch = _compare(db_path, candidates)
+        assert json.dumps(legacy, ensure_ascii=False) == json.dumps(batch, ensure_ascii=False)
+        assert batch[0]["score"] == 60 and batch[1]["score"] == 55
+
+
+def test_candidates_do_not_share_question_lists():
+    """同名同邮箱的候选人各自得到独立的问题列表，修改其中一个不影响另一个"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        build_dataset(db_path, 0)
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO interview_questions (candidate_name, candidate_email, questions_json, strategy, updated_at) VALUES ('张三', 'zs@example.com', '[{\"id\": 1}]', '默认', '2025-03-01 00:00:00')")
+
+        candidates = [{"id": i, "name": "张三", "email": "zs@example.com"} for i in (1, 2)]
+        attach_latest_questions(cursor, candidates)
+        conn.close()
+
+        candidates[0]["interview_questions"][0]["id"] = 99
+        candidates[0]["interview_questions"].append({"id": 2})
+        assert candidates[1]["interview_questions"] == [{"id": 1}]
+
+
+if __name__ == "__main__":
+    test_matches_legacy_on_generated_data()
+    test_matches_legacy_on_edge_cases()
+    test_same_last_answer_time_picks_smallest_session()
+    test_candidates_do_not_share_question_lists()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+测试候选人列表的筛选、排序、分页和字段投影：结果与补充全部候选人后再处理一致，且只为当前页查询面试问题
+"""
+
+import asyncio
+import copy
+import os
+import sqlite3
+import sys
+import tempfile
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import candidate_listing
+from benchmark_candidates import build_dataset
+from candidate_aggregates import enrich_candidates_with_interviews
+from candidate_listing import list_candidates
+from db_pool import SQLitePool
+from migrations import run_migrations
+
+POSITIONS = ["Python工程师", "产品经理", "新媒体运营"]
+
+
+def _dataset(tmp):
+    db_path = os.path.join(tmp, "listing.db")
+    candidates = build_dataset(db_path, 120, seed=3)
+    for candidate in candidates:
+        candidate["position"] = POSITIONS[candidate["id"] % 3]
+    return db_path, candidates
+
+
+def _reference(conn, candidates, position=None, status=None, min_score=None, sort=None, limit=None, offset=0):
+    """参照实现：补充全部候选人后再筛选、排序、分页"""
+    result = enrich_candidates_with_interviews(conn.cursor(), copy.deepcopy(candidates))
+    if position:
+        result = [c for c in result if position in c["position"]]
+    if status:
+        result = [c for c in result if c["status"] == status]
+    if min_score is not None:
+        result = [c for c in result if c["score"] is not None and c["score"] >= min_score]
+    if sort:
+        key, descending = candidate_listing.parse_sort(sort)
+        result = candidate_listing._sort_candidates(result, key, descending)
+    return result[offset:offset + limit] if limit is not None else result[offset:], len(result)
+
+
+def test_matches_full_enrichment():
+    """各种筛选、排序、分页组合与参照实现结果一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, candidates = _dataset(tmp)
+        conn = sqlite3.connect(db_path)
+        try:
+            cases = [
+                {},
+                {"limit": 10, "offset": 5},
+                {"position": "产品", "limit": 7},
+                {"status": "已完成", "sort": "-score", "limit": 15},
+                {"min_score": 70, "sort": "interview_date", "limit": 20, "offset": 3},
+                {"position": "Python", "sort": "-name"},
+                {"offset": 500, "limit": 10},
+            ]
+            for params in cases:
+                page, total = list_candidates(conn.cursor(), copy.deepcopy(candidates), **params)
+                expected, expected_total = _reference(conn, candidates, **params)
+                assert total == expected_total, params
+                assert page == expected, params
+        finally:
+            conn.close()
+
+
+def test_questions_loaded_only_for_page_and_requested_fields():
+    """面试问题只为当前页查询；字段投影不含问题时不查询"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, candidates = _dataset(tmp)
+        conn = sqlite3.connect(db_path)
+        loaded = []
+        original = candidate_listing.attach_latest_questions
+
+        def recording(cursor, page):
+            loaded.append(len(page))
+            return original(cursor, page)
+
+        candidate_listing.attach_latest_questions = recording
+        try:
+            page, total = list_candidates(conn.cursor(), copy.deepcopy(candidates), limit=10)
+            assert loaded == [10] and total == 120
+
+            page, _ = list_candidates(conn.cursor(), copy.deepcopy(candidates), limit=5, fields="name,score,status")
+            assert loaded == [10]
+            assert all(set(c) == {"id", "name", "score", "status"} for c in page)
+        finally:
+            candidate_listing.attach_latest_questions = original
+            conn.close()
+
+        try:
+            list_candidates(None, [], sort="salary")
+            assert False, "不支持的排序字段应报错"
+        except ValueError:
+            pass
+
+
+def test_endpoint_pagination_headers():
+    """不带参数时返回全部候选人；分页时 X-Total-Count 为筛选后的总数；不支持的排序返回 400"""
+    import main
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            full = await client.get("/api/candidates")
+            page = await client.get("/api/candidates", params={"limit": 3, "offset": 1, "fields": "id,name"})
+            bad = await client.get("/api/candidates", params={"sort": "salary"})
+            return full, page, bad
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "endpoint.db"), pool_size=2)
+        with pool.connection() as conn:
+            run_migrations(conn)
+        original = main.db_pool
+        main.db_pool = pool
+        try:
+            full, page, bad = asyncio.run(run())
+        finally:
+            main.db_pool = original
+            pool.close_all()
+
+    assert full.status_code == 200 and isinstance(full.json(), list)
+    assert full.headers["x-total-count"] == str(len(full.json()))
+    assert page.json() == [{"id": c["id"], "name": c["name"]} for c in full.json()[1:4]]
+    assert page.headers["x-total-count"] == str(len(full.json()))
+    assert bad.status_code == 400
+
+
+if __name__ == "__main__":
+    test_matches_full_enrichment()
+    test_questions_loaded_only_for_page_and_requested_fields()
+    test_endpoint_pagination_headers()
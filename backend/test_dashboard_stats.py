@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+测试仪表板统计：增量维护的计数与按全部候选人重新计算的结果一致，
+状态变更、回答和评分在调用方事务中更新（回滚时一并撤销），后台校正修正漂移，工作簿变化后自动重建，
+重建不在事件循环线程中执行
+"""
+
+import asyncio
+import copy
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_candidates import build_dataset
+from dashboard_stats import DashboardStats, derive_states
+from db_pool import SQLitePool
+from excel_data_loader import ExcelDataLoader, excel_loader
+from migrations import run_migrations
+
+POSITIONS = ["Python工程师", "产品经理", "新媒体运营"]
+SALARIES = ["15K", "1.2万", "面议", "18000", "未提供"]
+
+
+class WorkbookLoader(ExcelDataLoader):
+    """候选人来自内存列表的加载器，修改列表后更新版本标识模拟工作簿变化"""
+
+    def __init__(self, candidates):
+        super().__init__()
+        self.candidates = candidates
+        self.version = 1
+
+    def load_candidates(self):
+        return copy.deepcopy(self.candidates)
+
+    def candidate_source_key(self):
+        return f"v{self.version}"
+
+
+def _dataset(tmp, count=60):
+    db_path = os.path.join(tmp, "dashboard.db")
+    candidates = build_dataset(db_path, count, seed=5)
+    for candidate in candidates:
+        candidate["position"] = POSITIONS[candidate["id"] % 3]
+        candidate["expected_salary"] = SALARIES[candidate["id"] % 5]
+        candidate["created_at"] = f"2025-01-{candidate['id'] % 28 + 1:02d} 10:00:00"
+    return db_path, candidates
+
+
+def _reference(db_path, candidates):
+    """参照实现：推导全部候选人的状态和分数后按原有方式遍历计算"""
+    conn = sqlite3.connect(db_path)
+    try:
+        derived = derive_states(conn.cursor(), copy.deepcopy(candidates))
+    finally:
+        conn.close()
+    return excel_loader.get_dashboard_stats(derived)
+
+
+def _summary(stats):
+    """比较时只看被选中候选人的ID"""
+    return {
+        **stats,
+        "best_candidates": [(b["position"], b["candidate"]["id"], b["reason"]) for b in stats["best_candidates"]],
+        "lowest_salary_candidates": [
+            (c["position"], c["candidate"]["id"], c["salary_num"]) for c in stats["lowest_salary_candidates"]
+        ]
+    }
+
+
+def _setup(tmp):
+    db_path, candidates = _dataset(tmp)
+    pool = SQLitePool(db_path=db_path, pool_size=2)
+    return db_path, candidates, pool, DashboardStats(pool=pool, loader=WorkbookLoader(candidates))
+
+
+def test_read_matches_full_computation():
+    """首次读取时建立统计，结果与遍历全部候选人一致；之后读取不再重建"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, candidates, pool, stats = _setup(tmp)
+        try:
+            result = stats.read()
+            assert _summary(result) == _summary(_reference(db_path, candidates))
+            assert result["total_candidates"] == 60 and result["active_positions"] == 3
+            assert result["best_candidates"][0]["candidate"]["name"]
+
+            stats.read()
+            assert stats.stats()["reconciles"] == 1 and stats.stats()["rows_inserted"] == 60
+        finally:
+            pool.close_all()
+
+
+def test_refresh_in_caller_transaction():
+    """状态变更、回答和评分后刷新相关候选人；事务回滚时统计一并回滚"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, candidates, pool, stats = _setup(tmp)
+        try:
+            before = stats.read()
+
+            with pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO candidate_status_log (candidate_id, old_status, new_status) VALUES (1, '待面试', '面试中')"
+                )
+                stats.refresh(cursor, candidate_id=1)
+                conn.rollback()
+            assert stats.read() == before
+
+            with pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO candidate_status_log (candidate_id, old_status, new_status) VALUES (1, '待面试', '面试中')"
+                )
+                stats.refresh(cursor, candidate_id=1)
+                cursor.execute("INSERT INTO candidate_evaluations (candidate_id, total_score) VALUES (2, 99)")
+                stats.refresh(cursor, candidate_id=2)
+
+                cursor.execute("INSERT INTO interview_sessions (candidate_id, session_id) VALUES (3, 'dash-s1')")
+                cursor.execute('''
+                    INSERT INTO interview_answers (session_id, question_id, question_text, answer_text, dimension, score)
+                    VALUES ('dash-s1', 1, '问题', '回答', 'Skill', 12)
+                ''')
+                stats.refresh(cursor, candidate_name="候选人2")
+                conn.commit()
+
+            result = stats.read()
+            assert _summary(result) == _summary(_reference(db_path, candidates))
+            assert result["in_progress_interviews"] == before["in_progress_interviews"] + 1
+            best = {b["position"]: b for b in result["best_candidates"]}[candidates[1]["position"]]
+            assert best["candidate"]["id"] == 2 and best["candidate"]["score"] == 99
+            assert stats.stats()["reconciles"] == 1
+        finally:
+            pool.close_all()
+
+
+def test_reconcile_corrects_drift_and_workbook_changes():
+    """计数或行被绕过接口修改后由校正修复；工作簿变化后读取时重建"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, candidates, pool, stats = _setup(tmp)
+        try:
+            expected = stats.read()
+
+            with pool.connection() as conn:
+                conn.execute("UPDATE dashboard_counters SET total_candidates = 0, score_sum = score_sum + 7")
+                conn.execute("UPDATE dashboard_positions SET candidates = 1")
+                # 绕过接口的状态修改：触发器同步了计数，但与数据来源不一致
+                conn.execute("UPDATE dashboard_candidates SET status = '已淘汰' WHERE candidate_id = 4")
+                conn.commit()
+
+            result = stats.reconcile()
+            assert result == {"inserted": 0, "corrected": 1, "deleted": 0, "counters": 2}
+            assert stats.read() == expected
+            assert stats.reconcile() == {"inserted": 0, "corrected": 0, "deleted": 0, "counters": 0}
+
+            # 工作簿删除一个候选人、改变一个候选人的职位
+            stats.loader.candidates = [c for c in candidates if c["id"] != 5]
+            stats.loader.candidates[0] = {**stats.loader.candidates[0], "position": "数据分析师"}
+            stats.loader.version += 1
+            result = stats.read()
+            assert _summary(result) == _summary(_reference(db_path, stats.loader.candidates))
+            assert result["total_candidates"] == 59 and result["active_positions"] == 4
+            assert stats.stats()["rows_deleted"] == 1
+        finally:
+            pool.close_all()
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_workbook_change_rebuilt_by_background_thread():
+    """后台线程运行时，工作簿变化后读取立即返回上次的统计并唤醒线程重建"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, candidates, pool, _ = _setup(tmp)
+        stats = DashboardStats(pool=pool, loader=WorkbookLoader(candidates), reconcile_interval=3600)
+        stats.start()
+        try:
+            _wait_for(lambda: stats.stats()["reconciles"] == 1)
+            before = stats.read()
+
+            stats.loader.candidates = candidates[:-1]
+            stats.loader.version += 1
+            assert stats.read() == before
+            assert stats.stats()["stale_reads"] == 1
+
+            _wait_for(lambda: stats.stats()["reconciles"] == 2)
+            assert stats.read()["total_candidates"] == before["total_candidates"] - 1
+        finally:
+            stats.stop()
+            pool.close_all()
+        assert not stats.stats()["running"]
+
+
+def test_endpoints_update_dashboard():
+    """修改候选人状态后仪表板接口立即反映变化"""
+    import main
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "endpoint.db"), pool_size=2)
+        with pool.connection() as conn:
+            run_migrations(conn)
+        stats = DashboardStats(pool=pool, loader=excel_loader)
+        candidate = excel_loader.load_candidates()[0]
+
+        # 首次读取时的重建在线程池中执行，不占用事件循环线程
+        reconcile_threads = []
+        original_reconcile = stats.reconcile
+
+        def recording_reconcile():
+            reconcile_threads.append(threading.get_ident())
+            return original_reconcile()
+
+        stats.reconcile = recording_reconcile
+        loop_threads = []
+
+        async def run():
+            loop_threads.append(threading.get_ident())
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                before = (await client.get("/api/dashboard/stats")).json()
+                update = await client.put(f"/api/candidates/{candidate['id']}/status", json={"status": "面试中"})
+                after = (await client.get("/api/dashboard/stats")).json()
+                return before, update, after
+
+        original_pool, original_stats = main.db_pool, main.dashboard_stats
+        main.db_pool, main.dashboard_stats = pool, stats
+        try:
+            before, update, after = asyncio.run(run())
+        finally:
+            main.db_pool, main.dashboard_stats = original_pool, original_stats
+            pool.close_all()
+
+    assert update.status_code == 200
+    assert before["total_candidates"] == after["total_candidates"] == len(excel_loader.load_candidates())
+    expected = before["in_progress_interviews"] + (0 if candidate["status"] == "面试中" else 1)
+    assert after["in_progress_interviews"] == expected
+    assert stats.stats()["refreshes"] == 1 and stats.stats()["reconciles"] == 1
+    assert len(reconcile_threads) == 1 and reconcile_threads[0] != loop_threads[0]
+
+
+if __name__ == "__main__":
+    test_read_matches_full_computation()
+    test_refresh_in_caller_transaction()
+    test_reconcile_corrects_drift_and_workbook_changes()
+    test_workbook_change_rebuilt_by_background_thread()
+    test_endpoints_update_dashboard()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+测试SQLite连接池
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_pool import SQLitePool
+
+
+def test_pragmas_and_reuse():
+    """连接启用WAL等PRAGMA，归还后被复用"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "pool.db"), pool_size=2, busy_timeout_ms=3000)
+
+        conn = pool.get_connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 3000
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        conn.close()
+        conn.close()  # 重复关闭不会重复放回连接池
+
+        again = pool.get_connection()
+        assert again is conn
+        other = pool.get_connection()
+        assert other is not conn
+        again.close()
+        other.close()
+        assert pool.stats()["created_connections"] == 2
+
+        pool.close_all()
+        print("✅ PRAGMA设置和连接复用正常")
+
+
+def test_uncommitted_work_is_rolled_back():
+    """归还连接时回滚未提交的事务，不会泄漏给下一个使用者"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "pool.db"), pool_size=1)
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE t (v INTEGER)")
+            conn.commit()
+            conn.execute("INSERT INTO t VALUES (1)")
+
+        with pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+        pool.close_all()
+        print("✅ 未提交事务已回滚")
+
+
+def test_concurrent_writers():
+    """多线程同时写入不会出现 database is locked"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "pool.db"), pool_size=4)
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE answers (session_id TEXT, score INTEGER)")
+            conn.commit()
+
+        errors = []
+
+        def writer(n):
+            try:
+                for i in range(50):
+                    conn = pool.get_connection()
+                    try:
+                        conn.execute("INSERT INTO answers VALUES (?, ?)", (f"s{n}", i))
+                        conn.commit()
+                        conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+                    finally:
+                        conn.close()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors, errors
+        with pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] == 400
+        pool.close_all()
+        print("✅ 并发写入正常")
+
+
+if __name__ == "__main__":
+    test_pragmas_and_reuse()
+    test_uncommitted_work_is_rolled_back()
+    test_concurrent_writers()
@@ -3,6 +3,7 @@
 测试百度文心大模型集成
 """
 
+import asyncio
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -26,9 +27,9 @@ def test_llm_service():
     job_description = "招聘Python后端开发工程师，要求熟悉Web开发框架，有团队协作经验。"
     
     try:
-        result = llm_service.generate_interview_questions(
+        result = asyncio.run(llm_service.generate_interview_questions(
             candidate_info, resume_text, job_description
-        )
+        ))
         
         print("✅ LLM服务测试成功!")
         print(f"📝 生成了 {len(result.get('questions', []))} 个问题")
@@ -49,7 +50,7 @@ def test_ai_chat_service():
     print("\n🧪 测试AI聊天服务...")
     
     try:
-        result = ai_chat_service.chat_with_ai("请分析一下当前的招聘数据概况")
+        result = asyncio.run(ai_chat_service.chat_with_ai("请分析一下当前的招聘数据概况"))
         
         print("✅ AI聊天服务测试成功!")
         print(f"📝 AI回复预览: {result.get('response', '')[:100]}...")
@@ -69,7 +70,7 @@ def test_answer_evaluation():
         answer = "我有3年的Python开发经验，主要使用Django框架开发Web应用，参与过电商平台的后端开发。"
         dimension = "Knowledge"
         
-        result = llm_service.evaluate_answer(question, answer, dimension)
+        result = asyncio.run(llm_service.evaluate_answer(question, answer, dimension))
         
         print("✅ 回答评估测试成功!")
         print(f"📊 评分: {result.get('score', 0)}分")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+测试Excel解析缓存：命中、副本隔离和工作簿变化后自动失效
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from excel_data_loader import ExcelDataLoader
+
+
+def _write_candidates(path, names):
+    pd.DataFrame({
+        "姓名": names,
+        "邮箱": [f"{i}@example.com" for i in range(len(names))],
+        "岗位名称": ["Python工程师服务器端开发"] * len(names),
+        "Knowledge": [80] * len(names),
+    }).to_excel(path, index=False)
+
+
+def _loader(tmp):
+    loader = ExcelDataLoader()
+    loader.base_path = Path(tmp)
+    loader.candidate_file = Path(tmp) / "candidate.xlsx"
+    loader.job_file = Path(tmp) / "job.xlsx"
+    return loader
+
+
+def test_cache_hit_and_copies():
+    """第二次读取命中缓存，修改返回结果不影响缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = _loader(tmp)
+        _write_candidates(loader.candidate_file, ["张三", "李四"])
+
+        first = loader.load_candidates()
+        first[0]["name"] = "被修改"
+        first.append({"name": "多出来的"})
+
+        second = loader.load_candidates()
+        assert [c["name"] for c in second] == ["张三", "李四"]
+
+        stats = loader.cache_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["entries"]["candidates"] == 2
+        print("✅ 缓存命中且返回副本")
+
+
+def test_invalidated_when_workbook_changes():
+    """工作簿内容或修改时间变化后重新解析"""
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = _loader(tmp)
+        _write_candidates(loader.candidate_file, ["张三"])
+        assert len(loader.load_candidates()) == 1
+
+        _write_candidates(loader.candidate_file, ["张三", "李四", "王五"])
+        # 保证修改时间一定不同（部分文件系统时间精度较低）
+        stat = loader.candidate_file.stat()
+        os.utime(loader.candidate_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert len(loader.load_candidates()) == 3
+        stats = loader.cache_stats()
+        assert stats["misses"] == 2 and stats["invalidations"] == 1
+        print("✅ 工作簿变化后缓存失效")
+
+
+def test_missing_workbook_uses_fallback():
+    """文件不存在时返回备用数据且不写入缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = _loader(tmp)
+        assert loader.load_candidates()[0]["name"] == "张三"
+        assert loader.load_jobs()[0]["title"]
+        assert loader.cache_stats()["entries"] == {}
+        print("✅ 缺少文件时使用备用数据")
+
+
+if __name__ == "__main__":
+    test_cache_hit_and_copies()
+    test_invalidated_when_workbook_changes()
+    test_missing_workbook_uses_fallback()
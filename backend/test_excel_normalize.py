@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+测试向量化的Excel规范化与旧的逐行实现结果一致
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_excel_loader import (
+    build_dataframe, comparable, legacy_normalize_candidates, legacy_normalize_jobs
+)
+from excel_data_loader import ExcelDataLoader
+
+
+def test_candidates_match_legacy():
+    """合成数据上候选人字段一致（随机生成的面试日期除外）"""
+    loader = ExcelDataLoader()
+    df = build_dataframe(500, seed=3)
+    # 缺少部分列时使用默认值
+    df = df.drop(columns=["电话"])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy = legacy_normalize_candidates(loader, df)
+        vectorized = loader._normalize_candidates(df)
+
+    assert comparable(legacy, df) == comparable(vectorized, df)
+    assert all(c["phone"] == "未提供" for c in vectorized)
+    print(f"✅ {len(df)} 行候选人数据结果一致")
+
+
+def test_jobs_match_legacy():
+    """职位列名别名、缺失值和招聘状态的处理一致"""
+    loader = ExcelDataLoader()
+    df = pd.DataFrame({
+        "职位id": [1001, 1002, None],
+        "职位名称": [None, "产品经理", None],
+        "岗位": ["Python工程师", "产品", None],
+        "薪资范围": ["15K~35K", None, "面议"],
+        "岗位要求": [" 熟悉Python ", None, None],
+        "招聘人数": [2, None, 3.0],
+        "发布时间": ["2024-03-01", pd.Timestamp("2024-04-02"), None],
+        "状态": ["开启", "已关闭", np.nan],
+    })
+
+    legacy = legacy_normalize_jobs(loader, df)
+    vectorized = loader._normalize_jobs(df)
+
+    assert json.dumps(legacy, ensure_ascii=False) == json.dumps(vectorized, ensure_ascii=False)
+    assert vectorized[1]["status"] == "已暂停"
+    assert vectorized[2]["title"] == "职位3"
+    print("✅ 职位数据结果一致")
+
+
+if __name__ == "__main__":
+    test_candidates_match_legacy()
+    test_jobs_match_legacy()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+测试JSON响应：orjson 和标准库回退的输出一致、特殊类型的转换、Excel数据在加载时转换为Python类型
+"""
+
+import importlib
+import json
+import math
+import os
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import fast_json
+from excel_data_loader import ExcelDataLoader
+
+PAYLOAD = {
+    "count": np.int64(3),
+    "ratio": np.float32(0.5),
+    "scores": np.array([1, 2]),
+    "salary": Decimal("15000.50"),
+    "created_at": datetime(2025, 3, 1, 10, 30),
+    "day": date(2025, 3, 1),
+    "tags": ("a", "b"),
+    "name": "张三",
+    "nested": [{"id": 1, "score": None}]
+}
+
+EXPECTED = {
+    "count": 3, "ratio": 0.5, "scores": [1, 2], "salary": 15000.5, "created_at": "2025-03-01T10:30:00",
+    "day": "2025-03-01", "tags": ["a", "b"], "name": "张三", "nested": [{"id": 1, "score": None}]
+}
+
+
+def test_orjson_and_fallback_agree():
+    """orjson 与标准库回退输出相同的数据"""
+    assert json.loads(fast_json.FastJSONResponse(PAYLOAD).body) == EXPECTED
+
+    saved = sys.modules.get("orjson")
+    sys.modules["orjson"] = None
+    try:
+        fallback = importlib.reload(fast_json)
+        assert fallback.backend() == "json"
+        body = fallback.FastJSONResponse(PAYLOAD).body
+        assert json.loads(body) == EXPECTED
+        assert "张三".encode("utf-8") in body
+    finally:
+        if saved is None:
+            sys.modules.pop("orjson", None)
+        else:
+            sys.modules["orjson"] = saved
+        importlib.reload(fast_json)
+
+
+def test_loader_records_are_native():
+    """加载时 NumPy 标量、NaN、NaT 和 Timestamp 转换为 Python 类型"""
+    loader = ExcelDataLoader()
+    records = loader._records({
+        "id": [np.int64(1), 2],
+        "score": [np.float64(88.0), float("nan")],
+        "when": [pd.Timestamp("2025-03-01"), pd.NaT],
+        "name": ["张三", None]
+    })
+    assert records == [
+        {"id": 1, "score": 88.0, "when": datetime(2025, 3, 1), "name": "张三"},
+        {"id": 2, "score": None, "when": None, "name": None}
+    ]
+    assert type(records[0]["id"]) is int and type(records[0]["score"]) is float
+
+    for candidate in loader.load_candidates():
+        for key, value in candidate.items():
+            assert value is None or type(value) in (str, int, float, bool), (key, type(value))
+            assert not (type(value) is float and math.isnan(value)), key
+
+
+if __name__ == "__main__":
+    test_orjson_and_fallback_agree()
+    test_loader_records_are_native()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+测试面试记录接口：会话分页、当前页所有回答一次查询、按问题ID匹配追问、按ID索引查找Excel候选人
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_pool import SQLitePool
+from excel_data_loader import ExcelDataLoader
+from metrics import db_query_seconds
+from migrations import run_migrations
+
+
+def _build_db(path):
+    """张三有 3 个会话：2 个带预生成问题，1 个只有会话记录"""
+    pool = SQLitePool(db_path=path, pool_size=2)
+    with pool.connection() as conn:
+        run_migrations(conn)
+        conn.execute("INSERT INTO candidates (id, name, email) VALUES (1, '张三', 'zhangsan@example.com')")
+        for session_id, day in (("s1", 1), ("s2", 2)):
+            questions = [{"id": i, "question": f"{session_id}问题{i}", "follow_up": f"{session_id}追问{i}"}
+                         for i in range(1, 4)]
+            conn.execute('''
+                INSERT INTO interview_session_questions (session_id, candidate_name, candidate_email,
+                                                         questions_json, strategy, created_at)
+                VALUES (?, '张三', 'zhangsan@example.com', ?, 'default', ?)
+            ''', (session_id, json.dumps(questions, ensure_ascii=False), f"2025-03-0{day} 10:00:00"))
+            for i in (1, 3):
+                conn.execute('''
+                    INSERT INTO interview_answers (session_id, question_id, question_text, answer_text,
+                                                   dimension, score, feedback)
+                    VALUES (?, ?, ?, '回答', 'Skill', 80, '不错')
+                ''', (session_id, i, f"{session_id}问题{i}"))
+        conn.execute('''
+            INSERT INTO interview_sessions (candidate_id, session_id, created_at)
+            VALUES (1, 's3', '2025-03-03 10:00:00'), (1, 's1', '2025-03-01 10:00:00')
+        ''')
+        conn.execute('''
+            INSERT INTO interview_answers (session_id, question_id, question_text, answer_text, dimension, score)
+            VALUES ('s3', 7, '自由提问', '回答', 'Ability', 70)
+        ''')
+        conn.commit()
+    return pool
+
+
+def test_records_paginated_with_batched_answers():
+    """不传 limit 时返回全部会话；传入时按时间倒序分页；每页只有3次查询（候选人、会话、回答）"""
+    import main
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = _build_db(os.path.join(tmp, "records.db"))
+        original = main.db_pool
+        main.db_pool = pool
+
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                first = await client.get("/api/candidates/1/interview-records", params={"limit": 2})
+                second = await client.get("/api/candidates/1/interview-records", params={"limit": 2, "offset": 2})
+                past_end = await client.get("/api/candidates/1/interview-records", params={"offset": 10})
+                full = await client.get("/api/candidates/1/interview-records")
+                return first.json(), second.json(), past_end.json(), full.json()
+
+        site = "main.get_candidate_interview_records"
+        before = db_query_seconds.count(site)
+        try:
+            first, second, past_end, full = asyncio.run(run())
+        finally:
+            main.db_pool = original
+            pool.close_all()
+
+        assert first["total_sessions"] == 3 and first["has_more"] is True
+        assert [s["session_id"] for s in first["sessions"]] == ["s3", "s2"]
+        s3, s2 = first["sessions"]
+        assert s3["strategy"] is None and s3["answered_questions"] == 1 and s3["qa_pairs"][0]["follow_up"] == ""
+        assert s2["total_questions"] == 3 and s2["answered_questions"] == 2
+        assert [qa["follow_up"] for qa in s2["qa_pairs"]] == ["s2追问1", "s2追问3"]
+
+        assert [s["session_id"] for s in second["sessions"]] == ["s1"] and second["has_more"] is False
+        assert past_end["sessions"] == [] and past_end["total_sessions"] == 3
+        assert [s["session_id"] for s in full["sessions"]] == ["s3", "s2", "s1"]
+        assert full["limit"] is None and full["has_more"] is False
+        assert full["sessions"][:2] == first["sessions"]
+        # 三个有数据的请求各 3 次查询，超出范围的页面多一次总数查询
+        assert db_query_seconds.count(site) - before == 3 + 3 + 3 + 3
+
+
+def test_candidate_id_index():
+    """按ID查找与逐个查找结果一致，返回副本，Excel未变化时复用索引"""
+    loader = ExcelDataLoader()
+    candidates = loader.load_candidates()
+    for candidate in candidates[:20]:
+        assert loader.get_candidate(candidate["id"]) == candidate
+    assert loader.get_candidate(-1) is None
+
+    index = loader._id_index
+    found = loader.get_candidate(candidates[0]["id"])
+    found["name"] = "已修改"
+    assert loader._id_index is index
+    assert loader.get_candidate(candidates[0]["id"])["name"] == candidates[0]["name"]
+
+
+if __name__ == "__main__":
+    test_records_paginated_with_batched_answers()
+    test_candidate_id_index()
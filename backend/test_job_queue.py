@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+测试后台任务队列：立即返回任务ID、相同任务去重（并发提交时也只创建一个）、失败记录错误、
+多个队列实例不重复执行，长轮询不在事件循环线程中查询数据库
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException
+
+from db_pool import SQLitePool
+from job_queue import FAILED, QUEUED, SUCCEEDED, JobQueue
+
+
+def _queue(pool, executed):
+    queue = JobQueue(workers=2, poll_interval=0.05, pool=pool)
+
+    async def slow_echo(params):
+        await asyncio.sleep(0.2)
+        executed.append(params["value"])
+        return {"value": params["value"]}
+
+    async def broken(params):
+        raise HTTPException(status_code=404, detail="候选人未找到")
+
+    queue.register("echo", slow_echo)
+    queue.register("broken", broken)
+    return queue
+
+
+def test_submit_dedupe_and_results():
+    """相同参数的任务只执行一次；失败任务保存错误信息"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "jobs.db"), pool_size=4)
+        executed = []
+        queue = _queue(pool, executed)
+
+        job, created = queue.submit("echo", {"value": 1})
+        assert created and job["status"] == QUEUED
+        duplicate, created = queue.submit("echo", {"value": 1})
+        assert not created and duplicate["job_id"] == job["job_id"]
+        other, created = queue.submit("echo", {"value": 2})
+        assert created and other["job_id"] != job["job_id"]
+        failing, _ = queue.submit("broken", {})
+
+        queue.start()
+        try:
+            done = asyncio.run(queue.wait(job["job_id"], timeout=5))
+            assert done["status"] == SUCCEEDED and done["result"] == {"value": 1}
+            assert asyncio.run(queue.wait(other["job_id"], timeout=5))["status"] == SUCCEEDED
+            failed = asyncio.run(queue.wait(failing["job_id"], timeout=5))
+            assert failed["status"] == FAILED and failed["error"] == "候选人未找到"
+        finally:
+            queue.stop()
+
+        assert sorted(executed) == [1, 2]
+        # 任务完成后可以再次提交相同参数的任务
+        _, created = queue.submit("echo", {"value": 1})
+        assert created
+        assert queue.stats()["jobs"][SUCCEEDED] == 2
+        pool.close_all()
+        print("✅ 任务提交、去重和结果查询正常")
+
+
+def test_workers_do_not_run_a_job_twice():
+    """两个队列实例（模拟API进程和独立工作进程）共享同一张表，每个任务只执行一次"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "jobs.db"), pool_size=8)
+        executed = []
+        queues = [_queue(pool, executed), _queue(pool, executed)]
+        jobs = [queues[0].submit("echo", {"value": i})[0] for i in range(12)]
+
+        for queue in queues:
+            queue.start()
+        try:
+            for job in jobs:
+                result = asyncio.run(queues[1].wait(job["job_id"], timeout=10))
+                assert result["status"] == SUCCEEDED
+        finally:
+            for queue in queues:
+                queue.stop()
+
+        assert sorted(executed) == list(range(12))
+        workers = {queues[0].get(job["job_id"])["worker_id"] for job in jobs}
+        assert len(workers) > 1
+        pool.close_all()
+        print(f"✅ 12 个任务由 {len(workers)} 个工作线程各执行一次")
+
+
+def test_concurrent_submit_creates_one_job_and_wait_polls_off_loop():
+    """多个线程同时提交相同任务只创建一个；wait 的状态查询在线程池中执行"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "jobs.db"), pool_size=8)
+        queue = _queue(pool, [])
+        queue.submit("echo", {"value": 0})
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: queue.submit("echo", {"value": 1}), range(16)))
+        assert sum(created for _, created in results) == 1
+        assert len({job["job_id"] for job, _ in results}) == 1
+
+        get_threads = []
+        original_get = queue.get
+
+        def recording_get(job_id):
+            get_threads.append(threading.get_ident())
+            return original_get(job_id)
+
+        queue.get = recording_get
+
+        async def run():
+            return threading.get_ident(), await queue.wait(results[0][0]["job_id"], timeout=0.6)
+
+        loop_thread, job = asyncio.run(run())
+        assert job["status"] == QUEUED
+        assert len(get_threads) >= 2 and loop_thread not in get_threads
+        pool.close_all()
+        print("✅ 并发提交只创建一个任务，长轮询不阻塞事件循环")
+
+
+if __name__ == "__main__":
+    test_submit_dedupe_and_results()
+    test_workers_do_not_run_a_job_twice()
+    test_concurrent_submit_creates_one_job_and_wait_polls_off_loop()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+测试大模型响应缓存：命中、过期、LRU淘汰，以及网关重复请求不再访问模型
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_pool import SQLitePool
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway
+from test_llm_gateway import MockChatHandler, _start_server
+
+MESSAGES = [{"role": "user", "content": "请评估这个回答"}]
+
+
+def _cache(tmp, **kwargs):
+    pool = SQLitePool(db_path=os.path.join(tmp, "cache.db"), pool_size=2)
+    return pool, LLMResponseCache(enabled=True, pool=pool, **kwargs)
+
+
+def test_hit_and_miss():
+    """键包含模型和温度，命中时累计返回的字节数"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool, cache = _cache(tmp)
+        key = cache.make_key("ernie", 0.3, 500, MESSAGES)
+        assert key != cache.make_key("ernie", 0.7, 500, MESSAGES)
+        assert key != cache.make_key("other", 0.3, 500, MESSAGES)
+
+        assert cache.get(key) is None
+        cache.put(key, "ernie", '{"score": 80}')
+        assert cache.get(key) == '{"score": 80}'
+
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["entries"] == 1 and stats["bytes_served"] == len('{"score": 80}')
+        pool.close_all()
+        print("✅ 缓存命中正常")
+
+
+def test_ttl_expiry():
+    """超过有效期的回复视为未命中并被删除"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool, cache = _cache(tmp, ttl_seconds=0.05)
+        key = cache.make_key("ernie", 0.3, 500, MESSAGES)
+        cache.put(key, "ernie", "回复")
+        time.sleep(0.1)
+        assert cache.get(key) is None
+        stats = cache.stats()
+        assert stats["expired"] == 1 and stats["entries"] == 0
+        pool.close_all()
+        print("✅ 过期淘汰正常")
+
+
+def test_lru_eviction():
+    """超过条目上限时淘汰最久未访问的回复"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool, cache = _cache(tmp, max_entries=3)
+        keys = [cache.make_key("ernie", 0.3, 500, [{"role": "user", "content": str(i)}]) for i in range(4)]
+        for i, key in enumerate(keys[:3]):
+            cache.put(key, "ernie", f"回复{i}")
+            time.sleep(0.01)
+        # 访问第一条，使第二条成为最久未访问的记录
+        assert cache.get(keys[0]) == "回复0"
+        cache.put(keys[3], "ernie", "回复3")
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == "回复0"
+        assert cache.get(keys[3]) == "回复3"
+        assert cache.stats()["evictions"] == 1
+        pool.close_all()
+        print("✅ LRU淘汰正常")
+
+
+def test_gateway_reuses_cached_response():
+    """网关重复请求直接返回缓存，use_cache=False 时重新请求模型"""
+    server, base_url = _start_server()
+    with tempfile.TemporaryDirectory() as tmp:
+        pool, cache = _cache(tmp)
+        gateway = LLMGateway(api_key="test", base_url=base_url, model="mock-model",
+                             max_concurrency=4, timeout=10, cache=cache)
+
+        async def run():
+            first = await gateway.chat_completion(MESSAGES, temperature=0.3, max_tokens=500)
+            start = time.perf_counter()
+            second = await gateway.chat_completion(MESSAGES, temperature=0.3, max_tokens=500)
+            cached_ms = (time.perf_counter() - start) * 1000
+            third = await gateway.chat_completion(MESSAGES, temperature=0.3, max_tokens=500, use_cache=False)
+            await gateway.close()
+            return first, second, third, cached_ms
+
+        try:
+            before = MockChatHandler.requests
+            first, second, third, cached_ms = asyncio.run(run())
+            assert first == second == third
+            assert MockChatHandler.requests - before == 2
+            assert cached_ms < 100
+            assert gateway.stats()["calls"] == 2
+            assert cache.stats()["bypassed"] == 1
+            print(f"✅ 重复请求命中缓存，耗时 {cached_ms:.1f}ms")
+        finally:
+            server.shutdown()
+            pool.close_all()
+
+
+if __name__ == "__main__":
+    test_hit_and_miss()
+    test_ttl_expiry()
+    test_lru_eviction()
+    test_gateway_reuses_cached_response()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+测试异步LLM网关：本地模拟的OpenAI兼容服务上，多个面试的回答评分并行完成，并发数受信号量限制
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import llm_service as llm_service_module
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway
+
+DELAY = 0.3
+
+
+class MockChatHandler(BaseHTTPRequestHandler):
+    """模拟 /chat/completions：固定延迟后返回一条固定的回复"""
+
+    requests = 0
+
+    def do_POST(self):
+        MockChatHandler.requests += 1
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        time.sleep(DELAY)
+        # 同时包含评分和出题结果的字段，评分和出题请求都可以解析
+        content = json.dumps({
+            "score": 80,
+            "feedback": "回答完整",
+            "questions": [{"dimension": "Knowledge", "question": "请介绍你的项目经验"}],
+            "interview_strategy": "重点考察项目经验"
+        }, ensure_ascii=False)
+        body = json.dumps({
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "mock-model",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20}
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server(handler=None):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler or MockChatHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def _score_interviews(gateway, count):
+    """用给定网关并发评分 count 个面试回答，返回 (结果, 耗时)"""
+    original = llm_service_module.llm_gateway
+    llm_service_module.llm_gateway = gateway
+    try:
+        async def run():
+            service = llm_service_module.ErnieLLMService()
+            # 预热：首次调用包含客户端初始化和建立连接的开销
+            await service.evaluate_answer("预热", "预热", "Knowledge")
+            start = time.perf_counter()
+            results = await asyncio.gather(*[
+                service.evaluate_answer(f"问题{i}", f"回答{i}", "Knowledge")
+                for i in range(count)
+            ])
+            elapsed = time.perf_counter() - start
+            await gateway.close()
+            return results, elapsed
+        return asyncio.run(run())
+    finally:
+        llm_service_module.llm_gateway = original
+
+
+def test_concurrent_interviews_are_scored_in_parallel():
+    """8 个面试同时评分，总耗时接近一次请求的延迟"""
+    server, base_url = _start_server()
+    try:
+        gateway = LLMGateway(api_key="test", base_url=base_url, model="mock-model",
+                             max_concurrency=8, timeout=10, cache=LLMResponseCache(enabled=False))
+        results, elapsed = _score_interviews(gateway, 8)
+
+        assert all(r["score"] == 80 for r in results)
+        assert elapsed < DELAY * 3, f"耗时 {elapsed:.2f}s，请求没有并行"
+        stats = gateway.stats()
+        assert stats["calls"] == 9 and stats["errors"] == 0
+        assert stats["peak_in_flight"] == 8
+        print(f"✅ 8 个面试并行评分，耗时 {elapsed:.2f}s")
+    finally:
+        server.shutdown()
+
+
+def test_semaphore_bounds_concurrency():
+    """并发上限为 2 时，6 个请求分三批完成"""
+    server, base_url = _start_server()
+    try:
+        gateway = LLMGateway(api_key="test", base_url=base_url, model="mock-model",
+                             max_concurrency=2, timeout=10, cache=LLMResponseCache(enabled=False))
+        results, elapsed = _score_interviews(gateway, 6)
+
+        assert len(results) == 6
+        assert gateway.stats()["peak_in_flight"] == 2
+        assert elapsed >= DELAY * 3 * 0.9
+        print(f"✅ 并发上限生效，耗时 {elapsed:.2f}s")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_concurrent_interviews_are_scored_in_parallel()
+    test_semaphore_bounds_concurrency()
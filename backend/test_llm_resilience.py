@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+测试大模型调用容错：可重试错误的退避重试、熔断后立即失败和恢复、截止时间、对冲请求、带原因的降级结果
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import llm_service as llm_service_module
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway
+from llm_resilience import CircuitBreaker, LLMCallError, RetryPolicy
+from test_llm_gateway import _start_server
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """按 plan 依次返回 (状态码, 延迟秒数)，plan 用完后立即返回 200"""
+
+    plan = []
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        with ScriptedHandler.lock:
+            ScriptedHandler.requests += 1
+            status, delay = ScriptedHandler.plan.pop(0) if ScriptedHandler.plan else (200, 0)
+        time.sleep(delay)
+
+        if status == 200:
+            content = json.dumps({"score": 88, "feedback": "回答完整"}, ensure_ascii=False)
+            body = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "mock-model",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20}
+            }
+        else:
+            body = {"error": {"message": f"mock error {status}", "type": "mock"}}
+        data = json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+MESSAGES = [{"role": "user", "content": "请评分"}]
+
+
+def _run(plan, coro_factory, **gateway_kwargs):
+    """启动模拟服务，按 plan 响应，执行 coro_factory(gateway)"""
+    ScriptedHandler.plan = list(plan)
+    ScriptedHandler.requests = 0
+    server, base_url = _start_server(ScriptedHandler)
+    kwargs = {
+        "retry_policy": RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05),
+        "breaker": CircuitBreaker(failure_threshold=5, reset_timeout=30),
+        "hedge_after": 0,
+        "deadlines": {"default": 10},
+        **gateway_kwargs
+    }
+    gateway = LLMGateway(api_key="test", base_url=base_url, model="mock-model", max_concurrency=4,
+                         timeout=5, cache=LLMResponseCache(enabled=False), **kwargs)
+
+    async def run():
+        try:
+            return await coro_factory(gateway)
+        finally:
+            await gateway.close()
+
+    try:
+        return asyncio.run(run()), gateway
+    finally:
+        server.shutdown()
+
+
+def test_retryable_errors_are_retried():
+    """503 和 429 按退避重试后成功；400 不重试"""
+    result, gateway = _run([(503, 0), (429, 0)], lambda g: g.chat_completion(MESSAGES, use_cache=False))
+    assert json.loads(result)["score"] == 88
+    assert ScriptedHandler.requests == 3
+    stats = gateway.stats()["resilience"]
+    assert stats["retries"] == 2
+    assert stats["failures"] == {"server_error": 1, "rate_limited": 1}
+
+    async def bad_request(g):
+        try:
+            await g.chat_completion(MESSAGES, use_cache=False)
+        except LLMCallError as e:
+            return e.reason
+
+    reason, gateway = _run([(400, 0)], bad_request)
+    assert reason == "client_error" and ScriptedHandler.requests == 1
+    assert gateway.stats()["resilience"]["breaker"]["consecutive_failures"] == 0
+
+
+def test_breaker_opens_and_recovers():
+    """连续失败后熔断，调用不再到达服务；冷却后探测成功即恢复"""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.3)
+
+    async def scenario(g):
+        reasons = []
+        for _ in range(5):
+            try:
+                await g.chat_completion(MESSAGES, use_cache=False)
+            except LLMCallError as e:
+                reasons.append(e.reason)
+        requests_when_open = ScriptedHandler.requests
+
+        start = time.perf_counter()
+        try:
+            await g.chat_completion(MESSAGES, use_cache=False)
+        except LLMCallError as e:
+            reasons.append(e.reason)
+        fail_fast = time.perf_counter() - start
+
+        await asyncio.sleep(0.35)
+        recovered = await g.chat_completion(MESSAGES, use_cache=False)
+        return reasons, requests_when_open, fail_fast, recovered
+
+    (reasons, requests_when_open, fail_fast, recovered), gateway = _run(
+        [(500, 0)] * 3, scenario, retry_policy=RetryPolicy(max_attempts=1), breaker=breaker
+    )
+    assert reasons == ["server_error"] * 3 + ["circuit_open"] * 3
+    assert requests_when_open == 3 and fail_fast < 0.05
+    assert json.loads(recovered)["score"] == 88
+    stats = gateway.stats()["resilience"]["breaker"]
+    assert stats["state"] == "closed" and stats["opened"] == 1 and stats["rejected"] == 3
+    print(f"✅ 熔断期间 {fail_fast * 1000:.1f}ms 内失败，冷却后恢复")
+
+
+def test_deadline_limits_total_time():
+    """服务无响应时在截止时间内失败，而不是等待客户端超时"""
+    async def slow(g):
+        start = time.perf_counter()
+        try:
+            await g.chat_completion(MESSAGES, use_cache=False, operation="evaluate_answer")
+        except LLMCallError as e:
+            return e.reason, time.perf_counter() - start
+
+    (reason, elapsed), _ = _run([(200, 2)], slow, deadlines={"default": 10, "evaluate_answer": 0.3})
+    assert reason == "deadline"
+    assert elapsed < 0.6
+
+
+def test_hedged_request_cuts_tail_latency():
+    """首个请求很慢时对冲请求先返回"""
+    async def hedged(g):
+        await g.chat_completion(MESSAGES, use_cache=False)  # 预热连接
+        ScriptedHandler.plan = [(200, 1.5)]
+        start = time.perf_counter()
+        result = await g.chat_completion(MESSAGES, use_cache=False)
+        return result, time.perf_counter() - start
+
+    (result, elapsed), gateway = _run([], hedged, hedge_after=0.1)
+    assert json.loads(result)["score"] == 88
+    assert elapsed < 1.0
+    stats = gateway.stats()["resilience"]
+    assert stats["hedged_requests"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_fallback_reports_reason():
+    """熔断时评分接口的降级结果带有原因"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    async def evaluate(g):
+        original = llm_service_module.llm_gateway
+        llm_service_module.llm_gateway = g
+        try:
+            service = llm_service_module.ErnieLLMService()
+            return await service.evaluate_answer("问题", "回答", "Knowledge")
+        finally:
+            llm_service_module.llm_gateway = original
+
+    result, _ = _run([], evaluate, breaker=breaker)
+    assert result["score"] == 70 and result["fallback_reason"] == "circuit_open"
+    assert ScriptedHandler.requests == 0
+
+
+if __name__ == "__main__":
+    test_retryable_errors_are_retried()
+    test_breaker_opens_and_recovers()
+    test_deadline_limits_total_time()
+    test_hedged_request_cuts_tail_latency()
+    test_fallback_reports_reason()
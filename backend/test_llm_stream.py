@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+测试流式输出：首个片段在完整回复之前到达、客户端断开时关闭上游请求、SSE接口的事件格式
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ai_chat_service as ai_chat_module
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway
+from test_llm_gateway import _start_server
+
+TOKENS = ["候选人", "整体", "表现", "良好", "。"]
+TOKEN_DELAY = 0.2
+
+
+class MockStreamHandler(BaseHTTPRequestHandler):
+    """模拟流式 /chat/completions：每隔 TOKEN_DELAY 秒发送一个片段"""
+
+    disconnected = threading.Event()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        try:
+            for i, token in enumerate(TOKENS):
+                if i:
+                    time.sleep(TOKEN_DELAY)
+                chunk = {
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": "mock-model",
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            MockStreamHandler.disconnected.set()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _gateway(base_url):
+    return LLMGateway(api_key="test", base_url=base_url, model="mock-model",
+                      max_concurrency=2, timeout=10, cache=LLMResponseCache(enabled=False))
+
+
+MESSAGES = [{"role": "user", "content": "总结一下招聘情况"}]
+
+
+def test_first_token_arrives_before_completion():
+    """首个片段的到达时间远小于完整回复的耗时"""
+    server, base_url = _start_server(MockStreamHandler)
+    gateway = _gateway(base_url)
+
+    async def run():
+        # 预热：首次调用包含客户端初始化和建立连接的开销
+        async for _ in gateway.stream_chat_completion(MESSAGES):
+            pass
+        start = time.perf_counter()
+        first_at = None
+        parts = []
+        async for delta in gateway.stream_chat_completion(MESSAGES):
+            if first_at is None:
+                first_at = time.perf_counter() - start
+            parts.append(delta)
+        total = time.perf_counter() - start
+        await gateway.close()
+        return parts, first_at, total
+
+    try:
+        parts, first_at, total = asyncio.run(run())
+        assert parts == TOKENS
+        assert first_at < TOKEN_DELAY * 2 < total
+        assert gateway.stats()["in_flight"] == 0
+        print(f"✅ 首个片段 {first_at * 1000:.0f}ms，完整回复 {total * 1000:.0f}ms")
+    finally:
+        server.shutdown()
+
+
+def test_cancel_closes_upstream():
+    """调用方在收到首个片段后取消，上游连接被关闭，并发名额释放"""
+    MockStreamHandler.disconnected.clear()
+    server, base_url = _start_server(MockStreamHandler)
+    gateway = _gateway(base_url)
+
+    async def run():
+        received = []
+
+        async def consume():
+            async for delta in gateway.stream_chat_completion(MESSAGES):
+                received.append(delta)
+
+        task = asyncio.create_task(consume())
+        while not received:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await gateway.close()
+        return received
+
+    try:
+        received = asyncio.run(run())
+        assert received == TOKENS[:1]
+        stats = gateway.stats()
+        assert stats["in_flight"] == 0 and stats["cancelled_streams"] == 1
+        # 服务端在下一次写入时发现连接已关闭
+        assert MockStreamHandler.disconnected.wait(TOKEN_DELAY * 5)
+        print("✅ 取消后上游连接已关闭")
+    finally:
+        server.shutdown()
+
+
+def test_sse_endpoint_events():
+    """/api/ai-chat/stream 按 delta/done 事件输出回复"""
+    import main
+
+    server, base_url = _start_server(MockStreamHandler)
+    original = ai_chat_module.llm_gateway
+    ai_chat_module.llm_gateway = _gateway(base_url)
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/ai-chat/stream", json={"message": "招聘情况如何"})
+        await ai_chat_module.llm_gateway.close()
+        return response
+
+    try:
+        response = asyncio.run(run())
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+        names = [lines[0].removeprefix("event: ") for lines in events]
+        payloads = [json.loads(lines[1].removeprefix("data: ")) for lines in events]
+        assert names == ["delta"] * len(TOKENS) + ["done"]
+        assert "".join(p["content"] for p in payloads[:-1]) == "".join(TOKENS)
+        assert payloads[-1]["success"] is True
+        print("✅ SSE事件格式正确")
+    finally:
+        ai_chat_module.llm_gateway = original
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_first_token_arrives_before_completion()
+    test_cancel_closes_upstream()
+    test_sse_endpoint_events()
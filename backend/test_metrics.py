@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+测试运行指标：直方图和计数器的文本格式、按路由模板记录请求、SQLite语句按调用位置计时、大模型调用耗时和token用量、/metrics 接口
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_pool import SQLitePool
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway
+from llm_resilience import CircuitBreaker, LLMCallError, RetryPolicy
+from metrics import MetricsMiddleware, MetricsRegistry, db_query_seconds, llm_call_seconds, llm_calls, llm_tokens
+from test_llm_gateway import _start_server
+from test_llm_resilience import MESSAGES, ScriptedHandler
+
+
+def test_render_format():
+    """分桶累计输出，带 +Inf、_count、_sum；标签值转义"""
+    registry = MetricsRegistry(prefix="t")
+    histogram = registry.histogram("latency_seconds", "耗时", ("route",), buckets=(0.1, 1.0))
+    counter = registry.counter("requests_total", "请求数", ("route",))
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(seconds, "/a")
+    counter.inc('/b"x', amount=2)
+    registry.register_collector("cache", lambda: {"hits": 3, "hit_rate": 0.75, "enabled": True,
+                                                  "backend": "sqlite", "nested": {"size": 1}})
+
+    text = registry.render()
+    assert '# TYPE t_latency_seconds histogram' in text
+    assert 't_latency_seconds_bucket{route="/a",le="0.1"} 2' in text
+    assert 't_latency_seconds_bucket{route="/a",le="1"} 3' in text
+    assert 't_latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 't_latency_seconds_count{route="/a"} 4' in text
+    assert 't_latency_seconds_sum{route="/a"} 3.65' in text
+    assert 't_requests_total{route="/b\\"x"} 2' in text
+    assert 't_component_stat{component="cache",stat="hit_rate"} 0.75' in text
+    assert 't_component_stat{component="cache",stat="enabled"} 1' in text
+    assert 't_component_stat{component="cache",stat="nested.size"} 1' in text
+    assert "backend" not in text
+
+
+def test_middleware_labels_by_route_template():
+    """按路由模板而不是实际路径记录，未匹配的路径归为 unmatched"""
+    registry = MetricsRegistry(prefix="t")
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for item_id in (1, 2, 3):
+                assert (await client.get(f"/items/{item_id}")).status_code == 200
+            assert (await client.get("/missing")).status_code == 404
+
+    asyncio.run(run())
+    text = registry.render()
+    assert 't_http_requests_total{method="GET",route="/items/{item_id}",status="200"} 3' in text
+    assert 't_http_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+    assert 't_http_request_duration_seconds_count{method="GET",route="/items/{item_id}"} 3' in text
+
+
+def _load_rows(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS t (x INTEGER)")
+        conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,)])
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM t")
+        return cursor.fetchone()[0]
+
+
+def test_db_queries_timed_by_call_site():
+    """语句耗时按取连接的函数记录"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "metrics.db"), pool_size=1)
+        before = db_query_seconds.count("test_metrics._load_rows")
+        assert _load_rows(pool) == 2
+        assert db_query_seconds.count("test_metrics._load_rows") - before == 3
+
+        conn = pool.get_connection()
+        conn.execute("SELECT 1")
+        conn.close()
+        assert db_query_seconds.count("test_metrics.test_db_queries_timed_by_call_site") == 1
+        pool.close_all()
+
+
+def test_llm_calls_recorded_per_operation():
+    """大模型调用按操作记录耗时、结果和token用量"""
+    ScriptedHandler.plan = [(500, 0)]
+    ScriptedHandler.requests = 0
+    server, base_url = _start_server(ScriptedHandler)
+    gateway = LLMGateway(api_key="test", base_url=base_url, model="mock-model", max_concurrency=2, timeout=5,
+                         cache=LLMResponseCache(enabled=False), retry_policy=RetryPolicy(max_attempts=1),
+                         breaker=CircuitBreaker(), hedge_after=0, deadlines={"default": 10})
+    operation = "metrics_test"
+
+    async def run():
+        try:
+            try:
+                await gateway.chat_completion(MESSAGES, use_cache=False, operation=operation)
+            except LLMCallError:
+                pass
+            await gateway.chat_completion(MESSAGES, use_cache=False, operation=operation)
+        finally:
+            await gateway.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert llm_calls.value(operation, "server_error") == 1
+    assert llm_calls.value(operation, "ok") == 1
+    assert llm_call_seconds.count(operation, "ok") == 1
+    assert llm_tokens.value(operation, "prompt") == 10
+    assert llm_tokens.value(operation, "completion") == 10
+
+
+def test_metrics_endpoint():
+    """/metrics 返回文本格式，包含接口耗时和组件统计"""
+    import main
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/")
+            return await client.get("/metrics")
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'recruitment_http_requests_total{method="GET",route="/",status="200"}' in text
+    assert 'recruitment_component_stat{component="llm_cache",stat="hit_rate"}' in text
+    assert 'recruitment_component_stat{component="llm_gateway",stat="resilience.retries"}' in text
+
+
+if __name__ == "__main__":
+    test_render_format()
+    test_middleware_labels_by_route_template()
+    test_db_queries_timed_by_call_site()
+    test_llm_calls_recorded_per_operation()
+    test_metrics_endpoint()
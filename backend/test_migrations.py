@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+测试数据库结构迁移
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from migrations import MIGRATIONS, get_schema_version, run_migrations
+
+
+def _tables(conn):
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    return {row[0] for row in rows}
+
+
+def test_fresh_database():
+    """新数据库一次创建所有表，重复执行不会再次迁移"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "fresh.db"))
+        assert get_schema_version(conn) == 0
+
+        version = run_migrations(conn)
+        assert version == MIGRATIONS[-1][0]
+        assert {
+            'candidates', 'candidate_status_log', 'jobs', 'interview_sessions',
+            'interview_qa', 'users', 'candidate_ai_feedback', 'candidate_evaluations',
+            'interview_questions', 'interview_session_questions', 'interview_answers',
+            'schema_version'
+        } <= _tables(conn)
+
+        assert run_migrations(conn) == version
+        applied = conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0]
+        assert applied == len(MIGRATIONS)
+        conn.close()
+        print("✅ 新数据库迁移正常")
+
+
+def test_legacy_database_upgrade():
+    """没有版本记录的旧数据库补齐缺失的列和表，已有数据保留"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "legacy.db"))
+        conn.execute('''
+            CREATE TABLE candidates (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT INTO candidates (name, email) VALUES ('张三', 'zs@example.com')")
+        conn.commit()
+
+        run_migrations(conn)
+
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(candidates)")]
+        for column in ('phone', 'resume_file_path', 'status', 'updated_at'):
+            assert column in columns
+        row = conn.execute("SELECT name, updated_at FROM candidates").fetchone()
+        assert row[0] == '张三' and row[1] is not None
+        assert 'interview_answers' in _tables(conn)
+        conn.close()
+        print("✅ 旧数据库升级正常")
+
+
+if __name__ == "__main__":
+    test_fresh_database()
+    test_legacy_database_upgrade()
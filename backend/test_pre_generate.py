@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+测试批量预生成面试问题：并发生成、逐个记录结果、重新运行跳过已完成的候选人
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import llm_service as llm_service_module
+import pre_generate_questions
+from db_pool import SQLitePool
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway
+from migrations import run_migrations
+from test_llm_gateway import DELAY, MockChatHandler, _start_server
+
+
+class FailingHandler(BaseHTTPRequestHandler):
+    """模拟大模型服务拒绝所有请求（400，不重试）"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"error": {"message": "mock bad request", "type": "mock"}}).encode("utf-8")
+        self.send_response(400)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _mapping(count):
+    return {
+        f"候选人{i}": {
+            "position": "Python工程师服务器端开发",
+            "position_code": "1001",
+            "resume_path": f"resouse/不存在/候选人{i}.pdf"
+        }
+        for i in range(count)
+    }
+
+
+def _run(mapping, checkpoint_path, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(pre_generate_questions.run_batch(
+            mapping, checkpoint_path=checkpoint_path, pdf_processes=1, **kwargs
+        ))
+
+
+def test_batch_runs_in_parallel_and_resumes():
+    """6 个候选人并行生成；重新运行时全部跳过"""
+    server, base_url = _start_server()
+    original_gateway = llm_service_module.llm_gateway
+    original_pool = pre_generate_questions.db_pool
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "questions.db"), pool_size=2)
+        with pool.connection() as conn:
+            run_migrations(conn)
+        llm_service_module.llm_gateway = LLMGateway(
+            api_key="test", base_url=base_url, model="mock-model",
+            max_concurrency=8, timeout=10, cache=LLMResponseCache(enabled=False)
+        )
+        pre_generate_questions.db_pool = pool
+        checkpoint_path = os.path.join(tmp, "checkpoint.json")
+        try:
+            start = time.perf_counter()
+            results, skipped = _run(_mapping(6), checkpoint_path, workers=6, rate_limit=0)
+            elapsed = time.perf_counter() - start
+
+            assert skipped == 0
+            assert all(r["status"] == "success" for r in results.values()), results
+            assert elapsed < DELAY * 6, f"耗时 {elapsed:.2f}s，没有并行生成"
+            with pool.connection() as conn:
+                assert conn.execute("SELECT COUNT(*) FROM interview_questions").fetchone()[0] == 6
+
+            with open(checkpoint_path, encoding="utf-8") as f:
+                assert len(json.load(f)) == 6
+
+            requests = MockChatHandler.requests
+            results, skipped = _run(_mapping(7), checkpoint_path, workers=6, rate_limit=0)
+            assert skipped == 6 and list(results) == ["候选人6"]
+            assert MockChatHandler.requests == requests + 1
+            print(f"✅ 并行预生成正常，耗时 {elapsed:.2f}s")
+        finally:
+            llm_service_module.llm_gateway = original_gateway
+            pre_generate_questions.db_pool = original_pool
+            pool.close_all()
+            server.shutdown()
+
+
+def test_llm_failure_is_not_checkpointed_as_success():
+    """大模型调用失败时不保存备用问题，进度文件记为失败，重新运行时重试"""
+    failing_server, failing_url = _start_server(FailingHandler)
+    server, base_url = _start_server()
+    original_gateway = llm_service_module.llm_gateway
+    original_pool = pre_generate_questions.db_pool
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "questions.db"), pool_size=2)
+        with pool.connection() as conn:
+            run_migrations(conn)
+        pre_generate_questions.db_pool = pool
+        checkpoint_path = os.path.join(tmp, "checkpoint.json")
+        try:
+            llm_service_module.llm_gateway = LLMGateway(
+                api_key="test", base_url=failing_url, model="mock-model",
+                max_concurrency=4, timeout=10, cache=LLMResponseCache(enabled=False)
+            )
+            results, skipped = _run(_mapping(2), checkpoint_path, workers=2, rate_limit=0)
+            assert all(r["status"] == "failed" and r["error"] == "client_error" for r in results.values()), results
+            with open(checkpoint_path, encoding="utf-8") as f:
+                assert all(r["status"] == "failed" for r in json.load(f).values())
+            with pool.connection() as conn:
+                assert conn.execute("SELECT COUNT(*) FROM interview_questions").fetchone()[0] == 0
+
+            llm_service_module.llm_gateway = LLMGateway(
+                api_key="test", base_url=base_url, model="mock-model",
+                max_concurrency=4, timeout=10, cache=LLMResponseCache(enabled=False)
+            )
+            results, skipped = _run(_mapping(2), checkpoint_path, workers=2, rate_limit=0)
+            assert skipped == 0 and all(r["status"] == "success" for r in results.values()), results
+            with pool.connection() as conn:
+                assert conn.execute("SELECT COUNT(*) FROM interview_questions").fetchone()[0] == 2
+        finally:
+            llm_service_module.llm_gateway = original_gateway
+            pre_generate_questions.db_pool = original_pool
+            pool.close_all()
+            server.shutdown()
+            failing_server.shutdown()
+
+
+def test_rate_limiter_spaces_requests():
+    """每分钟 600 次即每 0.1 秒放行一个请求"""
+    async def run():
+        limiter = pre_generate_questions.RateLimiter(600)
+        start = time.perf_counter()
+        await asyncio.gather(*[limiter.wait() for _ in range(5)])
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    assert 0.35 <= elapsed < 1.0, elapsed
+    print(f"✅ 速率限制正常，耗时 {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    test_batch_runs_in_parallel_and_resumes()
+    test_llm_failure_is_not_checkpointed_as_success()
+    test_rate_limiter_spaces_requests()
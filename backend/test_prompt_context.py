@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+测试对话数据上下文：大量候选人时不超出token预算、按问题挑选相关候选人、返回token用量
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from prompt_context import PromptContextBuilder, estimate_tokens
+
+POSITIONS = ["Python工程师", "产品经理", "数据分析师", "前端工程师"]
+
+
+def _data(count):
+    candidates = [
+        {
+            "姓名": f"候选人{i:04d}",
+            "邮箱": f"user{i}@example.com",
+            "岗位名称": POSITIONS[i % len(POSITIONS)],
+            "是否已面试（AI）": "是" if i % 2 else "否",
+            "面试总评分": (i * 37) % 100 if i % 2 else float("nan"),
+            "Knowledge": 80,
+        }
+        for i in range(count)
+    ]
+    candidates.append({"姓名": "欧阳娜娜", "邮箱": "nana@example.com", "岗位名称": "算法工程师", "面试总评分": 66})
+    statistics = {
+        "total_candidates": len(candidates),
+        "total_jobs": len(POSITIONS),
+        "interview_status_distribution": {"是": count // 2, "否": count - count // 2},
+        "position_distribution": {pos: count // len(POSITIONS) for pos in POSITIONS},
+        "job_details": [{"title": pos, "salary": "20k", "count": 3, "status": "开启"} for pos in POSITIONS],
+    }
+    return {"candidate_excel": candidates, "statistics": statistics}
+
+
+def test_context_stays_within_budget():
+    """数千名候选人时上下文仍在预算内，并报告放入的条数"""
+    data = _data(5000)
+    context, usage = PromptContextBuilder(budget_tokens=1500).build(data, "招聘情况如何")
+
+    assert usage["context_tokens"] == estimate_tokens(context)
+    assert usage["context_tokens"] <= 1500
+    assert usage["candidates_total"] == 5001
+    assert 0 < usage["candidates_included"] < 5001
+    assert usage["sections"][0] == "core" and "总候选人数：5001人" in context
+    assert "nan" not in context
+    print(f"✅ 上下文 {usage['context_tokens']} tokens，候选人 {usage['candidates_included']}/5001")
+
+
+def test_relevant_candidates_selected():
+    """问题提到的候选人优先放入；询问最高分时按总分排序"""
+    data = _data(3000)
+    builder = PromptContextBuilder(budget_tokens=1200)
+
+    context, _ = builder.build(data, "欧阳娜娜的面试表现怎么样？")
+    assert "1. 欧阳娜娜 - 算法工程师" in context
+
+    context, _ = builder.build(data, "总分最高的候选人是谁")
+    first = next(line for line in context.splitlines() if line.startswith("1. "))
+    assert "总分:99" in first
+
+
+def test_sections_ranked_by_question():
+    """预算不足时优先保留与问题相关的汇总表"""
+    data = _data(10)
+    builder = PromptContextBuilder(budget_tokens=10 ** 6)
+    jobs = builder._sections(data["statistics"])["jobs"]
+    budget = estimate_tokens(builder._core(data["statistics"])) + estimate_tokens(jobs) + 5
+
+    _, usage = PromptContextBuilder(budget_tokens=budget).build(data, "各岗位薪资是多少")
+    assert usage["sections"][:2] == ["core", "jobs"]
+    assert "status" in usage["omitted_sections"]
+
+
+def test_chat_messages_report_usage():
+    """对话消息使用预算内的上下文并报告提示词token数"""
+    from ai_chat_service import AIChatService
+
+    service = AIChatService()
+    service.get_recruitment_context = lambda: (_data(2000), "")
+    service.context_builder = PromptContextBuilder(budget_tokens=800)
+
+    messages, _, data_summary, usage = service._build_chat_messages("产品经理有多少人")
+    assert data_summary in messages[0]["content"]
+    assert usage["context_tokens"] <= 800
+    assert usage["prompt_tokens"] == sum(estimate_tokens(m["content"]) for m in messages)
+
+
+if __name__ == "__main__":
+    test_context_stays_within_budget()
+    test_relevant_candidates_selected()
+    test_sections_ranked_by_question()
+    test_chat_messages_report_usage()
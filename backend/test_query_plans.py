@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+测试高频查询的执行计划：迁移创建的索引必须被使用，不允许出现全表扫描
+"""
+
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import candidate_aggregates
+from migrations import run_migrations
+
+# 候选人列表、开始面试、面试记录、提交回答等接口中的查询
+HOT_QUERIES = {
+    "session_question_stats": candidate_aggregates.SESSION_QUESTION_STATS_SQL,
+    "session_stats": candidate_aggregates.SESSION_STATS_SQL,
+    "dimension_averages": candidate_aggregates.DIMENSION_AVERAGES_SQL,
+    "interview_questions_batch": candidate_aggregates.INTERVIEW_QUESTIONS_SQL,
+    "latest_interview_questions": candidate_aggregates.LATEST_INTERVIEW_QUESTIONS_SQL,
+    "latest_session_questions": candidate_aggregates.LATEST_SESSION_QUESTIONS_SQL,
+    "candidate_sessions_page": candidate_aggregates.CANDIDATE_SESSIONS_PAGE_SQL,
+    "session_answers_batch": candidate_aggregates.SESSION_ANSWERS_SQL,
+    "candidate_by_name": "SELECT id FROM candidates WHERE name = ?",
+    "candidate_by_email": "SELECT id FROM candidates WHERE email = ?",
+    "session_questions_by_session": '''
+        SELECT questions_json, strategy, candidate_name, candidate_email
+        FROM interview_session_questions WHERE session_id = ?
+    ''',
+    "session_questions_by_name": '''
+        SELECT session_id, questions_json, strategy, created_at
+        FROM interview_session_questions
+        WHERE candidate_name = ?
+        ORDER BY created_at DESC
+    ''',
+    "sessions_by_name": '''
+        SELECT isess.session_id, isess.created_at
+        FROM interview_sessions isess
+        JOIN candidates c ON isess.candidate_id = c.id
+        WHERE c.name = ?
+        ORDER BY isess.created_at DESC
+    ''',
+    "answers_by_session": '''
+        SELECT question_id, question_text, answer_text, dimension, score, feedback, created_at
+        FROM interview_answers
+        WHERE session_id = ?
+        ORDER BY question_id
+    ''',
+    "evaluation_by_candidate": "SELECT id FROM candidate_evaluations WHERE candidate_id = ?",
+    "ai_feedback_by_candidate": '''
+        SELECT strengths, improvements, generated_at
+        FROM candidate_ai_feedback
+        WHERE candidate_id = ?
+        ORDER BY generated_at DESC
+        LIMIT 1
+    ''',
+    "llm_cache_lookup": '''
+        SELECT response, size_bytes, created_at
+        FROM llm_response_cache WHERE cache_key = ?
+    ''',
+    "next_queued_job": '''
+        SELECT id FROM background_jobs
+        WHERE status = ?
+        ORDER BY created_at
+        LIMIT 1
+    ''',
+}
+
+
+def _full_scans(conn, sql):
+    """返回执行计划中的全表扫描步骤（json_each 虚拟表和子查询结果的扫描除外）"""
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql, [None] * sql.count('?')).fetchall()
+    subqueries = {
+        row[3].split()[1] for row in plan
+        if row[3].startswith(("MATERIALIZE ", "CO-ROUTINE "))
+    }
+    scans = []
+    for row in plan:
+        detail = row[3]
+        if not detail.startswith("SCAN "):
+            continue
+        target = detail.split()[1]
+        if target == "json_each" or target in subqueries:
+            continue
+        scans.append(detail)
+    return scans
+
+
+def test_hot_queries_use_indexes():
+    """所有高频查询都通过索引定位数据"""
+    conn = sqlite3.connect(":memory:")
+    run_migrations(conn)
+
+    failures = {}
+    for name, sql in HOT_QUERIES.items():
+        scans = _full_scans(conn, sql)
+        if scans:
+            failures[name] = scans
+
+    conn.close()
+    assert not failures, f"以下查询出现全表扫描: {failures}"
+    print(f"✅ {len(HOT_QUERIES)} 个高频查询均使用索引")
+
+
+if __name__ == "__main__":
+    test_hot_queries_use_indexes()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+测试简历目录：按文件夹/姓名/邮箱/职位查找、新增职位文件夹自动识别、文件元数据、后台监听、
+查询接口不在事件循环线程中读取文件
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_pool import SQLitePool
+from migrations import run_migrations
+from resume_catalog import ResumeCatalog
+
+REAL_PDF = Path(__file__).parent.parent / "resouse" / "C端产品经理-AIGC领域" / "包涵.pdf"
+
+
+def _catalog(tmp, **kwargs):
+    root = Path(tmp) / "resouse"
+    (root / "Python工程师服务器端开发").mkdir(parents=True)
+    (root / "金融海外投资新媒体内容文案编辑运营").mkdir()
+    (root / "Python工程师服务器端开发" / "张三.pdf").write_bytes(b"%PDF-1.4 a")
+    (root / "金融海外投资新媒体内容文案编辑运营" / "张三.pdf").write_bytes(b"%PDF-1.4 bb")
+    (root / "金融海外投资新媒体内容文案编辑运营" / "李四-简历.pdf").write_bytes(b"%PDF-1.4 c")
+    (root / "candidate.xlsx").write_bytes(b"")
+
+    pool = SQLitePool(db_path=os.path.join(tmp, "catalog.db"), pool_size=2)
+    with pool.connection() as conn:
+        run_migrations(conn)
+    return root, pool, ResumeCatalog(root=root, pool=pool, **kwargs)
+
+
+def test_lookup_by_folder_name_email_and_position():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, pool, catalog = _catalog(tmp)
+
+        path, stat_result = catalog.resolve("Python工程师服务器端开发", "张三.pdf")
+        assert stat_result.st_size == 10
+        assert catalog.resolve("..", "candidate.xlsx") is None
+
+        # 同名简历按职位选择文件夹，职位名称与文件夹名不完全一致时按相近程度匹配
+        assert catalog.find(name="张三", position="Python工程师")["folder"] == "Python工程师服务器端开发"
+        assert catalog.find(name="张三", position="新媒体运营")["folder"] == "金融海外投资新媒体内容文案编辑运营"
+        assert catalog.find(name="李四")["filename"] == "李四-简历.pdf"
+        assert catalog.find(name="王五") is None
+
+        catalog.register_emails({"lisi@example.com": "李四"})
+        assert catalog.find(email="lisi@example.com")["filename"] == "李四-简历.pdf"
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO candidates (name, email) VALUES ('张三', 'zhangsan@example.com')")
+            conn.commit()
+        assert catalog.find(email="zhangsan@example.com", position="Python工程师")["filename"] == "张三.pdf"
+        assert catalog.stats()["rebuilds"] == 1
+        pool.close_all()
+
+
+def test_new_folder_picked_up_without_code_changes():
+    """新增的职位文件夹和简历在下一次查找时识别"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root, pool, catalog = _catalog(tmp)
+        assert catalog.folder_for_position("数据分析师") is None
+
+        (root / "数据分析师").mkdir()
+        (root / "数据分析师" / "赵六.pdf").write_bytes(b"%PDF-1.4 d")
+        assert catalog.find(name="赵六")["folder"] == "数据分析师"
+        assert catalog.folder_for_position("高级数据分析师") == "数据分析师"
+        assert catalog.stats()["folders"] == 3
+        pool.close_all()
+
+
+def test_polling_watcher_updates_index():
+    """后台监听启动后，新增文件由监听线程加入索引"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root, pool, catalog = _catalog(tmp, poll_interval=0.05)
+        catalog.start()
+        try:
+            (root / "Python工程师服务器端开发" / "孙七.pdf").write_bytes(b"%PDF-1.4 e")
+            deadline = time.time() + 2
+            while catalog.stats()["files"] < 4 and time.time() < deadline:
+                time.sleep(0.02)
+            assert catalog.find(name="孙七") is not None
+        finally:
+            catalog.stop()
+            pool.close_all()
+
+
+def test_describe_reports_size_hash_and_pages():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, pool, catalog = _catalog(tmp)
+        (root / "Python工程师服务器端开发" / "包涵.pdf").write_bytes(REAL_PDF.read_bytes())
+
+        info = catalog.describe(catalog.find(name="包涵"))
+        assert info["size"] == REAL_PDF.stat().st_size
+        assert info["sha256"] == hashlib.sha256(REAL_PDF.read_bytes()).hexdigest()
+        assert info["pages"] >= 1
+        pool.close_all()
+
+
+def test_endpoint_describes_off_event_loop():
+    """/api/resume-catalog 在线程池中查找和读取简历，找不到时返回404"""
+    import main
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root, pool, catalog = _catalog(tmp)
+        describe_threads = []
+        original_describe = catalog.describe
+
+        def recording_describe(entry):
+            describe_threads.append(threading.get_ident())
+            return original_describe(entry)
+
+        catalog.describe = recording_describe
+        loop_threads = []
+
+        async def run():
+            loop_threads.append(threading.get_ident())
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                found = await client.get("/api/resume-catalog", params={"name": "李四"})
+                missing = await client.get("/api/resume-catalog", params={"name": "不存在"})
+                return found, missing
+
+        original = main.resume_catalog
+        main.resume_catalog = catalog
+        try:
+            found, missing = asyncio.run(run())
+        finally:
+            main.resume_catalog = original
+            pool.close_all()
+
+        assert found.status_code == 200 and found.json()["filename"] == "李四-简历.pdf"
+        assert missing.status_code == 404
+        assert len(describe_threads) == 1 and describe_threads[0] != loop_threads[0]
+
+
+if __name__ == "__main__":
+    test_lookup_by_folder_name_email_and_position()
+    test_new_folder_picked_up_without_code_changes()
+    test_polling_watcher_updates_index()
+    test_describe_reports_size_hash_and_pages()
+    test_endpoint_describes_off_event_loop()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+测试简历文件服务：ETag/Last-Modified 条件请求、Range 分段读取
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+from urllib.parse import quote
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from resume_files import parse_range
+
+FOLDER = "C端产品经理-AIGC领域"
+FILENAME = "包涵.pdf"
+PDF_PATH = Path(__file__).parent.parent / "resouse" / FOLDER / FILENAME
+URL = f"/api/resume/{quote(FOLDER)}/{quote(FILENAME)}"
+
+
+def _request(*calls):
+    """依次发送请求 [(方法, 路径, 请求头)]，返回响应列表"""
+    import main
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.request(method, url, headers=headers) for method, url, headers in calls]
+
+    return asyncio.run(run())
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    # 结束位置小于起始位置的范围无效，忽略 Range 返回完整文件
+    assert parse_range("bytes=5-3", 1000) is None
+    # 无法解析的范围同样忽略
+    for invalid in ("bytes=5-x", "bytes=x-5", "bytes=-0", "bytes=-", "bytes=-x"):
+        assert parse_range(invalid, 1000) is None, invalid
+    try:
+        parse_range("bytes=1000-", 1000)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("bytes=1000-")
+
+
+def test_full_conditional_and_range_requests():
+    """完整下载带 ETag；携带 ETag 重新请求返回 304；Range 请求返回对应字节"""
+    content = PDF_PATH.read_bytes()
+
+    full, = _request(("GET", URL, {}))
+    assert full.status_code == 200
+    assert full.content == content
+    assert full.headers["content-type"] == "application/pdf"
+    assert full.headers["accept-ranges"] == "bytes"
+    etag = full.headers["etag"]
+    last_modified = full.headers["last-modified"]
+
+    cached, by_date, partial, suffix, stale_if_range, too_far, reversed_range, head = _request(
+        ("GET", URL, {"If-None-Match": etag}),
+        ("GET", URL, {"If-Modified-Since": last_modified}),
+        ("GET", URL, {"Range": "bytes=100-1123"}),
+        ("GET", URL, {"Range": "bytes=-512", "If-Range": etag}),
+        ("GET", URL, {"Range": "bytes=0-9", "If-Range": '"stale"'}),
+        ("GET", URL, {"Range": f"bytes={len(content)}-"}),
+        ("GET", URL, {"Range": "bytes=5-3"}),
+        ("HEAD", URL, {}),
+    )
+    assert cached.status_code == 304 and cached.content == b""
+    assert by_date.status_code == 304
+
+    assert partial.status_code == 206
+    assert partial.content == content[100:1124]
+    assert partial.headers["content-range"] == f"bytes 100-1123/{len(content)}"
+
+    assert suffix.status_code == 206 and suffix.content == content[-512:]
+    assert stale_if_range.status_code == 200 and len(stale_if_range.content) == len(content)
+
+    assert too_far.status_code == 416
+    assert too_far.headers["content-range"] == f"bytes */{len(content)}"
+    assert reversed_range.status_code == 200 and reversed_range.content == content
+
+    assert head.status_code == 200 and head.content == b""
+    assert head.headers["content-length"] == str(len(content))
+    print(f"✅ 完整/304/206/416 响应正确（{len(content)} 字节）")
+
+
+def test_missing_file_returns_404():
+    missing, traversal = _request(
+        ("GET", f"/api/resume/{quote(FOLDER)}/{quote('不存在.pdf')}", {}),
+        ("GET", f"/api/resume/{quote('..')}/{quote('requests.jsonl')}", {}),
+    )
+    assert missing.status_code == 404
+    assert traversal.status_code == 404
+
+
+if __name__ == "__main__":
+    test_parse_range()
+    test_full_conditional_and_range_requests()
+    test_missing_file_returns_404()
@@ -3,11 +3,15 @@
 测试简历解析功能
 """
 
+import asyncio
 import sys
 import os
+import tempfile
+import threading
+from pathlib import Path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from resume_parser import resume_parser
+from resume_parser import ResumeParser, resume_parser
 
 def test_resume_parser_import():
     """测试简历解析器导入"""
@@ -44,7 +48,7 @@ def test_ai_parsing():
     """
     
     try:
-        result = resume_parser.parse_resume_with_ai(sample_resume)
+        result = asyncio.run(resume_parser.parse_resume_with_ai(sample_resume))
         
         print("✅ AI解析测试成功!")
         print(f"📝 解析结果:")
@@ -85,6 +89,30 @@ def test_empty_data_structure():
         print(f"❌ 空数据结构测试失败: {e}")
         return False
 
+def test_text_extracted_off_event_loop():
+    """保存上传文件和提取文本在线程池中执行，不阻塞事件循环"""
+    print("\n🧪 测试文本提取不阻塞事件循环...")
+    with tempfile.TemporaryDirectory() as tmp:
+        parser = ResumeParser()
+        parser.upload_dir = Path(tmp)
+        extract_threads = []
+
+        def recording_extract(file_path):
+            extract_threads.append(threading.get_ident())
+            return ""
+
+        parser.extract_text_from_file = recording_extract
+
+        async def run():
+            return threading.get_ident(), await parser.parse_resume_file(b"%PDF-1.4", "resume.pdf")
+
+        loop_thread, result = asyncio.run(run())
+
+    assert result["success"] is False and result["message"] == "无法从文件中提取文本内容"
+    assert len(extract_threads) == 1 and extract_threads[0] != loop_thread
+    print("✅ 文本提取在线程池中执行")
+    return True
+
 def main():
     """主测试函数"""
     print("🎯 开始测试简历解析功能...")
@@ -93,6 +121,7 @@ def main():
     tests = [
         test_resume_parser_import,
         test_empty_data_structure,
+        test_text_extracted_off_event_loop,
         test_ai_parsing
     ]
     
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+测试评分写缓冲：合并写入、并发记录和批量写回工作簿
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_pool import SQLitePool
+from score_buffer import ScoreWriteBuffer
+
+
+def _setup(tmp):
+    workbook = Path(tmp) / "candidate.xlsx"
+    pd.DataFrame({
+        "姓名": ["张三", "李四"],
+        "Knowledge": [None, 60.0],
+        "Skill": [None, None],
+    }).to_excel(workbook, index=False)
+    pool = SQLitePool(db_path=os.path.join(tmp, "buffer.db"), pool_size=4)
+    return workbook, pool, ScoreWriteBuffer(workbook_path=workbook, flush_interval=60, pool=pool)
+
+
+def test_updates_are_coalesced():
+    """同一维度多次更新只保留最后一次，一次写回全部评分"""
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook, pool, buffer = _setup(tmp)
+        mtime = workbook.stat().st_mtime_ns
+
+        buffer.record("张三", "Knowledge", 70)
+        buffer.record("张三", "Knowledge", 85)
+        buffer.record("张三", "Skill", 90)
+        buffer.record("李四", "Knowledge", 75)
+
+        # 记录评分不会改写工作簿，但读取时可以看到
+        assert workbook.stat().st_mtime_ns == mtime
+        assert buffer.pending_scores("张三") == {"张三": {"Knowledge": 85, "Skill": 90}}
+
+        assert buffer.flush() == 3
+        df = pd.read_excel(workbook).set_index("姓名")
+        assert df.loc["张三", "Knowledge"] == 85
+        assert df.loc["张三", "Skill"] == 90
+        assert df.loc["李四", "Knowledge"] == 75
+
+        stats = buffer.stats()
+        assert stats["pending_updates"] == 0 and stats["flushes"] == 1
+        assert buffer.flush() == 0
+        pool.close_all()
+        print("✅ 评分合并写回正常")
+
+
+def test_concurrent_records_and_flushes():
+    """多个面试同时提交评分、同时写回，不丢失任何一个维度"""
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook, pool, buffer = _setup(tmp)
+        other = ScoreWriteBuffer(workbook_path=workbook, flush_interval=60, pool=pool)
+        dimensions = ["Knowledge", "Skill", "Ability", "Personality", "Motivation", "Value"]
+        errors = []
+
+        def interview(name, writer):
+            try:
+                for i, dimension in enumerate(dimensions):
+                    buffer.record(name, dimension, 60 + i)
+                    if i % 2:
+                        writer.flush()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=interview, args=("张三", buffer)),
+            threading.Thread(target=interview, args=("李四", other)),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        buffer.flush()
+
+        assert not errors, errors
+        df = pd.read_excel(workbook).set_index("姓名")
+        for name in ("张三", "李四"):
+            for i, dimension in enumerate(dimensions):
+                assert df.loc[name, dimension] == 60 + i, (name, dimension)
+        pool.close_all()
+        print("✅ 并发评分写回正常")
+
+
+def test_unknown_candidate_is_dropped():
+    """工作簿中不存在的候选人评分被丢弃，不会一直留在缓冲中"""
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook, pool, buffer = _setup(tmp)
+        buffer.record("不存在", "Knowledge", 80)
+        buffer.flush()
+        assert buffer.stats()["pending_updates"] == 0
+        assert "不存在" not in set(pd.read_excel(workbook)["姓名"])
+        pool.close_all()
+        print("✅ 未知候选人的评分已丢弃")
+
+
+if __name__ == "__main__":
+    test_updates_are_coalesced()
+    test_concurrent_records_and_flushes()
+    test_unknown_candidate_is_dropped()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+测试招聘统计快照：数据未变化时直接返回，只重新读取变化的数据源，多个进程共享同一份快照
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_chat_service import AIChatService
+from db_pool import SQLitePool
+from migrations import run_migrations
+from stats_snapshot import StatsSnapshot
+
+
+def _setup(tmp):
+    root = Path(tmp)
+    (root / "frontend" / "data").mkdir(parents=True)
+    (root / "resouse").mkdir()
+    with open(root / "frontend" / "data" / "real_data.json", "w", encoding="utf-8") as f:
+        json.dump({"jobs": [{"title": "产品经理"}], "candidates": []}, f, ensure_ascii=False)
+    pd.DataFrame({"职位全称": ["Python工程师"], "招聘数量": [2]}).to_excel(root / "resouse" / "job.xlsx", index=False)
+    pd.DataFrame({
+        "姓名": ["张三", "李四"],
+        "岗位名称": ["Python工程师", "Python工程师"],
+        "是否已面试（AI）": ["是", "否"],
+    }).to_excel(root / "resouse" / "candidate.xlsx", index=False)
+
+    pool = SQLitePool(db_path=os.path.join(tmp, "stats.db"), pool_size=4)
+    with pool.connection() as conn:
+        run_migrations(conn)
+    service = AIChatService()
+    return root, pool, service
+
+
+def _snapshot(service, root, pool):
+    return StatsSnapshot(build=service._build_snapshot, root=root, pool=pool)
+
+
+def test_snapshot_is_reused_until_sources_change():
+    """相同数据直接返回快照；工作簿变化时只重新读取该工作簿"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root, pool, service = _setup(tmp)
+        snapshot = _snapshot(service, root, pool)
+
+        data, summary = snapshot.get()
+        assert data["statistics"]["total_candidates"] == 2
+        assert data["statistics"]["completed_interviews"] == 1
+        assert "总候选人数：2人" in summary
+        reloads = snapshot.stats()["source_reloads"]
+
+        assert snapshot.get()[1] == summary
+        assert snapshot.stats()["memory_hits"] == 1 and snapshot.stats()["rebuilds"] == 1
+
+        time.sleep(0.01)
+        pd.DataFrame({
+            "姓名": ["张三", "李四", "王五"],
+            "岗位名称": ["Python工程师"] * 3,
+            "是否已面试（AI）": ["是", "是", "否"],
+        }).to_excel(root / "resouse" / "candidate.xlsx", index=False)
+
+        data, summary = snapshot.get()
+        assert data["statistics"]["total_candidates"] == 3
+        assert data["statistics"]["completed_interviews"] == 2
+        assert snapshot.stats()["source_reloads"] == reloads + 1
+        pool.close_all()
+        print("✅ 只重新读取变化的工作簿")
+
+
+def test_evaluation_changes_bump_version():
+    """写入评分后触发器更新版本号，快照重新读取评分数据"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root, pool, service = _setup(tmp)
+        snapshot = _snapshot(service, root, pool)
+        assert snapshot.get()[0]["statistics"]["average_score"] == 0
+
+        with pool.connection() as conn:
+            conn.execute('''
+                INSERT INTO candidate_evaluations (candidate_id, knowledge, skill, total_score)
+                VALUES (1, 80, 90, 85)
+            ''')
+            conn.commit()
+
+        data, summary = snapshot.get()
+        assert data["statistics"]["average_score"] == 85
+        assert data["statistics"]["avg_knowledge"] == 80
+        assert "平均总分：85.0分" in summary
+        pool.close_all()
+        print("✅ 评分变化后快照已更新")
+
+
+def test_snapshot_shared_between_processes():
+    """另一个实例（模拟其他工作进程）直接读取已保存的快照，不再读取数据源"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root, pool, service = _setup(tmp)
+        data, summary = _snapshot(service, root, pool).get()
+
+        other = _snapshot(service, root, pool)
+        assert other.get() == (data, summary)
+        stats = other.stats()
+        assert stats["shared_hits"] == 1 and stats["rebuilds"] == 0 and stats["source_reloads"] == 0
+        pool.close_all()
+        print("✅ 快照在进程间共享")
+
+
+if __name__ == "__main__":
+    test_snapshot_is_reused_until_sources_change()
+    test_evaluation_changes_bump_version()
+    test_snapshot_shared_between_processes()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+测试简历文本提取缓存：同一份简历只解析一次，两种缓存后端结果一致
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_pool import SQLitePool
+from text_extractor import DiskTextStore, ResumeTextExtractor, SQLiteTextStore
+
+RESUME_DIR = Path(__file__).parent.parent / "resouse"
+
+
+def _sample_resume():
+    return next(RESUME_DIR.glob("*/*.pdf"))
+
+
+def _check_store(extractor, pdf_path):
+    first = extractor.extract_pdf(pdf_path, engine="pdfplumber")
+    second = extractor.extract_pdf(pdf_path, engine="pdfplumber")
+    assert first and first == second
+    assert extractor.stats()["hits"] == 1 and extractor.stats()["misses"] == 1
+
+    # 解析引擎是缓存键的一部分
+    extractor.extract_pdf(pdf_path, engine="pypdf2")
+    assert extractor.stats()["misses"] == 2
+    assert extractor.stats()["entries"] == 2
+    return first
+
+
+def test_sqlite_backend():
+    """sqlite 后端：相同内容的文件（即使路径不同）直接命中缓存"""
+    pdf_path = _sample_resume()
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(db_path=os.path.join(tmp, "text.db"), pool_size=2)
+        extractor = ResumeTextExtractor(backend="sqlite", store=SQLiteTextStore(pool=pool))
+        text = _check_store(extractor, pdf_path)
+
+        copy_path = Path(tmp) / "副本.pdf"
+        shutil.copy(pdf_path, copy_path)
+        assert extractor.extract_pdf(copy_path) == text
+        assert extractor.stats()["hits"] == 2
+        pool.close_all()
+        print("✅ sqlite 后端缓存正常")
+
+
+def test_disk_backend():
+    """disk 后端：结果保存为文本文件，新实例也能命中"""
+    pdf_path = _sample_resume()
+    with tempfile.TemporaryDirectory() as tmp:
+        extractor = ResumeTextExtractor(backend="disk", store=DiskTextStore(directory=tmp))
+        text = _check_store(extractor, pdf_path)
+
+        fresh = ResumeTextExtractor(backend="disk", store=DiskTextStore(directory=tmp))
+        assert fresh.extract_pdf(pdf_path) == text
+        assert fresh.stats()["hits"] == 1 and fresh.stats()["misses"] == 0
+        print("✅ disk 后端缓存正常")
+
+
+if __name__ == "__main__":
+    test_sqlite_backend()
+    test_disk_backend()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+简历文本提取服务 - PDF解析结果按文件内容缓存
+缓存键是文件字节的SHA-256和解析引擎（PyPDF2 / pdfplumber），同一份简历只解析一次；
+文件被替换后哈希变化，自动重新解析。缓存后端由 text_cache.backend 选择（sqlite 或 disk）
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+from pathlib import Path
+
+import pdfplumber
+import PyPDF2
+
+from config import config
+from db_pool import db_pool
+from migrations import run_migrations
+
+
+class SQLiteTextStore:
+    """提取结果保存在数据库的 resume_text_cache 表中"""
+
+    def __init__(self, pool=None):
+        self.pool = pool or db_pool
+        self._schema_ready = False
+
+    def _ensure_schema(self):
+        if not self._schema_ready:
+            with self.pool.connection() as conn:
+                run_migrations(conn)
+            self._schema_ready = True
+
+    def get(self, content_hash, engine):
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT text FROM resume_text_cache WHERE content_hash = ? AND engine = ?",
+                (content_hash, engine)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, content_hash, engine, text):
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO resume_text_cache (content_hash, engine, text, created_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (content_hash, engine, text))
+            conn.commit()
+
+    def count(self):
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM resume_text_cache").fetchone()[0]
+
+
+class DiskTextStore:
+    """提取结果保存为目录下的文本文件：<哈希>.<引擎>.txt"""
+
+    def __init__(self, directory=None):
+        directory = Path(directory or config.get('text_cache.directory', 'cache/resume_text'))
+        if not directory.is_absolute():
+            directory = Path(__file__).parent / directory
+        self.directory = directory
+
+    def _path(self, content_hash, engine):
+        return self.directory / f"{content_hash}.{engine}.txt"
+
+    def get(self, content_hash, engine):
+        try:
+            return self._path(content_hash, engine).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+
+    def put(self, content_hash, engine, text):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(content_hash, engine)
+        # 先写临时文件再替换，并发读取不会读到一半的内容
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temp_path.write_text(text, encoding='utf-8')
+        os.replace(temp_path, path)
+
+    def count(self):
+        if not self.directory.exists():
+            return 0
+        return sum(1 for _ in self.directory.glob("*.txt"))
+
+
+class ResumeTextExtractor:
+    """带缓存的简历文本提取"""
+
+    ENGINES = ("pypdf2", "pdfplumber")
+
+    def __init__(self, backend=None, store=None):
+        self.backend = backend or config.get('text_cache.backend', 'sqlite')
+        if store is not None:
+            self.store = store
+        elif self.backend == 'disk':
+            self.store = DiskTextStore()
+        else:
+            self.store = SQLiteTextStore()
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._parse_seconds = 0.0
+
+    def extract_pdf(self, pdf_path, engine="pdfplumber"):
+        """提取PDF文件的文本"""
+        with open(pdf_path, 'rb') as file:
+            data = file.read()
+        return self.extract_pdf_bytes(data, engine)
+
+    def extract_pdf_bytes(self, data, engine="pdfplumber"):
+        """提取PDF内容的文本，相同内容直接返回缓存结果"""
+        if engine not in self.ENGINES:
+            raise ValueError(f"不支持的PDF解析引擎: {engine}")
+
+        content_hash = hashlib.sha256(data).hexdigest()
+        text = self.store.get(content_hash, engine)
+        if text is not None:
+            with self._lock:
+                self._hits += 1
+            return text
+
+        start = time.perf_counter()
+        if engine == "pypdf2":
+            text = self._parse_pypdf2(data)
+        else:
+            text = self._parse_pdfplumber(data)
+        elapsed = time.perf_counter() - start
+
+        self.store.put(content_hash, engine, text)
+        with self._lock:
+            self._misses += 1
+            self._parse_seconds += elapsed
+        return text
+
+    @staticmethod
+    def _parse_pypdf2(data):
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+        text = ""
+        for page in pdf_reader.pages:
+            text += page.extract_text() + "\n"
+        return text.strip()
+
+    @staticmethod
+    def _parse_pdfplumber(data):
+        text = ""
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            for page in pdf.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    text += page_text + "\n"
+        return text.strip()
+
+    def stats(self):
+        """缓存命中统计"""
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "entries": self.store.count(),
+                "hits": self._hits,
+                "misses": self._misses,
+                "parse_seconds": round(self._parse_seconds, 3)
+            }
+
+
+# 创建全局实例
+text_extractor = ResumeTextExtractor()
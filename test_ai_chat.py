@@ -3,6 +3,7 @@
 测试AI聊天服务 - 基于真实数据
 """
 
+import asyncio
 import sys
 import os
 sys.path.append('backend')
@@ -42,7 +43,7 @@ def test_ai_chat_with_real_data():
         print("-" * 40)
         
         try:
-            result = ai_chat_service.chat_with_ai(question)
+            result = asyncio.run(ai_chat_service.chat_with_ai(question))
             response = result.get('response', '无回复')
             
             print(f"AI回答: {response}")
@@ -58,7 +59,7 @@ def test_ai_chat_with_real_data():
     print(f"\n3. 测试报告生成...")
     
     try:
-        report_result = ai_chat_service.generate_analytics_report("comprehensive")
+        report_result = asyncio.run(ai_chat_service.generate_analytics_report("comprehensive"))
         report = report_result.get('report', '无报告')
         
         print("✅ 报告生成成功")
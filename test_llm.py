@@ -3,6 +3,7 @@
 测试LLM服务
 """
 
+import asyncio
 import sys
 import os
 sys.path.append('backend')
@@ -51,9 +52,9 @@ def test_llm_service():
     
     print("1. 测试生成面试问题...")
     try:
-        questions_data = llm_service.generate_interview_questions(
+        questions_data = asyncio.run(llm_service.generate_interview_questions(
             candidate_info, resume_text, job_description
-        )
+        ))
         
         print(f"✅ 成功生成 {len(questions_data['questions'])} 个问题")
         print(f"面试策略: {questions_data.get('interview_strategy', '无')}")
@@ -69,11 +70,11 @@ def test_llm_service():
         test_question = questions_data['questions'][0]
         test_answer = "我有3年的Python开发经验，熟悉Django和Flask框架，参与过多个项目的开发。"
         
-        evaluation = llm_service.evaluate_answer(
+        evaluation = asyncio.run(llm_service.evaluate_answer(
             test_question['question'], 
             test_answer, 
             test_question['dimension']
-        )
+        ))
         
         print(f"✅ 评估完成")
         print(f"评分: {evaluation['score']}分")
@@ -3,6 +3,7 @@
 测试简历文件映射
 """
 
+import asyncio
 import sys
 import os
 sys.path.append('backend')
@@ -78,9 +79,9 @@ def test_candidate_with_resume(candidate_name):
         
         job_description = "Python工程师服务器端开发，要求熟悉Python、Django等技术"
         
-        questions_data = llm_service.generate_interview_questions(
+        questions_data = asyncio.run(llm_service.generate_interview_questions(
             candidate_info, resume_text, job_description
-        )
+        ))
         
         print(f"生成了 {len(questions_data['questions'])} 个个性化问题")
         print("前3个问题:")
@@ -104,9 +105,9 @@ def test_candidate_without_resume(candidate_name):
     job_description = "Python工程师服务器端开发，要求熟悉Python、Django等技术"
     
     # 没有简历内容
-    questions_data = llm_service.generate_interview_questions(
+    questions_data = asyncio.run(llm_service.generate_interview_questions(
         candidate_info, "", job_description
-    )
+    ))
     
     print(f"生成了 {len(questions_data['questions'])} 个标准问题")
     print("前3个问题:")